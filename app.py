@@ -3,35 +3,151 @@ Flask application for Yoga Asana and Mudra prediction and recommendation system.
 Integrates ML model for asana prediction with mudra information and guidance.
 """
 
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, render_template, request, jsonify, g
+import click
+import hmac
 import os
 import logging
+import re
+import time
 from datetime import datetime
 
-from models.predictor import YogaPredictor
+from models.predictor import YogaPredictor, PRECISION, ML_DIR, INFERENCE_ERROR
+from models.registry import ModelRegistry, PRIMARY
+from models.numpy_backend import PRECISIONS
 from models.mudra_db import MudraDatabase
+from models.batching import MicroBatcher
+from models.cache import ResultCache
+from models.fulltext import FIELDS as SEARCH_FIELDS
+from models.conditions import CONDITIONS
+from models.metrics import METRICS
+from models.logs import configure_logging, RequestSampler, new_request_id, set_request_id
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# Configure logging (LOG_LEVEL, LOG_FORMAT; writes happen on a background thread)
+configure_logging()
 logger = logging.getLogger(__name__)
+request_logger = logging.getLogger(f'{__name__}.requests')
+
+# Requests to these endpoints are logged in samples (LOG_SAMPLE_RATE);
+# slow requests to any endpoint always are
+SAMPLED_ENDPOINTS = frozenset({
+    'predict', 'predict_batch', 'search', 'semantic_search', 'semantic_search_batch'
+})
+request_sampler = RequestSampler()
+
+# Request IDs accepted from the X-Request-ID header
+REQUEST_ID_PATTERN = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'yoga-mudra-dev-key')
 app.config['JSON_SORT_KEYS'] = False
+app.config['MAX_BATCH_SIZE'] = int(os.environ.get('MAX_BATCH_SIZE', 1000))
+app.config['MAX_TOP_K'] = int(os.environ.get('MAX_TOP_K', 20))
+app.config['SEARCH_TOP_K'] = int(os.environ.get('SEARCH_TOP_K', 5))
+
+# Opt-in coalescing of concurrent /predict calls into one forward pass
+app.config['PREDICT_BATCHING'] = os.environ.get('PREDICT_BATCHING', '').lower() in ('1', 'true', 'yes')
+app.config['BATCH_WINDOW_MS'] = float(os.environ.get('BATCH_WINDOW_MS', 2.0))
+app.config['BATCH_MAX_SIZE'] = int(os.environ.get('BATCH_MAX_SIZE', 64))
+
+# Result cache keyed on the normalized token sequence (size 0 disables it)
+app.config['RESULT_CACHE_SIZE'] = int(os.environ.get('RESULT_CACHE_SIZE', 1024))
+app.config['RESULT_CACHE_TTL'] = float(os.environ.get('RESULT_CACHE_TTL', 0)) or None
+app.config['RESULT_CACHE_PATH'] = os.environ.get('RESULT_CACHE_PATH')
+
+# Seconds a client is told to wait while the model is warming up
+app.config['WARMUP_RETRY_AFTER'] = int(os.environ.get('WARMUP_RETRY_AFTER', 5))
+
+# Token for the /admin/model endpoints (disabled when unset)
+app.config['ADMIN_TOKEN'] = os.environ.get('ADMIN_TOKEN')
 
 # Initialize predictor and mudra database
 try:
-    predictor = YogaPredictor()
+    # Data files and NumPy weights load in milliseconds; a Keras model (and
+    # the TensorFlow import) is built by a background warm-up thread so the
+    # catalogue endpoints and /health answer straight away. Under gunicorn
+    # --preload this runs in the master and each worker starts its own
+    # warm-up after fork (see gunicorn.conf.py).
+    predictor = YogaPredictor(defer_model=True)
+    if os.environ.get('APP_PRELOADED') != '1':
+        predictor.start_warmup()
+    # Hot-swapped models and A/B variants are loaded beside this one
+    registry = ModelRegistry(lambda manifest: YogaPredictor(manifest=manifest), predictor)
     mudra_db = MudraDatabase()
     logger.info("Model and databases loaded successfully")
 except Exception as e:
     logger.error(f"Failed to load model: {str(e)}")
-    predictor = None
+    registry = None
     mudra_db = None
 
+cache = None
+if registry and app.config['RESULT_CACHE_SIZE'] > 0:
+    cache = ResultCache(
+        max_entries=app.config['RESULT_CACHE_SIZE'],
+        ttl=app.config['RESULT_CACHE_TTL'],
+        shared_path=app.config['RESULT_CACHE_PATH']
+    )
+
+batcher = None
+if registry and app.config['PREDICT_BATCHING']:
+    batcher = MicroBatcher(
+        registry.predict_batch,
+        window_ms=app.config['BATCH_WINDOW_MS'],
+        max_batch_size=app.config['BATCH_MAX_SIZE']
+    )
+    logger.info(
+        f"Micro-batching enabled (window {app.config['BATCH_WINDOW_MS']} ms, "
+        f"max {app.config['BATCH_MAX_SIZE']} items)"
+    )
+
+
+@app.before_request
+def _start_request():
+    request_id = request.headers.get('X-Request-ID', '')
+    if not REQUEST_ID_PATTERN.match(request_id):
+        request_id = new_request_id()
+    g.request_id = request_id
+    set_request_id(request_id)
+    g.stages = METRICS.start_trace()
+    g.request_start = time.perf_counter()
+
+
+@app.after_request
+def _finish_request(response):
+    """Record the request latency, log it if sampled, share this worker's metrics"""
+    start = g.get('request_start')
+    if start is not None:
+        duration = time.perf_counter() - start
+        endpoint = request.endpoint or 'unmatched'
+        METRICS.observe('yoga_request_seconds', duration, endpoint=endpoint)
+        METRICS.end_trace()
+        _log_request(response, endpoint, duration * 1000.0)
+        response.headers['X-Request-ID'] = g.request_id
+    set_request_id(None)
+    METRICS.start_flusher()
+    return response
+
+
+def _log_request(response, endpoint, duration_ms):
+    """One structured line for sampled and slow requests"""
+    reason = request_sampler.reason(duration_ms, sample=endpoint in SAMPLED_ENDPOINTS)
+    if reason is None:
+        return
+    
+    stages_ms = {name: round(seconds * 1000.0, 3) for name, seconds in g.stages.items()}
+    stages = ' '.join(f'{name}={ms}' for name, ms in stages_ms.items())
+    request_logger.info(
+        f"[{g.request_id}] {request.method} {request.path} {response.status_code} "
+        f"in {duration_ms:.2f} ms ({reason}){' stages_ms ' + stages if stages else ''}",
+        extra={
+            'endpoint': endpoint,
+            'status': response.status_code,
+            'duration_ms': round(duration_ms, 3),
+            'stages_ms': stages_ms,
+            'reason': reason
+        }
+    )
+
 
 @app.route('/')
 def index():
@@ -46,48 +162,268 @@ def predict():
     
     Expected JSON:
     {
-        "benefits": "description of desired benefits"
+        "benefits": "description of desired benefits",
+        "top_k": 3,  (optional, number of ranked asanas to return)
+        "cluster": "2",  (optional, only predict asanas from this cluster)
+        "similar": true,  (optional, include the asana's cluster mates)
+        "explain": true,  (optional, include the words behind the prediction)
+        "exclude_conditions": ["pregnancy"]  (optional, skip unsafe asanas)
     }
     """
+    predictor = None
     try:
+        start = time.perf_counter()
         data = request.get_json()
         if not data or 'benefits' not in data:
             return jsonify({'error': 'Missing benefits field'}), 400
+        if not isinstance(data['benefits'], str):
+            return jsonify({'error': 'Benefits field must be a string'}), 400
         
         benefits_text = data['benefits'].strip()
         if not benefits_text:
             return jsonify({'error': 'Benefits field cannot be empty'}), 400
         
-        if not predictor:
+        options, error = _parse_options(data)
+        if error:
+            return jsonify({'error': error}), 400
+        METRICS.stage('preprocess', time.perf_counter() - start)
+        
+        if not registry:
             return jsonify({'error': 'Model not initialized'}), 500
+        registry.check_for_changes()
+        variant, predictor = registry.choose(request.headers.get('X-Routing-Key'))
+        if not predictor.ready:
+            return _not_ready_response(predictor)
         
-        # Get predictions
-        prediction = predictor.predict(benefits_text)
+        # Serve repeated inputs from the result cache
+        tokens = predictor.cache_key(benefits_text) if cache else None
+        cache_key = [tokens, options, variant] if tokens is not None else None
+        generation = (registry.generation, mudra_db.data_digest)
+        cached = cache.get(cache_key, generation) if cache_key is not None else None
+        if cache_key is not None:
+            METRICS.inc('yoga_cache_requests_total', result='miss' if cached is None else 'hit')
         
-        # Get complementary mudra recommendations
-        mudra_recommendations = mudra_db.get_mudras_for_asana(
-            prediction['asana'],
-            prediction['confidence']
-        )
+        if cached is not None:
+            result = dict(cached, timestamp=datetime.utcnow().isoformat())
+        else:
+            # Get predictions
+            if batcher:
+                prediction = batcher.predict(benefits_text, variant=variant, **options)
+            else:
+                prediction = predictor.predict(benefits_text, **options)
+            
+            # Invalid input and unknown filters are the client's fault,
+            # scoring failures the server's
+            if 'error' in prediction:
+                return jsonify({'error': prediction['error']}), _error_status(prediction)
+            
+            start = time.perf_counter()
+            result = _build_result(prediction, predictor, variant)
+            METRICS.stage('mudras', time.perf_counter() - start)
+            
+            if cache_key is not None:
+                cache.put(cache_key, generation, result)
         
-        result = {
-            'asana': prediction['asana'],
-            'confidence': float(prediction['confidence']),
-            'description': prediction.get('description', ''),
-            'benefits': prediction.get('benefits', ''),
-            'contraindications': prediction.get('contraindications', ''),
-            'mudra_recommendations': mudra_recommendations,
-            'timestamp': datetime.utcnow().isoformat()
-        }
+        METRICS.inc('yoga_predictions_total', model_version=predictor.model_version,
+                    variant=variant)
         
-        logger.info(f"Prediction successful for: {benefits_text[:50]}")
-        return jsonify(result), 200
+        start = time.perf_counter()
+        response = jsonify(result)
+        METRICS.stage('serialize', time.perf_counter() - start)
+        return response, 200
         
     except Exception as e:
         logger.error(f"Prediction error: {str(e)}")
+        _count_error(e, predictor)
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/predict/batch', methods=['POST'])
+def predict_batch():
+    """
+    Predict yoga asanas for several benefits descriptions in one forward pass
+    
+    Expected JSON:
+    {
+        "benefits": ["description one", "description two", ...],
+        "top_k": 3  (optional, applies to every item)
+    }
+    
+    Invalid entries get a per-item error instead of failing the request.
+    """
+    predictor = None
+    try:
+        start = time.perf_counter()
+        data = request.get_json()
+        if not data or not isinstance(data.get('benefits'), list):
+            return jsonify({'error': 'Missing benefits list'}), 400
+        
+        items = data['benefits']
+        if len(items) > app.config['MAX_BATCH_SIZE']:
+            return jsonify({
+                'error': f"Batch too large (max {app.config['MAX_BATCH_SIZE']} items)"
+            }), 400
+        
+        options, error = _parse_options(data)
+        if error:
+            return jsonify({'error': error}), 400
+        
+        if not registry:
+            return jsonify({'error': 'Model not initialized'}), 500
+        registry.check_for_changes()
+        variant, predictor = registry.choose(request.headers.get('X-Routing-Key'))
+        if not predictor.ready:
+            return _not_ready_response(predictor)
+        
+        results = [None] * len(items)
+        valid_indices = []
+        valid_texts = []
+        for i, item in enumerate(items):
+            if not isinstance(item, str):
+                results[i] = {'error': 'Benefits entry must be a string'}
+            elif not item.strip():
+                results[i] = {'error': 'Benefits field cannot be empty'}
+            else:
+                valid_indices.append(i)
+                valid_texts.append(item.strip())
+        METRICS.stage('preprocess', time.perf_counter() - start)
+        
+        predictions = predictor.predict_batch(valid_texts, **options)
+        
+        failed = next(
+            (p for p in predictions if p.get('error_kind') == INFERENCE_ERROR), None
+        )
+        if failed is not None:
+            return jsonify({'error': failed['error']}), 500
+        
+        start = time.perf_counter()
+        succeeded = 0
+        for i, prediction in zip(valid_indices, predictions):
+            results[i] = _build_result(prediction, predictor, variant)
+            succeeded += 'error' not in prediction
+        METRICS.stage('mudras', time.perf_counter() - start)
+        if succeeded:
+            METRICS.inc('yoga_predictions_total', succeeded,
+                        model_version=predictor.model_version, variant=variant)
+        
+        start = time.perf_counter()
+        response = jsonify({'results': results, 'count': len(results)})
+        METRICS.stage('serialize', time.perf_counter() - start)
+        return response, 200
+        
+    except Exception as e:
+        logger.error(f"Batch prediction error: {str(e)}")
+        _count_error(e, predictor)
+        return jsonify({'error': str(e)}), 500
+
+
+def _error_status(prediction):
+    """HTTP status of a failed prediction: 500 if scoring failed, else 400"""
+    return 500 if prediction.get('error_kind') == INFERENCE_ERROR else 400
+
+
+def _count_error(error, predictor=None):
+    """Count a prediction request that failed with an exception"""
+    METRICS.inc('yoga_errors_total', type=type(error).__name__,
+                model_version=predictor.model_version if predictor else 'none')
+
+
+def _not_ready_response(predictor):
+    """503 answer for prediction requests that arrive before the model is warm"""
+    if predictor.state == 'failed':
+        return jsonify({'error': 'Model failed to load'}), 503
+    
+    predictor.start_warmup()
+    response = jsonify({'error': 'Model is warming up, retry shortly'})
+    response.headers['Retry-After'] = str(app.config['WARMUP_RETRY_AFTER'])
+    return response, 503
+
+
+def _parse_options(data):
+    """
+    Validate the optional prediction settings of a request body
+    
+    Returns:
+        (options, error) where options are keyword arguments for the predictor
+    """
+    options = {}
+    
+    top_k = data.get('top_k', 1)
+    if isinstance(top_k, bool) or not isinstance(top_k, int) \
+            or not 1 <= top_k <= app.config['MAX_TOP_K']:
+        return None, f"top_k must be an integer between 1 and {app.config['MAX_TOP_K']}"
+    if top_k > 1:
+        options['top_k'] = top_k
+    
+    cluster = data.get('cluster')
+    if cluster is not None:
+        # Cluster ids are checked by the predictor serving the request, whose
+        # cluster map may differ from the primary's
+        if isinstance(cluster, bool) or not isinstance(cluster, (str, int)):
+            return None, f"Unknown cluster: {cluster}"
+        options['cluster'] = str(cluster)
+    
+    similar = data.get('similar', False)
+    if not isinstance(similar, bool):
+        return None, 'similar must be a boolean'
+    if similar:
+        options['similar'] = True
+    
+    explain = data.get('explain', False)
+    if not isinstance(explain, bool):
+        return None, 'explain must be a boolean'
+    if explain:
+        options['explain'] = True
+    
+    exclude_conditions = data.get('exclude_conditions', [])
+    if not isinstance(exclude_conditions, list) \
+            or not all(isinstance(c, str) for c in exclude_conditions):
+        return None, 'exclude_conditions must be a list of condition names'
+    unknown = [c for c in exclude_conditions if c not in CONDITIONS]
+    if unknown:
+        return None, f"Unknown condition: {unknown[0]} (see /conditions)"
+    if exclude_conditions:
+        # A sorted tuple, so equal requests share batches and cache entries
+        options['exclude_conditions'] = tuple(sorted(set(exclude_conditions)))
+    
+    return options, None
+
+
+def _build_result(prediction, predictor=None, variant=PRIMARY):
+    """
+    Combine a predictor result with its complementary mudra recommendations
+    
+    A failed prediction is passed on as just its error.
+    """
+    if 'error' in prediction:
+        return {'error': prediction['error']}
+    
+    mudra_recommendations = mudra_db.get_mudras_for_asana(
+        prediction['asana'],
+        prediction['confidence']
+    )
+    
+    result = {
+        'asana': prediction['asana'],
+        'confidence': float(prediction['confidence']),
+        'description': prediction.get('description', ''),
+        'benefits': prediction.get('benefits', ''),
+        'contraindications': prediction.get('contraindications', ''),
+        'mudra_recommendations': mudra_recommendations,
+        'timestamp': datetime.utcnow().isoformat()
+    }
+    
+    for key in ('cluster', 'similar_asanas', 'predictions', 'explanation', 'is_mock'):
+        if key in prediction:
+            result[key] = prediction[key]
+    
+    if predictor is not None:
+        result['model_version'] = predictor.model_version
+        result['model_variant'] = variant
+    
+    return result
+
+
 @app.route('/mudra/<mudra_name>', methods=['GET'])
 def get_mudra(mudra_name):
     """Get detailed information about a specific mudra"""
@@ -120,7 +456,7 @@ def list_mudras():
 def list_asanas():
     """Get list of all available asanas"""
     try:
-        asanas = predictor.get_available_asanas() if predictor else []
+        asanas = registry.primary.get_available_asanas() if registry else []
         return jsonify({'asanas': asanas, 'count': len(asanas)}), 200
         
     except Exception as e:
@@ -128,18 +464,424 @@ def list_asanas():
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/conditions', methods=['GET'])
+def list_conditions():
+    """Get the conditions /predict can exclude, with how many asanas each rules out"""
+    try:
+        condition_index = registry.primary.condition_index if registry else None
+        counts = dict.fromkeys(CONDITIONS, 0)
+        unknown = 0
+        if condition_index:
+            for asana_id in condition_index.asana_bits:
+                for condition in condition_index.conditions_of(asana_id):
+                    counts[condition] += 1
+                unknown += condition_index.contraindications_unknown(asana_id)
+        conditions = [
+            {'name': name, 'contraindicated_asanas': count} for name, count in counts.items()
+        ]
+        return jsonify({
+            'conditions': conditions,
+            'count': len(conditions),
+            'unknown_contraindications': unknown
+        }), 200
+        
+    except Exception as e:
+        logger.error(f"Error retrieving conditions: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/asanas/<int:asana_id>/similar', methods=['GET'])
+def similar_asanas(asana_id):
+    """Get the asanas that share a cluster with the given asana"""
+    try:
+        cluster_index = registry.primary.cluster_index if registry else None
+        cluster = cluster_index.cluster_of(asana_id) if cluster_index else None
+        
+        if cluster is None:
+            return jsonify({'error': 'Asana not found in any cluster'}), 404
+        
+        similar = list(cluster_index.similar(asana_id))
+        return jsonify({
+            'asana_id': asana_id,
+            'cluster': cluster,
+            'similar': similar,
+            'count': len(similar)
+        }), 200
+        
+    except Exception as e:
+        logger.error(f"Error retrieving similar asanas: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/search', methods=['POST'])
+def search():
+    """
+    Keyword search over the asana catalogue (BM25)
+    
+    Expected JSON:
+    {
+        "query": "sciatica",
+        "top_k": 5,  (optional, number of asanas to return)
+        "boosts": {"name": 2, "benefits": 1.5}  (optional, weight per field)
+    }
+    """
+    try:
+        data = request.get_json()
+        if not data or not isinstance(data.get('query'), str):
+            return jsonify({'error': 'Missing query field'}), 400
+        
+        query = data['query'].strip()
+        if not query:
+            return jsonify({'error': 'Query cannot be empty'}), 400
+        
+        top_k, error = _parse_search_top_k(data)
+        if error:
+            return jsonify({'error': error}), 400
+        
+        boosts = data.get('boosts', {})
+        if not isinstance(boosts, dict):
+            return jsonify({'error': 'boosts must be an object'}), 400
+        for field, boost in boosts.items():
+            if field not in SEARCH_FIELDS:
+                return jsonify({
+                    'error': f"Unknown search field: {field} (one of {', '.join(SEARCH_FIELDS)})"
+                }), 400
+            if isinstance(boost, bool) or not isinstance(boost, (int, float)) or boost < 0:
+                return jsonify({'error': 'boosts must be non-negative numbers'}), 400
+        
+        if not registry:
+            return jsonify({'error': 'Model not initialized'}), 500
+        registry.check_for_changes()
+        predictor = registry.primary
+        if predictor.fulltext_index is None:
+            return jsonify({'error': 'Search index not available'}), 503
+        
+        results = predictor.search(query, top_k, boosts)
+        return jsonify({'query': query, 'results': results, 'count': len(results)}), 200
+    
+    except Exception as e:
+        logger.error(f"Search error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/search/semantic', methods=['POST'])
+def semantic_search():
+    """
+    Find the asanas whose benefits read most like a description
+    
+    Expected JSON:
+    {
+        "benefits": "description of desired benefits",
+        "top_k": 5  (optional, number of asanas to return)
+    }
+    """
+    predictor = None
+    try:
+        data = request.get_json()
+        if not data or 'benefits' not in data:
+            return jsonify({'error': 'Missing benefits field'}), 400
+        if not isinstance(data['benefits'], str):
+            return jsonify({'error': 'Benefits field must be a string'}), 400
+        
+        benefits_text = data['benefits'].strip()
+        if not benefits_text:
+            return jsonify({'error': 'Benefits field cannot be empty'}), 400
+        
+        top_k, error = _parse_search_top_k(data)
+        if error:
+            return jsonify({'error': error}), 400
+        
+        predictor, error_response = _search_predictor()
+        if error_response:
+            return error_response
+        
+        result = predictor.semantic_search([benefits_text], top_k)[0]
+        if 'error' in result:
+            return jsonify({'query': benefits_text, 'error': result['error']}), 400
+        
+        return jsonify({
+            'query': benefits_text,
+            'results': result['results'],
+            'count': len(result['results'])
+        }), 200
+    
+    except Exception as e:
+        logger.error(f"Semantic search error: {str(e)}")
+        _count_error(e, predictor)
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/search/semantic/batch', methods=['POST'])
+def semantic_search_batch():
+    """
+    Semantic search for several descriptions with one matrix product
+    
+    Expected JSON:
+    {
+        "benefits": ["description one", "description two", ...],
+        "top_k": 5  (optional, applies to every item)
+    }
+    
+    Invalid entries get a per-item error instead of failing the request.
+    """
+    predictor = None
+    try:
+        data = request.get_json()
+        if not data or not isinstance(data.get('benefits'), list):
+            return jsonify({'error': 'Missing benefits list'}), 400
+        
+        items = data['benefits']
+        if len(items) > app.config['MAX_BATCH_SIZE']:
+            return jsonify({
+                'error': f"Batch too large (max {app.config['MAX_BATCH_SIZE']} items)"
+            }), 400
+        
+        top_k, error = _parse_search_top_k(data)
+        if error:
+            return jsonify({'error': error}), 400
+        
+        predictor, error_response = _search_predictor()
+        if error_response:
+            return error_response
+        
+        results = [None] * len(items)
+        valid_indices = []
+        valid_texts = []
+        for i, item in enumerate(items):
+            if not isinstance(item, str):
+                results[i] = {'error': 'Benefits entry must be a string'}
+            elif not item.strip():
+                results[i] = {'error': 'Benefits field cannot be empty'}
+            else:
+                valid_indices.append(i)
+                valid_texts.append(item.strip())
+        
+        for i, result in zip(valid_indices, predictor.semantic_search(valid_texts, top_k)):
+            results[i] = dict(result, query=items[i].strip())
+        
+        return jsonify({'results': results, 'count': len(results)}), 200
+    
+    except Exception as e:
+        logger.error(f"Batch semantic search error: {str(e)}")
+        _count_error(e, predictor)
+        return jsonify({'error': str(e)}), 500
+
+
+def _parse_search_top_k(data):
+    """
+    Validate the top_k of a search request
+    
+    Returns:
+        (top_k, error)
+    """
+    top_k = data.get('top_k', app.config['SEARCH_TOP_K'])
+    if isinstance(top_k, bool) or not isinstance(top_k, int) \
+            or not 1 <= top_k <= app.config['MAX_TOP_K']:
+        return None, f"top_k must be an integer between 1 and {app.config['MAX_TOP_K']}"
+    return top_k, None
+
+
+def _search_predictor():
+    """
+    The primary predictor, if it can serve searches
+    
+    Returns:
+        (predictor, error response)
+    """
+    if not registry:
+        return None, (jsonify({'error': 'Model not initialized'}), 500)
+    registry.check_for_changes()
+    predictor = registry.primary
+    if not predictor.ready:
+        return predictor, _not_ready_response(predictor)
+    if predictor.semantic_index is None:
+        return predictor, (jsonify({'error': 'Semantic index not available'}), 503)
+    return predictor, None
+
+
+@app.route('/stats/batching', methods=['GET'])
+def batching_stats():
+    """Queue depth, batch sizes and added wait latency of the micro-batcher"""
+    if not batcher:
+        return jsonify({'enabled': False}), 200
+    return jsonify(dict(batcher.stats(), enabled=True)), 200
+
+
+@app.route('/stats/cache', methods=['GET'])
+def cache_stats():
+    """Hit, miss and eviction counters of the result cache"""
+    if not cache:
+        return jsonify({'enabled': False}), 200
+    return jsonify(dict(cache.stats(), enabled=True)), 200
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Stage latencies and prediction counters in Prometheus text format"""
+    return app.response_class(
+        METRICS.render(), content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
+
+
 @app.route('/health', methods=['GET'])
 def health_check():
-    """Health check endpoint for Azure deployment"""
+    """
+    Liveness check endpoint for Azure deployment
+    
+    Always 200 while the process is serving requests; `ready` reports
+    separately whether predictions can be served yet.
+    """
+    predictor = registry.primary if registry else None
     status = {
         'status': 'healthy',
         'timestamp': datetime.utcnow().isoformat(),
+        'live': True,
+        'ready': bool(predictor and predictor.ready),
+        'model_state': predictor.state if predictor else 'failed',
         'model_loaded': predictor is not None,
-        'mudra_db_loaded': mudra_db is not None
+        'model_version': predictor.model_version if predictor else None,
+        'mudra_db_loaded': mudra_db is not None,
+        'mudra_data_version': mudra_db.data_version if mudra_db else None
     }
     return jsonify(status), 200
 
 
+@app.route('/health/ready', methods=['GET'])
+def readiness_check():
+    """Readiness check: 200 once predictions can be served, 503 until then"""
+    predictor = registry.primary if registry else None
+    if predictor and predictor.ready:
+        return jsonify({'ready': True, 'model_state': predictor.state}), 200
+    
+    if predictor and predictor.state == 'loading':
+        predictor.start_warmup()
+    response = jsonify({
+        'ready': False,
+        'model_state': predictor.state if predictor else 'failed'
+    })
+    response.headers['Retry-After'] = str(app.config['WARMUP_RETRY_AFTER'])
+    return response, 503
+
+
+def _admin_error():
+    """Error response unless the request carries the admin token, else None"""
+    token = app.config['ADMIN_TOKEN']
+    if not token:
+        return jsonify({'error': 'Admin endpoints are disabled; set ADMIN_TOKEN'}), 403
+    if not hmac.compare_digest(request.headers.get('X-Admin-Token', ''), token):
+        return jsonify({'error': 'Invalid admin token'}), 403
+    if not registry:
+        return jsonify({'error': 'Model not initialized'}), 500
+    return None
+
+
+@app.route('/admin/model', methods=['GET'])
+def model_status():
+    """Loaded model variants, their manifests and the A/B split"""
+    error = _admin_error()
+    if error:
+        return error
+    return jsonify(registry.describe()), 200
+
+
+@app.route('/admin/model/load', methods=['POST'])
+def load_model():
+    """
+    Load a model beside the current ones and swap it in once it is warm
+    
+    Expected JSON:
+    {
+        "manifest": "model_v2.json",  (optional, relative to Machine_Learning/)
+        "variant": "candidate"  (optional, default "primary")
+    }
+    
+    The swap only affects this process; to roll a model out to every worker,
+    update the files the primary's manifest points to instead.
+    """
+    error = _admin_error()
+    if error:
+        return error
+    
+    data = request.get_json(silent=True) or {}
+    manifest = data.get('manifest')
+    variant = data.get('variant', PRIMARY)
+    if manifest is not None and not isinstance(manifest, str):
+        return jsonify({'error': 'manifest must be a string'}), 400
+    if not isinstance(variant, str) or not variant:
+        return jsonify({'error': 'variant must be a non-empty string'}), 400
+    
+    try:
+        registry.load(ML_DIR / manifest if manifest else None, variant)
+    except Exception as e:
+        logger.error(f"Model load failed: {str(e)}")
+        return jsonify({'error': str(e)}), 422
+    return jsonify(registry.describe()), 200
+
+
+@app.route('/admin/model/promote', methods=['POST'])
+def promote_model():
+    """Make a variant the primary. Expected JSON: {"variant": "candidate"}"""
+    error = _admin_error()
+    if error:
+        return error
+    
+    variant = (request.get_json(silent=True) or {}).get('variant')
+    try:
+        registry.promote(variant)
+    except KeyError:
+        return jsonify({'error': f'Unknown variant: {variant}'}), 404
+    return jsonify(registry.describe()), 200
+
+
+@app.route('/admin/model/split', methods=['POST'])
+def split_traffic():
+    """
+    Set the A/B split
+    
+    Expected JSON: {"split": {"candidate": 0.1}}; the primary gets the rest.
+    Requests with the same X-Routing-Key header always get the same variant.
+    """
+    error = _admin_error()
+    if error:
+        return error
+    
+    split = (request.get_json(silent=True) or {}).get('split')
+    if not isinstance(split, dict):
+        return jsonify({'error': 'split must be an object of variant fractions'}), 400
+    try:
+        registry.set_split(split)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(registry.describe()), 200
+
+
+@app.route('/admin/model/<variant>', methods=['DELETE'])
+def remove_model(variant):
+    """Unload a non-primary variant"""
+    error = _admin_error()
+    if error:
+        return error
+    
+    try:
+        registry.remove(variant)
+    except KeyError:
+        return jsonify({'error': f'Unknown variant: {variant}'}), 404
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(registry.describe()), 200
+
+
+@app.cli.command('build-artifacts')
+@click.option('--precision', type=click.Choice(PRECISIONS), default=None,
+              help='Weight precision to store (default: MODEL_PRECISION)')
+def build_artifacts(precision):
+    """Compile the model weights and data files into the artifact bundle"""
+    source = YogaPredictor(backend='numpy', use_bundle=False, precision='float32')
+    header = source.build_artifacts(precision=precision or PRECISION)
+    click.echo(f"Built artifact bundle version {header['version']} "
+               f"with fields: {', '.join(header['fields'])}")
+
+
 @app.errorhandler(404)
 def not_found(error):
     """Handle 404 errors"""
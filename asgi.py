@@ -0,0 +1,282 @@
+"""
+ASGI entry point for the Yoga Mudra app.
+
+Serves the same routes as app.py from an event loop:
+
+    uvicorn asgi:application --host 0.0.0.0 --port 5000
+
+Requests are handed to the Flask app through a small WSGI bridge. The event
+loop never runs Flask itself: prediction routes run on a bounded inference
+thread pool, and cheap routes (mudra catalogue, asana lists, health and
+stats) on a small pool of their own, so a slow catalogue call cannot stall
+the loop and no catalogue call waits behind inference. When every thread of
+a pool is busy and its queue limit is reached, new requests are rejected
+with 429 instead of queueing without bound. Request bodies larger than
+ASGI_MAX_BODY_BYTES are rejected with 413 before they are buffered.
+"""
+
+import asyncio
+import io
+import json
+import logging
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from app import app
+
+logger = logging.getLogger(__name__)
+
+INFERENCE_THREADS = int(os.environ.get('ASGI_INFERENCE_THREADS', os.cpu_count() or 1))
+QUEUE_LIMIT = int(os.environ.get('ASGI_QUEUE_LIMIT', 64))
+RETRY_AFTER = int(os.environ.get('ASGI_RETRY_AFTER', 1))
+CATALOGUE_THREADS = int(os.environ.get('ASGI_CATALOGUE_THREADS', 4))
+CATALOGUE_QUEUE_LIMIT = int(os.environ.get('ASGI_CATALOGUE_QUEUE_LIMIT', 256))
+MAX_BODY_BYTES = int(os.environ.get('ASGI_MAX_BODY_BYTES', 4 * 1024 * 1024))
+
+# Routes whose handlers are CPU-bound and must stay off the event loop
+INFERENCE_PATHS = frozenset({
+    '/predict', '/predict/batch', '/search', '/search/semantic', '/search/semantic/batch',
+    '/admin/model/load'
+})
+
+
+class QueueFull(Exception):
+    """Raised when an executor has no room for another request"""
+
+
+class BodyTooLarge(Exception):
+    """Raised when a request body exceeds MAX_BODY_BYTES"""
+
+
+class BoundedExecutor:
+    """
+    Thread pool with admission control.
+
+    At most max_workers calls run at once and at most queue_limit more wait
+    for a thread; anything beyond that is refused with QueueFull. All
+    accounting happens on the event loop thread, so it needs no lock.
+    """
+
+    def __init__(self, max_workers, queue_limit, name='inference'):
+        """
+        Initialize the executor
+
+        Args:
+            max_workers: Number of threads
+            queue_limit: Requests allowed to wait for a free thread
+            name: Prefix of the thread names
+        """
+        self.max_workers = max_workers
+        self.queue_limit = queue_limit
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix=name)
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+
+    async def run(self, fn, *args):
+        """
+        Run fn(*args) on the pool
+
+        Raises:
+            QueueFull: if the running and waiting calls are at the limit
+        """
+        if self.in_flight >= self.max_workers + self.queue_limit:
+            self.rejected += 1
+            raise QueueFull()
+
+        self.in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, fn, *args)
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+
+    def stats(self):
+        """Current load and admission counters"""
+        return {
+            'threads': self.max_workers,
+            'queue_limit': self.queue_limit,
+            'running': min(self.in_flight, self.max_workers),
+            'queued': max(self.in_flight - self.max_workers, 0),
+            'completed': self.completed,
+            'rejected': self.rejected
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+
+executor = BoundedExecutor(INFERENCE_THREADS, QUEUE_LIMIT)
+catalogue_executor = BoundedExecutor(CATALOGUE_THREADS, CATALOGUE_QUEUE_LIMIT, name='catalogue')
+
+
+def _build_environ(scope, body):
+    """WSGI environ for an ASGI HTTP scope"""
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': client[0],
+        'REMOTE_PORT': str(client[1]),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name == 'CONTENT_TYPE':
+            environ['CONTENT_TYPE'] = value
+        elif name == 'CONTENT_LENGTH':
+            environ['CONTENT_LENGTH'] = value
+        else:
+            key = f'HTTP_{name}'
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+    environ.setdefault('CONTENT_LENGTH', str(len(body)))
+    return environ
+
+
+def _call_wsgi(environ):
+    """
+    Run the Flask app on one request
+
+    Returns:
+        (status code, list of (name, value) byte header pairs, body bytes)
+    """
+    response = {}
+
+    def start_response(status, headers, exc_info=None):
+        response['status'] = int(status.split(' ', 1)[0])
+        response['headers'] = [
+            (name.lower().encode('latin-1'), value.encode('latin-1'))
+            for name, value in headers
+        ]
+
+    chunks = app.wsgi_app(environ, start_response)
+    try:
+        body = b''.join(chunks)
+    finally:
+        if hasattr(chunks, 'close'):
+            chunks.close()
+    return response['status'], response['headers'], body
+
+
+def _content_length(scope):
+    """Declared Content-Length of a request, or None"""
+    for name, value in scope.get('headers', []):
+        if name.lower() == b'content-length':
+            try:
+                return int(value)
+            except ValueError:
+                return None
+    return None
+
+
+async def _read_body(scope, receive):
+    """
+    Read the complete request body
+
+    Raises:
+        BodyTooLarge: if the declared or received length exceeds MAX_BODY_BYTES
+    """
+    declared = _content_length(scope)
+    if declared is not None and declared > MAX_BODY_BYTES:
+        raise BodyTooLarge()
+
+    parts = []
+    size = 0
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            break
+        part = message.get('body', b'')
+        size += len(part)
+        if size > MAX_BODY_BYTES:
+            raise BodyTooLarge()
+        parts.append(part)
+        if not message.get('more_body', False):
+            break
+    return b''.join(parts)
+
+
+async def _send_json(send, status, payload, headers=()):
+    body = json.dumps(payload).encode('utf-8')
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [
+            (b'content-type', b'application/json'),
+            (b'content-length', str(len(body)).encode('latin-1')),
+            *headers
+        ]
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            logger.info(
+                f"ASGI app started ({executor.max_workers} inference threads, "
+                f"queue limit {executor.queue_limit}; {catalogue_executor.max_workers} "
+                f"catalogue threads, queue limit {catalogue_executor.queue_limit})"
+            )
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            executor.shutdown()
+            catalogue_executor.shutdown()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def application(scope, receive, send):
+    """ASGI callable"""
+    if scope['type'] == 'lifespan':
+        await _lifespan(receive, send)
+        return
+    if scope['type'] != 'http':
+        return
+
+    path = scope['path']
+    if path == '/stats/executor':
+        await _send_json(send, 200, dict(executor.stats(), catalogue=catalogue_executor.stats()))
+        return
+
+    try:
+        body = await _read_body(scope, receive)
+    except BodyTooLarge:
+        await _send_json(
+            send, 413, {'error': f'Request body too large (max {MAX_BODY_BYTES} bytes)'}
+        )
+        return
+    environ = _build_environ(scope, body)
+
+    if path in INFERENCE_PATHS:
+        pool, error = executor, 'Too many prediction requests queued, retry shortly'
+    else:
+        pool, error = catalogue_executor, 'Too many requests queued, retry shortly'
+    try:
+        status, headers, body = await pool.run(_call_wsgi, environ)
+    except QueueFull:
+        await _send_json(
+            send, 429, {'error': error},
+            headers=[(b'retry-after', str(RETRY_AFTER).encode('latin-1'))]
+        )
+        return
+
+    await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+    await send({'type': 'http.response.body', 'body': body})
@@ -0,0 +1,11 @@
+"""
+Benchmarks for the Yoga Mudra app.
+
+    python -m benchmarks -o results.json
+    python -m benchmarks -o new.json --baseline results.json --threshold 0.25
+
+The suite (see benchmarks.suite) times the predictor, the mudra database
+queries and the Flask routes on inputs taken from the asana CSV, and fails
+when a case's median latency regresses past the threshold. loadgen.py and
+quantization.py are standalone scripts for HTTP load and weight precision.
+"""
@@ -0,0 +1,94 @@
+"""
+Run the benchmark suite and compare it with a baseline:
+
+    python -m benchmarks -o results.json
+    python -m benchmarks -o new.json --baseline results.json --threshold 0.25
+
+Exits with status 1 when any case's median latency (of its best round) is
+more than --threshold above the baseline.
+"""
+
+import argparse
+import json
+import logging
+import sys
+
+from benchmarks import suite
+
+
+def _print_result(name, result):
+    print(
+        f"{name:<40} {result['ops_per_sec']:>11,.0f} ops/s {result['items_per_sec']:>11,.0f} items/s"
+        f"   p50 {result['p50_us']:>9.2f} us   p90 {result['p90_us']:>9.2f} us"
+        f"   p99 {result['p99_us']:>9.2f} us",
+        file=sys.stderr
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks',
+        description='Benchmark the predictor, the mudra database and the Flask routes'
+    )
+    parser.add_argument('-o', '--output', help='Write the results as JSON to this file')
+    parser.add_argument('--baseline', help='Earlier results file to compare against')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='Allowed relative increase of median latency (default 0.25)')
+    parser.add_argument('--iterations', type=int, default=1000,
+                        help='Timed items per case and round (default 1000)')
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--warmup', type=int, default=100)
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--inputs', help='JSONL file of extra texts, e.g. logged request bodies')
+    parser.add_argument('--text-field', default='benefits',
+                        help='Field of the --inputs records holding the text')
+    parser.add_argument('--only', action='append',
+                        help='Only run cases whose name contains this (repeatable)')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    # The app configures INFO logging on import; keep request logs out of the timings
+    logging.getLogger().setLevel(logging.WARNING)
+
+    baseline = None
+    if args.baseline:
+        try:
+            with open(args.baseline, 'r', encoding='utf-8') as f:
+                baseline = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Error: cannot read baseline: {e}", file=sys.stderr)
+            return 2
+
+    results = suite.run(
+        iterations=args.iterations, rounds=args.rounds, warmup=args.warmup,
+        batch_size=args.batch_size, seed=args.seed, inputs=args.inputs, text_field=args.text_field,
+        only=args.only, progress=_print_result
+    )
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+            f.write('\n')
+
+    if baseline is None:
+        return 0
+
+    rows = suite.compare(results, baseline, args.threshold)
+    print(f"\nMedian latency vs {args.baseline} "
+          f"(commit {baseline.get('meta', {}).get('commit')}):", file=sys.stderr)
+    for name, before, after, change, regressed in rows:
+        flag = 'REGRESSION' if regressed else ''
+        print(f"{name:<40} {before:>9.2f} -> {after:>9.2f} us  {change:>+7.1%}  {flag}",
+              file=sys.stderr)
+
+    regressions = [row for row in rows if row[4]]
+    if regressions:
+        print(f"\n{len(regressions)} case(s) regressed by more than {args.threshold:.0%}",
+              file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,156 @@
+"""
+Closed-loop HTTP load generator for the prediction endpoints.
+
+Keeps a fixed number of keep-alive connections busy for a set duration and
+reports throughput, latency percentiles and status codes. Uses only the
+standard library, so it runs against any deployment:
+
+    python benchmarks/loadgen.py --url http://localhost:5000/predict \\
+        --concurrency 32 --duration 20
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+DEFAULT_GOALS = [
+    'reduce stress and anxiety',
+    'improve flexibility of the spine',
+    'strengthen the back and shoulders',
+    'improve digestion',
+    'calm the mind and improve concentration',
+    'relieve back pain',
+    'improve blood circulation',
+    'help with insomnia and sleep problems',
+]
+
+
+async def _request(reader, writer, host, path, body):
+    """Send one POST on an open connection and read the response"""
+    writer.write(
+        f"POST {path} HTTP/1.1\r\n"
+        f"Host: {host}\r\n"
+        "Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        "\r\n".encode('latin-1') + body
+    )
+    await writer.drain()
+
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError('Connection closed by server')
+    status = int(status_line.split()[1])
+
+    length = 0
+    close = False
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        name = name.strip().lower()
+        if name == 'content-length':
+            length = int(value.strip())
+        elif name == 'connection' and value.strip().lower() == 'close':
+            close = True
+    await reader.readexactly(length)
+    return status, close
+
+
+async def _client(url, payloads, deadline, latencies, statuses):
+    """One connection sending requests back to back until the deadline"""
+    parts = urlsplit(url)
+    host, port = parts.hostname, parts.port or 80
+    path = parts.path or '/'
+    connection = None
+
+    while time.perf_counter() < deadline:
+        if connection is None:
+            connection = await asyncio.open_connection(host, port)
+        reader, writer = connection
+        body = random.choice(payloads)
+
+        start = time.perf_counter()
+        try:
+            status, close = await _request(reader, writer, parts.netloc, path, body)
+        except (ConnectionError, asyncio.IncompleteReadError, IndexError, ValueError):
+            statuses['connection_error'] += 1
+            writer.close()
+            connection = None
+            continue
+        latencies.append(time.perf_counter() - start)
+        statuses[status] += 1
+
+        if close:
+            writer.close()
+            connection = None
+
+    if connection is not None:
+        connection[1].close()
+
+
+def _percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    index = min(int(round(q / 100 * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+async def run_load(url, concurrency, duration, payloads):
+    """
+    Drive the endpoint and summarize the run
+
+    Returns:
+        dict with requests, throughput (req/s), latency percentiles (ms)
+        and a count of responses per status code
+    """
+    latencies = []
+    statuses = Counter()
+    deadline = time.perf_counter() + duration
+
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        _client(url, payloads, deadline, latencies, statuses)
+        for _ in range(concurrency)
+    ))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'url': url,
+        'concurrency': concurrency,
+        'duration_s': round(elapsed, 2),
+        'requests': len(latencies),
+        'throughput_rps': round(len(latencies) / elapsed, 1),
+        'latency_ms': {
+            f'p{q}': round(_percentile(latencies, q) * 1000, 2)
+            for q in (50, 90, 99)
+        },
+        'status': {str(code): count for code, count in sorted(statuses.items(), key=str)}
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--url', default='http://localhost:5000/predict')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--goals', help='File with one benefits text per line')
+    args = parser.parse_args()
+
+    goals = DEFAULT_GOALS
+    if args.goals:
+        with open(args.goals, 'r', encoding='utf-8') as f:
+            goals = [line.strip() for line in f if line.strip()]
+    payloads = [json.dumps({'benefits': goal}).encode('utf-8') for goal in goals]
+
+    result = asyncio.run(run_load(args.url, args.concurrency, args.duration, payloads))
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Compare the NumPy backend's weight precisions.
+
+For float32, float16 and int8 weights, reports the memory held by the
+weights, batched and single-text latency, and top-1 agreement with the
+float32 model on the Benefits texts of the asana CSV. Agreement is also
+given over the texts whose float32 top-2 probabilities differ by at least
+CLEAR_MARGIN, since near-ties can flip under any rounding:
+
+    python benchmarks/quantization.py
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from models.numpy_backend import PRECISIONS  # noqa: E402
+from models.predictor import YogaPredictor  # noqa: E402
+
+CLEAR_MARGIN = 0.01
+
+
+def _time(fn, repeat):
+    """Median wall time of fn() in milliseconds"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def run(repeat=20):
+    predictor = YogaPredictor(backend='numpy', use_bundle=False, precision='float32')
+    reference = predictor.model
+
+    texts = [info['benefits'] for info in predictor.asana_data.values() if info.get('benefits')]
+    token_lists = [tokens for tokens in map(predictor.encoder.tokenize, texts) if tokens]
+    padded = predictor.encoder.pack(token_lists)
+    reference_probs = reference.predict(padded)
+    reference_top1 = reference_probs.argmax(axis=1)
+    top2 = np.sort(reference_probs, axis=1)[:, -2:]
+    clear = top2[:, 1] - top2[:, 0] >= CLEAR_MARGIN
+
+    results = {}
+    for precision in PRECISIONS:
+        model = reference.quantize(precision)
+        probs = model.predict(padded)
+        agree = probs.argmax(axis=1) == reference_top1
+        results[precision] = {
+            'weights_bytes': model.nbytes,
+            'embedding_table_bytes': model.embeddings.nbytes,
+            'batch_ms': round(_time(lambda: model.predict(padded), repeat), 3),
+            'single_ms': round(_time(lambda: model.predict(padded[:1]), repeat * 10), 4),
+            'top1_agreement': round(float(agree.mean()), 4),
+            'top1_agreement_clear': round(float(agree[clear].mean()), 4),
+            'max_abs_prob_diff': float(np.abs(probs - reference_probs).max())
+        }
+
+    return {
+        'texts': len(token_lists),
+        'clear_texts': int(clear.sum()),
+        'vocab_size': reference.vocab_size,
+        'embed_size': reference.embed_size,
+        'num_classes': reference.num_classes,
+        'precisions': results
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare weight precisions of the NumPy backend')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+    print(json.dumps(run(args.repeat), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,340 @@
+"""
+Benchmark cases for the predictor, the mudra database and the Flask routes.
+
+Inputs are the sentences of the asana CSV's Benefits column (optionally
+extended with texts from a JSONL file, e.g. logged request bodies), shuffled
+with a fixed seed so every run sees the same sequence. Each case calls its
+function once per input, cycling through the inputs, and reports throughput
+and latency percentiles.
+
+The cases are run round-robin for several rounds, so a burst of noise from
+the rest of the machine lands on one round rather than on one case. The
+median of the best round is what is compared against a baseline.
+"""
+
+import csv
+import gc
+import json
+import os
+import platform
+import random
+import re
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+CSV_DATA_FILE = ROOT / 'Machine_Learning' / 'final_asan1_1.csv'
+
+# Benefits sentences shorter than this are headings rather than goals
+MIN_WORDS = 3
+
+# Latency statistic compared against a baseline
+COMPARE_METRIC = 'best_p50_us'
+
+# Calls faster than this are timed in blocks, so timer overhead and
+# resolution do not dominate the samples
+MIN_SAMPLE_NS = 20000
+
+
+def load_texts(csv_path=CSV_DATA_FILE, inputs=None, text_field='benefits'):
+    """
+    Realistic benefits texts
+
+    Args:
+        csv_path: Asana CSV whose Benefits column is split into sentences
+        inputs: Optional JSONL file with more texts
+        text_field: Field of the JSONL records holding the text
+
+    Returns:
+        list of texts
+    """
+    texts = []
+    with open(csv_path, 'r', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            for sentence in re.split(r'[.\n]+', row.get('Benefits') or ''):
+                sentence = ' '.join(sentence.split())
+                if len(sentence.split()) >= MIN_WORDS:
+                    texts.append(sentence)
+
+    if inputs:
+        with open(inputs, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                text = json.loads(line).get(text_field)
+                if isinstance(text, str) and text.strip():
+                    texts.append(text.strip())
+    return texts
+
+
+def measure(fn, inputs, iterations, warmup=0):
+    """
+    Time fn on each input in turn
+
+    Very fast functions are timed over blocks of consecutive calls and each
+    sample is the block's mean per call.
+
+    Args:
+        fn: Callable taking one input
+        inputs: Inputs cycled through in order
+        iterations: Timed calls
+        warmup: Untimed calls made first
+
+    Returns:
+        array of per-call latencies in nanoseconds, one per sample
+    """
+    n = len(inputs)
+    clock = time.perf_counter_ns
+    # Start every case with the same amount of garbage to collect
+    gc.collect()
+    start = clock()
+    for i in range(max(warmup, 1)):
+        fn(inputs[i % n])
+    per_call = (clock() - start) / max(warmup, 1)
+    block = max(1, int(MIN_SAMPLE_NS // max(per_call, 1)))
+
+    samples = np.empty(max(iterations // block, 1), dtype=np.float64)
+    i = 0
+    for s in range(len(samples)):
+        args = [inputs[(i + j) % n] for j in range(block)]
+        i += block
+        start = clock()
+        for arg in args:
+            fn(arg)
+        samples[s] = (clock() - start) / block
+    return samples
+
+
+def summarize(rounds, items_per_call=1):
+    """
+    Throughput and latency percentiles of a case
+
+    Args:
+        rounds: Sample arrays from measure(), one per round
+        items_per_call: Items each call processes (batch size)
+
+    Returns:
+        dict of statistics; latencies in microseconds
+    """
+    samples = np.concatenate(rounds)
+    p50, p90, p99 = np.percentile(samples, [50, 90, 99]) / 1000.0
+    total_s = samples.sum() / 1e9
+    return {
+        'rounds': len(rounds),
+        'samples': len(samples),
+        'items_per_call': items_per_call,
+        'ops_per_sec': round(len(samples) / total_s, 1),
+        'items_per_sec': round(len(samples) * items_per_call / total_s, 1),
+        'mean_us': round(float(samples.mean()) / 1000.0, 3),
+        'p50_us': round(float(p50), 3),
+        'p90_us': round(float(p90), 3),
+        'p99_us': round(float(p99), 3),
+        'max_us': round(float(samples.max()) / 1000.0, 3),
+        'best_p50_us': round(min(float(np.median(r)) for r in rounds) / 1000.0, 3)
+    }
+
+
+def predictor_cases(predictor, texts, batch_size):
+    """(name, fn, inputs, items per call) for the predictor"""
+    batches = [texts[i:i + batch_size] for i in range(0, len(texts) - batch_size + 1, batch_size)]
+    return [
+        ('predictor.predict', predictor.predict, texts, 1),
+        ('predictor.predict_top5', lambda text: predictor.predict(text, top_k=5), texts, 1),
+        (f'predictor.predict_batch[{batch_size}]', predictor.predict_batch, batches, batch_size)
+    ]
+
+
+def mudra_db_cases(mudra_db, predictor, texts, rng):
+    """(name, fn, inputs, items per call) for every MudraDatabase query"""
+    mudras = mudra_db.get_all_mudras()
+    names = [m['name'] for m in mudras]
+    chakras = sorted({c for m in mudras for c in m.get('chakras', [])})
+    elements = sorted({e for m in mudras for e in m.get('elements', [])})
+    asanas = [(info['name'], rng.random()) for info in predictor.asana_data.values()]
+    rng.shuffle(asanas)
+    keywords = [w for text in texts for w in re.findall(r'[a-z]{5,}', text.lower())]
+    keywords = rng.sample(keywords, min(len(keywords), 500))
+
+    return [
+        ('mudra_db.get_mudra_details', mudra_db.get_mudra_details, names, 1),
+        ('mudra_db.get_all_mudras', lambda _: mudra_db.get_all_mudras(), [None], 1),
+        ('mudra_db.get_mudras_for_asana',
+         lambda args: mudra_db.get_mudras_for_asana(*args), asanas, 1),
+        ('mudra_db.get_mudras_by_benefit', mudra_db.get_mudras_by_benefit, keywords, 1),
+        ('mudra_db.get_mudras_by_chakra', mudra_db.get_mudras_by_chakra, chakras, 1),
+        ('mudra_db.get_mudras_by_element', mudra_db.get_mudras_by_element, elements, 1)
+    ]
+
+
+def route_cases(client, mudra_db, predictor, texts, batch_size):
+    """(name, fn, inputs, items per call) for the read-only Flask routes via the test client"""
+    names = [m['name'] for m in mudra_db.get_all_mudras()]
+    batches = [texts[i:i + batch_size] for i in range(0, len(texts) - batch_size + 1, batch_size)]
+    clustered = sorted(predictor.cluster_index.asana_to_cluster)
+    keywords = [w for text in texts[:500] for w in re.findall(r'[a-z]{5,}', text.lower())]
+    # Texts without a known word are rejected by semantic search
+    searchable = [text for text in texts if predictor.encoder.known_tokens(text)]
+    search_batches = [
+        searchable[i:i + batch_size]
+        for i in range(0, len(searchable) - batch_size + 1, batch_size)
+    ]
+
+    def check(response):
+        if response.status_code != 200:
+            raise RuntimeError(f"{response.request.path} returned {response.status_code}")
+
+    return [
+        ('route POST /predict',
+         lambda text: check(client.post('/predict', json={'benefits': text})), texts, 1),
+        (f'route POST /predict/batch[{batch_size}]',
+         lambda batch: check(client.post('/predict/batch', json={'benefits': batch})),
+         batches, batch_size),
+        ('route GET /mudras', lambda _: check(client.get('/mudras')), [None], 1),
+        ('route GET /mudra/<name>', lambda name: check(client.get(f'/mudra/{name}')), names, 1),
+        ('route GET /asanas', lambda _: check(client.get('/asanas')), [None], 1),
+        ('route GET /asanas/<id>/similar',
+         lambda asana_id: check(client.get(f'/asanas/{asana_id}/similar')), clustered, 1),
+        ('route GET /conditions', lambda _: check(client.get('/conditions')), [None], 1),
+        ('route POST /search',
+         lambda keyword: check(client.post('/search', json={'query': keyword})), keywords, 1),
+        ('route POST /search/semantic',
+         lambda text: check(client.post('/search/semantic', json={'benefits': text})),
+         searchable, 1),
+        (f'route POST /search/semantic/batch[{batch_size}]',
+         lambda batch: check(client.post('/search/semantic/batch', json={'benefits': batch})),
+         search_batches, batch_size),
+        ('route GET /stats/batching', lambda _: check(client.get('/stats/batching')), [None], 1),
+        ('route GET /stats/cache', lambda _: check(client.get('/stats/cache')), [None], 1),
+        ('route GET /metrics', lambda _: check(client.get('/metrics')), [None], 1),
+        ('route GET /health', lambda _: check(client.get('/health')), [None], 1),
+        ('route GET /health/ready', lambda _: check(client.get('/health/ready')), [None], 1)
+    ]
+
+
+def _load_app(timeout=120):
+    """Import the Flask app without the result cache and wait for the model"""
+    # Repeated inputs would otherwise measure cache hits, not the model
+    os.environ.setdefault('RESULT_CACHE_SIZE', '0')
+    os.environ.setdefault('MODEL_RELOAD_INTERVAL', '0')
+    if str(ROOT) not in sys.path:
+        sys.path.insert(0, str(ROOT))
+    import app as app_module
+
+    predictor = app_module.registry.primary
+    deadline = time.monotonic() + timeout
+    while predictor.state == 'loading' and time.monotonic() < deadline:
+        time.sleep(0.05)
+    if not predictor.ready:
+        raise RuntimeError(f"Model did not become ready (state {predictor.state})")
+    return app_module
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(iterations=1000, rounds=5, warmup=100, batch_size=64, seed=0, inputs=None,
+        text_field='benefits', only=None, progress=None):
+    """
+    Run the benchmark suite
+
+    Args:
+        iterations: Timed items per case and round
+        rounds: Times every case is run
+        warmup: Untimed calls per case
+        batch_size: Texts per batched call
+        seed: Seed for the order of the inputs
+        inputs: Optional JSONL file of extra texts
+        text_field: Field of the JSONL records holding the text
+        only: Optional substrings; only cases whose name contains one run
+        progress: Optional callable receiving (name, result) after each case
+
+    Returns:
+        dict with the run's metadata and per-case results
+    """
+    app_module = _load_app()
+    predictor = app_module.registry.primary
+    mudra_db = app_module.mudra_db
+
+    rng = random.Random(seed)
+    texts = load_texts(inputs=inputs, text_field=text_field)
+    rng.shuffle(texts)
+
+    cases = (
+        predictor_cases(predictor, texts, batch_size)
+        + mudra_db_cases(mudra_db, predictor, texts, rng)
+        + route_cases(app_module.app.test_client(), mudra_db, predictor, texts, batch_size)
+    )
+
+    if only:
+        cases = [case for case in cases if any(part in case[0] for part in only)]
+
+    samples = {name: [] for name, _, _, _ in cases}
+    for _ in range(rounds):
+        for name, fn, case_inputs, items in cases:
+            # Batched cases process batch_size items per call
+            samples[name].append(measure(
+                fn, case_inputs, max(iterations // items, 10), warmup=max(warmup // items, 2)
+            ))
+
+    results = {}
+    for name, _, _, items in cases:
+        results[name] = summarize(samples[name], items)
+        if progress:
+            progress(name, results[name])
+
+    return {
+        'meta': {
+            'created': datetime.utcnow().isoformat(),
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'backend': predictor.backend,
+            'precision': predictor.precision,
+            'model_version': predictor.model_version,
+            'texts': len(texts),
+            'inputs': str(inputs) if inputs else None,
+            'iterations': iterations,
+            'rounds': rounds,
+            'batch_size': batch_size,
+            'seed': seed
+        },
+        'results': results
+    }
+
+
+def compare(current, baseline, threshold, metric=COMPARE_METRIC):
+    """
+    Compare two runs case by case
+
+    Args:
+        current: Result of run()
+        baseline: Earlier result of run()
+        threshold: Allowed relative increase of the metric, e.g. 0.15
+        metric: Latency statistic to compare
+
+    Returns:
+        list of (name, baseline value, current value, relative change,
+        regressed) for the cases present in both runs
+    """
+    rows = []
+    for name, result in current['results'].items():
+        before = baseline.get('results', {}).get(name)
+        if not before or not before.get(metric):
+            continue
+        change = result[metric] / before[metric] - 1.0
+        rows.append((name, before[metric], result[metric], change, change > threshold))
+    return rows
@@ -0,0 +1,73 @@
+"""
+Gunicorn configuration for the Yoga Mudra app.
+
+By default the app is preloaded in the master process: the model weights,
+asana metadata, encoder tables, cluster index and mudra catalogue are built
+once and every worker inherits them copy-on-write. Set GUNICORN_PRELOAD=0 to
+load the app separately in each worker instead.
+
+State that does not survive fork is created lazily inside each worker:
+the micro-batcher thread, SQLite connections of the shared result cache
+and, with the Keras backend, the TensorFlow model, which each worker builds
+in a background warm-up thread started right after fork.
+
+Each worker writes its metrics to a file in METRICS_DIR (a per-run temporary
+directory unless set), so /metrics reports the sum over all workers.
+"""
+
+import gc
+import os
+import tempfile
+from pathlib import Path
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+workers = int(os.environ.get('GUNICORN_WORKERS', 4))
+threads = int(os.environ.get('GUNICORN_THREADS', 1))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+# The app logs a sample of requests itself (LOG_SAMPLE_RATE); set
+# GUNICORN_ACCESSLOG=- to also write a line for every request
+accesslog = os.environ.get('GUNICORN_ACCESSLOG') or None
+errorlog = '-'
+
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1').lower() in ('1', 'true', 'yes')
+
+if preload_app:
+    # Tells the app that it is being loaded before fork, so framework
+    # state that does not survive fork (TensorFlow sessions) is deferred
+    os.environ['APP_PRELOADED'] = '1'
+
+# Set before the app is imported so every worker shares the directory
+os.environ.setdefault(
+    'METRICS_DIR', os.path.join(tempfile.gettempdir(), f'yoga-metrics-{os.getpid()}')
+)
+
+
+def on_starting(server):
+    """Clear worker metrics left over from a previous run"""
+    for path in Path(os.environ['METRICS_DIR']).glob('*.json'):
+        path.unlink(missing_ok=True)
+
+
+def post_fork(server, worker):
+    """Start warming up the model in the new worker"""
+    if preload_app:
+        # The app module was imported in the master; this does not reload it
+        from app import registry
+        if registry is not None:
+            registry.primary.start_warmup()
+
+
+def worker_exit(server, worker):
+    """Write the worker's final counts so they survive its restart"""
+    from models.metrics import METRICS
+    METRICS.flush()
+
+
+def when_ready(server):
+    """Freeze everything loaded so far before the workers are forked"""
+    if preload_app:
+        # Keep the garbage collector from touching (and so copying) the
+        # pages of the long-lived objects every worker inherits
+        gc.freeze()
+        server.log.info(f"Preloaded app; froze {gc.get_freeze_count()} objects before fork")
+
@@ -0,0 +1,185 @@
+"""
+Precompiled artifact bundle for fast predictor startup.
+Packs the weights, vocabulary, asana metadata and clusters into one memory-mapped file.
+
+Layout: MAGIC, a little-endian uint32 header length, a JSON header, then the
+data section. The data section and every field payload in it start on a
+64-byte boundary; field offsets are relative to the data section. Array fields
+are raw C-ordered buffers, JSON fields are UTF-8 documents.
+"""
+
+import hashlib
+import json
+import logging
+import mmap
+import struct
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'YMAB'
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+
+
+def file_digest(path):
+    """SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def sources_version(sources):
+    """
+    Content version of a set of source files
+
+    Returns:
+        (version, per-file digests); the version changes whenever any of
+        the existing files changes
+    """
+    digests = {Path(p).name: file_digest(p) for p in sources if Path(p).exists()}
+    version = hashlib.sha256(json.dumps(digests, sort_keys=True).encode('utf-8')).hexdigest()
+    return version[:12], digests
+
+
+def write_bundle(path, arrays, documents, sources=()):
+    """
+    Write a bundle file
+
+    Args:
+        path: Output path
+        arrays: Mapping of field name to NumPy array
+        documents: Mapping of field name to JSON-serializable object
+        sources: Paths of the files the bundle was compiled from
+
+    Returns:
+        the bundle header
+    """
+    payloads = []
+    fields = {}
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        fields[name] = {'kind': 'array', 'dtype': array.dtype.str, 'shape': list(array.shape)}
+        payloads.append((name, array.tobytes()))
+    for name, document in documents.items():
+        fields[name] = {'kind': 'json'}
+        payloads.append((name, json.dumps(document, separators=(',', ':')).encode('utf-8')))
+
+    version, digests = sources_version(sources)
+    header = {
+        'format_version': FORMAT_VERSION,
+        'version': version,
+        'created': datetime.utcnow().isoformat(),
+        'sources': digests,
+        'fields': fields
+    }
+
+    offset = 0
+    for name, payload in payloads:
+        fields[name].update(offset=offset, length=len(payload))
+        offset = _align(offset + len(payload))
+
+    header_bytes = json.dumps(header).encode('utf-8')
+    data_start = _align(len(MAGIC) + 4 + len(header_bytes))
+
+    # Write beside the target and rename, so readers never see a partial file
+    tmp_path = Path(str(path) + '.tmp')
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<I', len(header_bytes)))
+        f.write(header_bytes)
+        for name, payload in payloads:
+            f.write(b'\0' * (data_start + fields[name]['offset'] - f.tell()))
+            f.write(payload)
+    tmp_path.replace(path)
+
+    logger.info(f"Wrote artifact bundle {path} ({data_start + offset} bytes, {len(fields)} fields)")
+    return header
+
+
+def _align(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+class ArtifactBundle:
+    """
+    Read-only view of a bundle file.
+
+    The file is memory-mapped: array fields are zero-copy NumPy views onto the
+    mapping, so their pages are shared by every process that opens the bundle,
+    and JSON fields are only decoded when first accessed.
+    """
+
+    def __init__(self, path):
+        """
+        Open a bundle
+
+        Raises:
+            ValueError: if the file is not a bundle of a supported format
+        """
+        self.path = Path(path)
+        with open(self.path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"Not an artifact bundle: {self.path}")
+        (header_size,) = struct.unpack_from('<I', self._mmap, len(MAGIC))
+        start = len(MAGIC) + 4
+        self.header = json.loads(self._mmap[start:start + header_size])
+        self._data_start = _align(start + header_size)
+
+        if self.header.get('format_version') != FORMAT_VERSION:
+            raise ValueError(
+                f"Unsupported bundle format {self.header.get('format_version')}: {self.path}"
+            )
+        self.fields = self.header['fields']
+        self._decoded = {}
+
+    @property
+    def version(self):
+        """Content version of the bundle"""
+        return self.header.get('version')
+
+    def __contains__(self, name):
+        return name in self.fields
+
+    def __getitem__(self, name):
+        """Array view or decoded JSON document of a field"""
+        if name in self._decoded:
+            return self._decoded[name]
+
+        field = self.fields[name]
+        if field['kind'] == 'array':
+            dtype = np.dtype(field['dtype'])
+            count = int(np.prod(field['shape'], dtype=np.int64))
+            value = np.frombuffer(
+                self._mmap, dtype=dtype, count=count,
+                offset=self._data_start + field['offset']
+            ).reshape(field['shape'])
+        else:
+            start = self._data_start + field['offset']
+            value = json.loads(self._mmap[start:start + field['length']])
+
+        self._decoded[name] = value
+        return value
+
+    def is_current(self, sources):
+        """
+        Whether the bundle was compiled from the given source files as they are now
+
+        Sources that are missing on disk are not checked, so a deployment
+        may ship the bundle without the raw files.
+        """
+        recorded = self.header.get('sources', {})
+        for source in sources:
+            source = Path(source)
+            if not source.exists():
+                continue
+            if recorded.get(source.name) != file_digest(source):
+                return False
+        return True
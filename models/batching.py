@@ -0,0 +1,188 @@
+"""
+Micro-batching scheduler for concurrent prediction requests.
+Coalesces predict calls that arrive within a short window into one forward pass.
+"""
+
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+# Histogram bucket upper bounds
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+WAIT_MS_BUCKETS = (0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 25.0, 50.0, 100.0)
+
+
+class Histogram:
+    """Bucketed histogram with a running count, sum and maximum"""
+
+    def __init__(self, bounds):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.total = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        """Record one observation"""
+        for i, bound in enumerate(self.bounds):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.total += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def to_dict(self):
+        """Serializable snapshot of the histogram"""
+        labels = [str(b) for b in self.bounds] + ['+Inf']
+        return {
+            'buckets': dict(zip(labels, self.counts)),
+            'count': self.total,
+            'sum': self.sum,
+            'mean': self.sum / self.total if self.total else 0.0,
+            'max': self.max
+        }
+
+
+class MicroBatcher:
+    """
+    Collects concurrent predict calls and runs them as one padded batch.
+
+    A background thread waits for the first queued request, then keeps
+    collecting until either window_ms has passed since that request arrived
+    or max_batch_size requests are queued. Requests with different options
+    (such as top_k) are scored in separate predict_batch calls. Each caller
+    blocks on its own Future and receives exactly the result predict()
+    would have returned.
+    """
+
+    def __init__(self, predict_batch, window_ms=2.0, max_batch_size=64):
+        """
+        Initialize the batcher
+
+        Args:
+            predict_batch: Callable mapping a list of texts (and keyword
+                options) to a list of results
+            window_ms: Longest time the first request of a batch waits for company
+            max_batch_size: Batch is dispatched as soon as it reaches this size
+        """
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+
+        self.predict_batch = predict_batch
+        self.window = window_ms / 1000.0
+        self.max_batch_size = max_batch_size
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker = None
+        self._worker_pid = None
+        self._batch_sizes = Histogram(BATCH_SIZE_BUCKETS)
+        self._wait_ms = Histogram(WAIT_MS_BUCKETS)
+        self._batches = 0
+        self._items = 0
+
+    def _ensure_worker(self):
+        """Start the worker thread lazily, and again in a forked child"""
+        pid = os.getpid()
+        if self._worker is not None and self._worker_pid == pid:
+            return
+        with self._lock:
+            if self._worker is not None and self._worker_pid == pid:
+                return
+            if self._worker_pid is not None and self._worker_pid != pid:
+                # Threads and queued work do not survive fork
+                self._queue = queue.Queue()
+            self._worker = threading.Thread(
+                target=self._run, name='predict-batcher', daemon=True
+            )
+            self._worker_pid = pid
+            self._worker.start()
+
+    def submit(self, benefits_text, **options):
+        """
+        Queue a text for prediction
+
+        Args:
+            benefits_text: Text to score
+            **options: Hashable keyword options passed to predict_batch
+
+        Returns:
+            Future resolving to the prediction dict
+        """
+        self._ensure_worker()
+        future = Future()
+        options = tuple(sorted(options.items()))
+        self._queue.put((benefits_text, options, future, time.perf_counter()))
+        return future
+
+    def predict(self, benefits_text, timeout=None, **options):
+        """Queue a text and block until its prediction is ready"""
+        return self.submit(benefits_text, **options).result(timeout)
+
+    def _collect(self):
+        """Block for the first request, then gather a batch around it"""
+        first = self._queue.get()
+        batch = [first]
+        deadline = first[3] + self.window
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                if remaining <= 0:
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        """Worker loop: collect, score, and hand results back"""
+        while True:
+            batch = self._collect()
+            dispatched = time.perf_counter()
+
+            groups = {}
+            for entry in batch:
+                groups.setdefault(entry[1], []).append(entry)
+
+            for options, entries in groups.items():
+                texts = [text for text, _, _, _ in entries]
+                try:
+                    results = self.predict_batch(texts, **dict(options))
+                except Exception as e:
+                    logger.error(f"Batched prediction error: {str(e)}")
+                    for _, _, future, _ in entries:
+                        future.set_exception(e)
+                else:
+                    for (_, _, future, _), result in zip(entries, results):
+                        future.set_result(result)
+
+            with self._lock:
+                self._batches += 1
+                self._items += len(batch)
+                self._batch_sizes.observe(len(batch))
+                for _, _, _, enqueued in batch:
+                    self._wait_ms.observe((dispatched - enqueued) * 1000.0)
+
+    def stats(self):
+        """Queue depth, batch-size histogram and latency added by waiting"""
+        with self._lock:
+            return {
+                'window_ms': self.window * 1000.0,
+                'max_batch_size': self.max_batch_size,
+                'queue_depth': self._queue.qsize(),
+                'batches': self._batches,
+                'items': self._items,
+                'batch_size': self._batch_sizes.to_dict(),
+                'wait_ms': self._wait_ms.to_dict()
+            }
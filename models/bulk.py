@@ -0,0 +1,316 @@
+"""
+Streaming bulk-scoring pipeline for CSV and JSONL files.
+Records flow through read -> shard -> batch -> score -> enrich -> write as generators,
+so memory use does not grow with the input.
+"""
+
+import csv
+import json
+import logging
+import os
+import sys
+import time
+from collections import deque
+from itertools import islice
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ('jsonl', 'csv')
+
+OUTPUT_FIELDS = ['id', 'row', 'asana', 'asana_id', 'confidence', 'mudras', 'predictions', 'error']
+
+
+def detect_format(path):
+    """'csv' or 'jsonl' from a file extension"""
+    suffix = Path(str(path)).suffix.lower()
+    if suffix == '.csv':
+        return 'csv'
+    if suffix in ('.jsonl', '.ndjson', '.json'):
+        return 'jsonl'
+    raise ValueError(f"Cannot tell the format of {path}; pass it explicitly")
+
+
+def _lines(f):
+    """Decoded lines of a binary file, read one at a time so f.tell() stays exact"""
+    for line in iter(f.readline, b''):
+        yield line.decode('utf-8')
+
+
+def read_records(path, fmt, text_field, id_field=None, offset=0, row=0):
+    """
+    Stream the records of an input file
+
+    Args:
+        path: Input file
+        fmt: 'csv' or 'jsonl'
+        text_field: Field holding the benefits text
+        id_field: Field copied to the output as 'id' (the row number if None)
+        offset: Byte offset to resume reading from (from a checkpoint)
+        row: Row number of the record at offset
+
+    Yields:
+        (row, record id, text, byte offset just past the record)
+    """
+    with open(path, 'rb') as f:
+        if fmt == 'csv':
+            header = next(csv.reader([f.readline().decode('utf-8')]))
+            if text_field not in header:
+                raise ValueError(f"Column '{text_field}' not found in {path}")
+            if offset:
+                f.seek(offset)
+            reader = csv.DictReader(_lines(f), fieldnames=header)
+            for record in reader:
+                yield _record(record, row, text_field, id_field, f.tell())
+                row += 1
+        else:
+            f.seek(offset)
+            for line in _lines(f):
+                if line.strip():
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        record = {}
+                    if not isinstance(record, dict):
+                        record = {}
+                    yield _record(record, row, text_field, id_field, f.tell())
+                row += 1
+
+
+def _record(record, row, text_field, id_field, offset):
+    text = record.get(text_field)
+    record_id = record.get(id_field, row) if id_field else row
+    return row, record_id, text if isinstance(text, str) else None, offset
+
+
+def shard(records, index, count):
+    """Keep the records whose row number falls in shard index of count"""
+    if count <= 1:
+        return records
+    return (record for record in records if record[0] % count == index)
+
+
+def batched(records, size):
+    """Group records into lists of at most size"""
+    records = iter(records)
+    while True:
+        batch = list(islice(records, size))
+        if not batch:
+            return
+        yield batch
+
+
+def score(batches, predictor, top_k=1, pool=None):
+    """
+    Run each batch through one batched forward pass
+
+    Args:
+        batches: Iterable of record lists from batched()
+        predictor: Loaded YogaPredictor
+        top_k: Number of ranked asanas per record
+        pool: Optional InferencePool to score on several processes
+
+    Yields:
+        (batch, predictions) with one prediction per record
+    """
+    if pool is not None:
+        yield from _score_on_pool(batches, pool, top_k)
+        return
+
+    for batch in batches:
+        texts = [text or '' for _, _, text, _ in batch]
+        yield batch, predictor.predict_batch(texts, top_k=top_k)
+
+
+def _score_on_pool(batches, pool, top_k):
+    """Score through the pool while keeping batch boundaries for checkpointing"""
+    pending = deque()
+
+    def texts():
+        for batch in batches:
+            pending.append(batch)
+            for _, _, text, _ in batch:
+                yield text or ''
+
+    predictions = pool.imap(texts(), top_k=top_k)
+    while True:
+        chunk = list(islice(predictions, 1))
+        if not chunk:
+            return
+        batch = pending.popleft()
+        yield batch, chunk + list(islice(predictions, len(batch) - 1))
+
+
+def enrich(scored, mudra_db, top_k=1):
+    """
+    Turn scored batches into output rows with mudra recommendations
+
+    Yields:
+        (rows, byte offset just past the batch, number of input records)
+    """
+    for batch, predictions in scored:
+        rows = []
+        for (row, record_id, text, _), prediction in zip(batch, predictions):
+            if text is None:
+                prediction = {'asana': 'Unknown', 'confidence': 0.0, 'error': 'Missing text'}
+            rows.append(_output_row(row, record_id, prediction, mudra_db, top_k))
+        yield rows, batch[-1][3], len(batch)
+
+
+def _output_row(row, record_id, prediction, mudra_db, top_k):
+    result = {
+        'id': record_id,
+        'row': row,
+        'asana': prediction['asana'],
+        'asana_id': prediction.get('asana_id'),
+        'confidence': round(float(prediction['confidence']), 6)
+    }
+    if 'error' in prediction:
+        result['error'] = prediction['error']
+    elif mudra_db is not None:
+        result['mudras'] = [
+            mudra['name'] for mudra in
+            mudra_db.get_mudras_for_asana(prediction['asana'], prediction['confidence'])
+        ]
+    if top_k > 1 and 'predictions' in prediction:
+        result['predictions'] = [
+            {
+                'asana': p['asana'],
+                'asana_id': p['asana_id'],
+                'confidence': round(float(p['confidence']), 6)
+            }
+            for p in prediction['predictions']
+        ]
+    return result
+
+
+class RowWriter:
+    """Appends output rows to a JSONL or CSV file (or stdout)"""
+
+    def __init__(self, path, fmt, append=False):
+        self.fmt = fmt
+        if path in (None, '-'):
+            self._file = sys.stdout
+            self._owned = False
+            new_file = True
+        else:
+            new_file = not (append and os.path.exists(path) and os.path.getsize(path))
+            self._file = open(path, 'a' if append else 'w', encoding='utf-8', newline='')
+            self._owned = True
+
+        self._csv = None
+        if fmt == 'csv':
+            self._csv = csv.DictWriter(self._file, fieldnames=OUTPUT_FIELDS, extrasaction='ignore')
+            if new_file:
+                self._csv.writeheader()
+
+    def write(self, rows):
+        for row in rows:
+            if self._csv is not None:
+                self._csv.writerow(dict(
+                    row,
+                    mudras=';'.join(row.get('mudras', [])),
+                    predictions=';'.join(
+                        f"{p['asana'].strip()}:{p['confidence']}"
+                        for p in row.get('predictions', [])
+                    )
+                ))
+            else:
+                self._file.write(json.dumps(row) + '\n')
+        self._file.flush()
+
+    def close(self):
+        if self._owned:
+            self._file.close()
+
+
+def load_checkpoint(path):
+    """Checkpoint dict, or None when there is none yet"""
+    if not path or not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_checkpoint(path, checkpoint):
+    """Write a checkpoint atomically"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, path)
+
+
+class Progress:
+    """Periodic rows/sec reports on stderr"""
+
+    def __init__(self, interval=5.0, stream=sys.stderr):
+        self.interval = interval
+        self.stream = stream
+        self.rows = 0
+        self.started = time.perf_counter()
+        self._last = self.started
+
+    def update(self, rows, force=False):
+        self.rows += rows
+        now = time.perf_counter()
+        if force or now - self._last >= self.interval:
+            elapsed = max(now - self.started, 1e-9)
+            print(f"{self.rows} rows in {elapsed:.1f}s ({self.rows / elapsed:.0f} rows/sec)",
+                  file=self.stream, flush=True)
+            self._last = now
+
+
+def run(input_path, output_path, predictor, mudra_db=None, input_format=None,
+        output_format=None, text_field='benefits', id_field=None, top_k=1,
+        batch_size=256, shard_index=0, shard_count=1, checkpoint_path=None,
+        pool=None, progress_interval=5.0):
+    """
+    Score an input file into an output file
+
+    With a checkpoint path, the byte offset and row number after each
+    written batch are saved there; running again with the same checkpoint
+    resumes after the last written batch and appends to the output.
+
+    Returns:
+        number of rows written by this run
+    """
+    input_format = input_format or detect_format(input_path)
+    output_format = output_format or (
+        'jsonl' if output_path in (None, '-') else detect_format(output_path)
+    )
+    if input_format not in FORMATS or output_format not in FORMATS:
+        raise ValueError(f"Formats must be one of {', '.join(FORMATS)}")
+
+    checkpoint = load_checkpoint(checkpoint_path) or {'offset': 0, 'row': 0, 'written': 0}
+    if checkpoint.get('shard', [shard_index, shard_count]) != [shard_index, shard_count]:
+        raise ValueError(f"Checkpoint {checkpoint_path} belongs to another shard")
+    if checkpoint['offset']:
+        logger.info(f"Resuming at row {checkpoint['row']} (byte {checkpoint['offset']})")
+
+    records = read_records(
+        input_path, input_format, text_field, id_field,
+        offset=checkpoint['offset'], row=checkpoint['row']
+    )
+    records = shard(records, shard_index, shard_count)
+    scored = score(batched(records, batch_size), predictor, top_k=top_k, pool=pool)
+
+    writer = RowWriter(output_path, output_format, append=bool(checkpoint['offset']))
+    progress = Progress(progress_interval)
+    written = 0
+    try:
+        for rows, offset, count in enrich(scored, mudra_db, top_k=top_k):
+            writer.write(rows)
+            written += len(rows)
+            progress.update(len(rows))
+            if checkpoint_path:
+                last_row = rows[-1]['row']
+                checkpoint.update(
+                    offset=offset, row=last_row + 1,
+                    written=checkpoint['written'] + len(rows),
+                    shard=[shard_index, shard_count]
+                )
+                save_checkpoint(checkpoint_path, checkpoint)
+    finally:
+        writer.close()
+    progress.update(0, force=True)
+    return written
@@ -0,0 +1,232 @@
+"""
+Bounded result cache for predictions.
+LRU eviction with an optional TTL, in-process or shared between workers through SQLite.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class LocalCacheBackend:
+    """In-process LRU store backed by an OrderedDict"""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, now):
+        """Return (found, value); expired entries are dropped"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= now:
+                del self._entries[key]
+                return False, None
+            self._entries.move_to_end(key)
+            return True, value
+
+    def put(self, key, value, expires_at, now):
+        """Store a value, returning the number of entries evicted"""
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            evicted = 0
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                evicted += 1
+            return evicted
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteCacheBackend:
+    """
+    LRU store in a SQLite file, so every gunicorn worker on the box shares hits.
+
+    Values must be JSON-serializable. Each worker opens its own connection
+    per thread; WAL mode lets readers proceed while another worker writes.
+    """
+
+    def __init__(self, path, max_entries):
+        self.path = str(path)
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._connect().executescript(
+            """
+            CREATE TABLE IF NOT EXISTS results (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                expires_at REAL,
+                last_access REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS results_last_access ON results (last_access);
+            """
+        )
+
+    def _connect(self):
+        """Per-thread connection, reopened in forked children"""
+        pid = os.getpid()
+        if getattr(self._local, 'pid', None) != pid:
+            conn = sqlite3.connect(self.path, timeout=1.0, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=OFF')
+            self._local.conn = conn
+            self._local.pid = pid
+        return self._local.conn
+
+    def get(self, key, now):
+        conn = self._connect()
+        row = conn.execute(
+            'SELECT value, expires_at FROM results WHERE key = ?', (key,)
+        ).fetchone()
+        if row is None:
+            return False, None
+        value, expires_at = row
+        if expires_at is not None and expires_at <= now:
+            conn.execute('DELETE FROM results WHERE key = ?', (key,))
+            return False, None
+        conn.execute('UPDATE results SET last_access = ? WHERE key = ?', (now, key))
+        return True, json.loads(value)
+
+    def put(self, key, value, expires_at, now):
+        conn = self._connect()
+        conn.execute(
+            'INSERT OR REPLACE INTO results (key, value, expires_at, last_access) '
+            'VALUES (?, ?, ?, ?)',
+            (key, json.dumps(value), expires_at, now)
+        )
+        excess = conn.execute('SELECT COUNT(*) FROM results').fetchone()[0] - self.max_entries
+        if excess <= 0:
+            return 0
+        conn.execute(
+            'DELETE FROM results WHERE key IN '
+            '(SELECT key FROM results ORDER BY last_access LIMIT ?)',
+            (excess,)
+        )
+        return excess
+
+    def clear(self):
+        self._connect().execute('DELETE FROM results')
+
+    def __len__(self):
+        return self._connect().execute('SELECT COUNT(*) FROM results').fetchone()[0]
+
+
+class ResultCache:
+    """
+    Bounded prediction cache with LRU eviction, optional TTL and counters.
+
+    Keys are built from the preprocessed token sequence of the input (plus
+    any request options), so texts that only differ in case, punctuation or
+    stopwords share an entry. Every lookup also
+    carries a generation (digests of the loaded models' and mudra data's
+    files, equal across workers); when it changes the cache is cleared,
+    so results never outlive a reload.
+    """
+
+    def __init__(self, max_entries=1024, ttl=None, shared_path=None):
+        """
+        Initialize the cache
+
+        Args:
+            max_entries: Maximum number of cached results
+            ttl: Seconds an entry stays valid, or None for no expiry
+            shared_path: SQLite file shared between workers; in-process when None
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        if shared_path:
+            self.backend = SQLiteCacheBackend(shared_path, max_entries)
+            self._clock = time.time
+        else:
+            self.backend = LocalCacheBackend(max_entries)
+            self._clock = time.monotonic
+
+        self.generation = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _key(self, key, generation):
+        """Serialize a lookup key and generation into a store key"""
+        return json.dumps([generation, key], separators=(',', ':'))
+
+    def _check_generation(self, generation):
+        """Drop every entry once the model or mudra data has been reloaded"""
+        if generation != self.generation:
+            if self.generation is not None:
+                self.invalidate()
+            self.generation = generation
+
+    def get(self, key, generation):
+        """
+        Look up a cached result
+
+        Args:
+            key: JSON-serializable key, typically the input's token ids
+            generation: Hashable version of the data the result depends on
+
+        Returns:
+            cached value, or None on a miss
+        """
+        self._check_generation(generation)
+        try:
+            found, value = self.backend.get(self._key(key, generation), self._clock())
+        except sqlite3.Error as e:
+            # A busy shared store is just a miss
+            logger.warning(f"Result cache lookup failed: {str(e)}")
+            found, value = False, None
+        if found:
+            self.hits += 1
+            return value
+        self.misses += 1
+        return None
+
+    def put(self, key, generation, value):
+        """Store a result under a key"""
+        self._check_generation(generation)
+        now = self._clock()
+        expires_at = now + self.ttl if self.ttl else None
+        try:
+            self.evictions += self.backend.put(
+                self._key(key, generation), value, expires_at, now
+            )
+        except sqlite3.Error as e:
+            logger.warning(f"Result cache store failed: {str(e)}")
+
+    def invalidate(self):
+        """Remove every cached result"""
+        self.backend.clear()
+        self.invalidations += 1
+        logger.info("Result cache invalidated")
+
+    def stats(self):
+        """Hit, miss and eviction counters for this worker"""
+        lookups = self.hits + self.misses
+        return {
+            'backend': 'sqlite' if isinstance(self.backend, SQLiteCacheBackend) else 'local',
+            'entries': len(self.backend),
+            'max_entries': self.max_entries,
+            'ttl': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations
+        }
@@ -0,0 +1,89 @@
+"""
+Cluster index for asana recommendations.
+Inverted maps built once from cluster.json for O(1) similarity lookups and class masks.
+"""
+
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class ClusterIndex:
+    """
+    Inverted index between asana IDs and the clusters they belong to.
+
+    Besides the asana -> cluster and cluster -> members maps, every cluster
+    gets a boolean mask over the model's class vector, so predictions can be
+    restricted to one cluster by masking the softmax output.
+    """
+
+    def __init__(self, clusters, asana_data, class_labels=()):
+        """
+        Build the index
+
+        Args:
+            clusters: Mapping of cluster id to a list of asana IDs (cluster.json)
+            asana_data: Mapping of asana ID to its details
+            class_labels: Asana ID of every index of the model's class vector
+        """
+        num_classes = len(class_labels)
+        class_of_asana = {asana_id: idx for idx, asana_id in enumerate(class_labels)}
+        self.asana_to_cluster = {}
+        self.cluster_members = {}
+        self.class_masks = {}
+        self._similar = {}
+
+        for cluster_id, members in clusters.items():
+            cluster_id = str(cluster_id)
+            members = tuple(int(m) for m in members)
+            self.cluster_members[cluster_id] = members
+            for asana_id in members:
+                self.asana_to_cluster[asana_id] = cluster_id
+
+            mask = np.zeros(num_classes, dtype=bool)
+            for asana_id in members:
+                idx = class_of_asana.get(asana_id)
+                if idx is not None:
+                    mask[idx] = True
+            self.class_masks[cluster_id] = mask
+
+        # Ready-to-serialize cluster mates of every asana
+        for cluster_id, members in self.cluster_members.items():
+            summaries = {
+                asana_id: {
+                    'asana_id': asana_id,
+                    'asana': asana_data.get(asana_id, {}).get('name', f'Asana {asana_id}'),
+                    'level': asana_data.get(asana_id, {}).get('level', '')
+                }
+                for asana_id in members
+            }
+            for asana_id in members:
+                self._similar[asana_id] = tuple(
+                    summary for other, summary in summaries.items() if other != asana_id
+                )
+
+        logger.info(
+            f"Built cluster index: {len(self.cluster_members)} clusters, "
+            f"{len(self.asana_to_cluster)} asanas"
+        )
+
+    def cluster_of(self, asana_id):
+        """Cluster id of an asana, or None if it is not clustered"""
+        return self.asana_to_cluster.get(asana_id)
+
+    def members(self, cluster_id):
+        """Asana IDs in a cluster (empty tuple for an unknown cluster)"""
+        return self.cluster_members.get(str(cluster_id), ())
+
+    def similar(self, asana_id):
+        """Summaries of the other asanas in the same cluster"""
+        return self._similar.get(asana_id, ())
+
+    def class_mask(self, cluster_id):
+        """Boolean mask over model classes for a cluster, or None if unknown"""
+        return self.class_masks.get(str(cluster_id))
+
+    def __contains__(self, cluster_id):
+        return str(cluster_id) in self.cluster_members
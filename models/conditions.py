@@ -0,0 +1,159 @@
+"""
+Contraindication index for filtering out unsafe asanas.
+Health conditions are extracted once from the CSV Contraindications column
+and stored as a bitset per asana, so a request's exclusions are one mask.
+"""
+
+import logging
+import re
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Condition taxonomy: name -> pattern matched against a Contraindications text
+CONDITIONS = {
+    'pregnancy': r'pregnan',
+    'menstruation': r'menstruat',
+    # Tolerates OCR noise such as "high 342 blood pressure"
+    'high_blood_pressure': r'high\s+(?:\S+\s+)?blood\s+pressure|hypertension|intracranial',
+    'low_blood_pressure': r'low\s+blood\s+pressure',
+    'heart_disease': r'heart|coronary|cardiac|arterio\W*sclerosis',
+    'back_problems': r'\bback\b|spinal|spine',
+    'sciatica': r'sciatica',
+    'slipped_disc': r'slipped\s+disc',
+    'neck_problems': r'neck|cervical|spondyl',
+    'hernia': r'hernia',
+    'ulcer': r'ulcer',
+    'eye_conditions': r'\beyes?\b|glauc|cataract|retina|conjunctivitis|sightedness',
+    'vertigo': r'vertigo|dizz',
+    'knee_problems': r'knee',
+    'epilepsy': r'epilep',
+    'thyroid': r'thyroid'
+}
+
+# Conditions covered by "cautions for inverted postures apply"
+INVERTED_CAUTIONS = ('high_blood_pressure', 'heart_disease', 'vertigo', 'eye_conditions')
+INVERTED_PATTERN = re.compile(r'(?:cautions|precautions)\s+for\s+inverted')
+
+# "As for sirshasana": the cautions of another asana apply as well
+AS_FOR_PATTERN = re.compile(r'\bas\s+for\s+([a-z]+)')
+
+# A condition's bit in a bitset is its position in CONDITIONS (at most 63)
+BITS = {name: 1 << i for i, name in enumerate(CONDITIONS)}
+_PATTERNS = [(re.compile(pattern), BITS[name]) for name, pattern in CONDITIONS.items()]
+
+# Set for asanas without a Contraindications text: nothing is known about
+# them, so they are never considered safe when a request excludes conditions
+UNKNOWN_BIT = 1 << 63
+
+
+def _asana_key(name):
+    """First word of an asana name, lowercased: 'Sirshasana (headstand pose)' -> 'sirshasana'"""
+    words = re.findall(r'[a-z]+', name.lower())
+    return words[0] if words else ''
+
+
+class ConditionIndex:
+    """
+    Health conditions each asana is contraindicated for.
+
+    Every asana has a bitset with one bit per condition of CONDITIONS, and
+    the model's classes have them in a (classes,) uint64 array. Excluding
+    any number of conditions is an OR of their bits and one vectorized AND
+    over the class vector, so the filter costs the same for one condition
+    or all of them. Asanas with no Contraindications text are excluded by
+    every non-empty filter.
+    """
+
+    def __init__(self, asana_data, class_labels=()):
+        """
+        Extract the conditions from the asanas' Contraindications texts
+
+        Args:
+            asana_data: Mapping of asana ID to its info dict
+            class_labels: Asana ID of every index of the model's class vector
+        """
+        texts = {}
+        by_key = {}
+        for asana_id, info in asana_data.items():
+            text = ' '.join((info.get('contraindications') or '').lower().split())
+            # The CSV was OCR'd: "m" often reads as "1n" ("1nayurasana")
+            texts[asana_id] = text.replace('1n', 'm')
+            by_key.setdefault(_asana_key(info.get('name') or ''), asana_id)
+
+        self.asana_bits = {}
+        references = {}
+        for asana_id, text in texts.items():
+            bits = 0 if text else UNKNOWN_BIT
+            for pattern, bit in _PATTERNS:
+                if pattern.search(text):
+                    bits |= bit
+            if INVERTED_PATTERN.search(text):
+                bits |= self.bits(INVERTED_CAUTIONS)
+            self.asana_bits[asana_id] = bits
+            references[asana_id] = [
+                by_key[key] for key in AS_FOR_PATTERN.findall(text)
+                if key in by_key and by_key[key] != asana_id
+            ]
+
+        # Inherit the cautions of referenced asanas, following chains
+        changed = True
+        while changed:
+            changed = False
+            for asana_id, referenced in references.items():
+                bits = self.asana_bits[asana_id]
+                for other in referenced:
+                    bits |= self.asana_bits[other]
+                if bits != self.asana_bits[asana_id]:
+                    self.asana_bits[asana_id] = bits
+                    changed = True
+
+        self.class_bits = np.array(
+            [self.asana_bits.get(asana_id, UNKNOWN_BIT) for asana_id in class_labels], dtype=np.uint64
+        )
+
+        flagged = sum(1 for bits in self.asana_bits.values() if bits & ~UNKNOWN_BIT)
+        unknown = sum(1 for bits in self.asana_bits.values() if bits & UNKNOWN_BIT)
+        logger.info(
+            f"Built condition index: {len(CONDITIONS)} conditions, "
+            f"{flagged} of {len(self.asana_bits)} asanas contraindicated for at least one, "
+            f"{unknown} without contraindications"
+        )
+
+    @staticmethod
+    def bits(conditions):
+        """
+        Bitset of several conditions
+
+        Raises:
+            ValueError: if a condition is not in CONDITIONS
+        """
+        bits = 0
+        for condition in conditions:
+            bit = BITS.get(condition)
+            if bit is None:
+                raise ValueError(f"Unknown condition: {condition}")
+            bits |= bit
+        return bits
+
+    def conditions_of(self, asana_id):
+        """Names of the conditions an asana is contraindicated for"""
+        bits = self.asana_bits.get(asana_id, 0)
+        return [name for name, bit in BITS.items() if bits & bit]
+
+    def contraindications_unknown(self, asana_id):
+        """Whether an asana has no Contraindications text to check"""
+        return bool(self.asana_bits.get(asana_id, UNKNOWN_BIT) & UNKNOWN_BIT)
+
+    def _query_bits(self, conditions):
+        bits = self.bits(conditions)
+        return bits | UNKNOWN_BIT if bits else 0
+
+    def safe_mask(self, conditions):
+        """Boolean mask of the classes known to be safe for all the given conditions"""
+        return (self.class_bits & np.uint64(self._query_bits(conditions))) == 0
+
+    def is_safe(self, asana_id, conditions):
+        """Whether an asana is known to be safe for all the given conditions"""
+        return not self.asana_bits.get(asana_id, UNKNOWN_BIT) & self._query_bits(conditions)
@@ -0,0 +1,127 @@
+"""
+Compiled text encoder for the asana classifier.
+Turns raw benefits text into padded int32 token rows in a single pass.
+"""
+
+import csv
+import logging
+import re
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Words kept by the preprocessing: runs of ASCII letters after lowercasing.
+# Equivalent to re.sub(r'[^A-Za-z\n]+', ' ', text.lower()).split()
+WORD_PATTERN = re.compile(r'[a-z]+')
+
+STOPWORDS = frozenset({'a', 'an', 'the', 'and', 'or', 'in', 'is', 'it', 'to', 'of', 'for'})
+
+
+class TextEncoder:
+    """
+    Maps raw text straight to token ids using a lookup table built once.
+
+    Stopwords are left out of the lookup table, so filtering and vocabulary
+    lookup are a single dict probe per word. Sequences longer than
+    sequence_length keep their last tokens (truncating='pre') and shorter
+    ones are zero-padded at the end (padding='post'), as in training.
+    """
+
+    def __init__(self, word_index, sequence_length=50, stopwords=STOPWORDS,
+                 oov_index=None):
+        """
+        Initialize the encoder
+
+        Args:
+            word_index: Mapping of word to token id
+            sequence_length: Width of an encoded row
+            stopwords: Words removed before lookup
+            oov_index: Token id for unknown words; unknown words are dropped
+                when None, like Keras' Tokenizer without an oov_token
+        """
+        self.sequence_length = sequence_length
+        self.stopwords = frozenset(stopwords)
+        self.oov_index = oov_index
+        self.lookup = {
+            word: idx for word, idx in word_index.items()
+            if word not in self.stopwords
+        }
+
+    @classmethod
+    def from_map_file(cls, path, **kwargs):
+        """Build an encoder from a map.csv file of (Index, Word) rows"""
+        word_index = {}
+        with open(path, 'r', encoding='utf-8') as f:
+            reader = csv.reader(f)
+            next(reader)  # Skip header
+            for row in reader:
+                if len(row) >= 2:
+                    word_index[row[1]] = int(row[0])
+        return cls(word_index, **kwargs)
+
+    def tokenize(self, text):
+        """
+        Token ids of a text, truncated to sequence_length
+
+        Returns:
+            list of token ids, or None when no words survive preprocessing
+        """
+        words = WORD_PATTERN.findall(text.lower())
+        lookup = self.lookup
+        if self.oov_index is None:
+            ids = [lookup[w] for w in words if w in lookup]
+            if not ids and not any(w not in self.stopwords for w in words):
+                return None
+        else:
+            oov = self.oov_index
+            ids = [lookup.get(w, oov) for w in words if w not in self.stopwords]
+            if not ids:
+                return None
+        return ids[-self.sequence_length:]
+
+    def known_tokens(self, text):
+        """Token ids of every in-vocabulary word of a text, without truncation"""
+        lookup = self.lookup
+        return [lookup[w] for w in WORD_PATTERN.findall(text.lower()) if w in lookup]
+
+    def encode(self, text, out=None):
+        """
+        Encode one text into a padded int32 row
+
+        Args:
+            text: Raw input text
+            out: Optional preallocated row of length sequence_length
+
+        Returns:
+            the filled row
+        """
+        if out is None:
+            out = np.zeros(self.sequence_length, dtype=np.int32)
+        self.pack_row(self.tokenize(text) or (), out)
+        return out
+
+    def pack(self, token_lists, out=None):
+        """
+        Pad already tokenized sequences into an (N, sequence_length) buffer
+
+        Args:
+            token_lists: Token ids of each row (see tokenize)
+            out: Optional preallocated buffer with at least len(token_lists)
+                rows; the rows written are fully overwritten
+
+        Returns:
+            the filled buffer
+        """
+        if out is None:
+            out = np.zeros((len(token_lists), self.sequence_length), dtype=np.int32)
+        for row, ids in enumerate(token_lists):
+            self.pack_row(ids, out[row])
+        return out
+
+    def pack_row(self, ids, out):
+        """Write token ids into a row, zero-filling the tail"""
+        ids = ids[-self.sequence_length:]
+        n = len(ids)
+        out[:n] = ids
+        out[n:] = 0
@@ -0,0 +1,199 @@
+"""
+Keyword fallback used when the model cannot be loaded.
+Phrases of the asanas' Benefits texts are compiled into an Aho-Corasick
+automaton, so a request is scored in one pass over its text.
+"""
+
+import logging
+import math
+from collections import deque
+
+import numpy as np
+
+from models.fulltext import terms
+from models.ranking import top_k_indices
+
+logger = logging.getLogger(__name__)
+
+# Longest phrase, in words, taken from the Benefits texts
+MAX_PHRASE_WORDS = 2
+
+# Phrases found in more asanas than this share carry no signal
+MAX_DOCUMENT_SHARE = 0.3
+
+
+class AhoCorasick:
+    """
+    Multi-pattern string matcher.
+
+    A trie of the patterns with failure links: after a character, the state
+    is the longest pattern prefix that ends there, so every occurrence of
+    every pattern is found in one pass over the text, whatever the number of
+    patterns.
+    """
+
+    def __init__(self, patterns):
+        """
+        Compile the automaton
+
+        Args:
+            patterns: Strings to look for; a pattern's position is its id
+        """
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [()]
+
+        for pattern_id, pattern in enumerate(patterns):
+            state = 0
+            for char in pattern:
+                next_state = self.goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self.goto)
+                    self.goto[state][char] = next_state
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append(())
+                state = next_state
+            self.output[state] += (pattern_id,)
+
+        # Breadth-first, so a state's failure target is finished before it
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                target = self.fail[state]
+                while target and char not in self.goto[target]:
+                    target = self.fail[target]
+                target = self.goto[target].get(char, 0)
+                self.fail[next_state] = target
+                self.output[next_state] += self.output[target]
+
+    def __len__(self):
+        return len(self.goto)
+
+    def find(self, text):
+        """Ids of the patterns occurring in a text, once per occurrence"""
+        goto, fail, output = self.goto, self.fail, self.output
+        state = 0
+        matches = []
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                matches.extend(output[state])
+        return matches
+
+
+class KeywordFallback:
+    """
+    Ranks asanas by the Benefits phrases a text mentions.
+
+    Every word and two-word phrase of an asana's Benefits text is a keyword
+    for it, weighted by TF-IDF so that rare phrases ("sciatica", "lower
+    back") count for more than common ones. Texts are normalized like the
+    search index (lowercase, no stop words or plural s) and matched on word
+    boundaries.
+    """
+
+    def __init__(self, asana_ids, phrases, postings):
+        """
+        Initialize the engine
+
+        Args:
+            asana_ids: (N,) asana ID of each row
+            phrases: Keyword phrases; a phrase's position is its id
+            postings: Per phrase, a (rows, weights) pair of arrays
+        """
+        self.asana_ids = np.asarray(asana_ids, dtype=np.int32)
+        self.phrases = phrases
+        self.postings = postings
+        # Spaces around the patterns anchor them to word boundaries
+        self.automaton = AhoCorasick([f' {phrase} ' for phrase in phrases])
+
+    @classmethod
+    def build(cls, asana_data):
+        """
+        Derive the keyword table from the asanas' Benefits texts
+
+        Args:
+            asana_data: Mapping of asana ID to its info dict
+
+        Returns:
+            a KeywordFallback
+        """
+        asana_ids = []
+        counts = []
+        for asana_id, info in sorted(asana_data.items()):
+            words = terms(info.get('benefits') or '')
+            if not words:
+                continue
+            phrase_counts = {}
+            for n in range(1, MAX_PHRASE_WORDS + 1):
+                for i in range(len(words) - n + 1):
+                    phrase = ' '.join(words[i:i + n])
+                    phrase_counts[phrase] = phrase_counts.get(phrase, 0) + 1
+            asana_ids.append(asana_id)
+            counts.append(phrase_counts)
+
+        document_frequency = {}
+        for phrase_counts in counts:
+            for phrase in phrase_counts:
+                document_frequency[phrase] = document_frequency.get(phrase, 0) + 1
+
+        n = len(asana_ids)
+        entries = {}
+        for row, phrase_counts in enumerate(counts):
+            # Long texts mention more phrases; keep them from winning on volume
+            norm = math.sqrt(sum(phrase_counts.values()))
+            for phrase, tf in phrase_counts.items():
+                df = document_frequency[phrase]
+                if df > MAX_DOCUMENT_SHARE * n:
+                    continue
+                weight = (1.0 + math.log(tf)) * math.log(1.0 + n / df) / norm
+                entries.setdefault(phrase, []).append((row, weight))
+
+        phrases = sorted(entries)
+        postings = [
+            (np.array([row for row, _ in entries[phrase]], dtype=np.int32),
+             np.array([weight for _, weight in entries[phrase]], dtype=np.float64))
+            for phrase in phrases
+        ]
+        engine = cls(asana_ids, phrases, postings)
+        logger.info(
+            f"Built keyword fallback: {len(phrases)} phrases over {n} asanas "
+            f"({len(engine.automaton)} automaton states)"
+        )
+        return engine
+
+    def rank(self, text, top_k=1, allowed=None):
+        """
+        Best-matching asanas for a text
+
+        Args:
+            text: Benefits description
+            top_k: Number of asanas to return
+            allowed: Optional set of asana IDs to choose from
+
+        Returns:
+            list of (asana ID, confidence) pairs, best first; confidences are
+            each asana's share of the total keyword score. Empty when the
+            text mentions no keyword.
+        """
+        matches = self.automaton.find(f" {' '.join(terms(text))} ")
+        if not matches:
+            return []
+
+        scores = np.zeros(len(self.asana_ids), dtype=np.float64)
+        for phrase_id in matches:
+            rows, weights = self.postings[phrase_id]
+            scores[rows] += weights
+        if allowed is not None:
+            scores[~np.isin(self.asana_ids, list(allowed))] = 0.0
+
+        total = scores.sum()
+        if total <= 0:
+            return []
+        indices = top_k_indices(scores, min(top_k, int(np.count_nonzero(scores))))
+        return [(int(self.asana_ids[i]), float(scores[i] / total)) for i in indices.tolist()]
@@ -0,0 +1,205 @@
+"""
+BM25 full-text search over the asana catalogue.
+An inverted index of the name, benefits, description and contraindications
+fields, stored as flat postings arrays.
+"""
+
+import logging
+
+import numpy as np
+
+from models.encoder import WORD_PATTERN
+from models.ranking import top_k_indices
+
+logger = logging.getLogger(__name__)
+
+# Searchable asana fields and their default weight in the combined score
+FIELDS = ('name', 'benefits', 'description', 'contraindications')
+DEFAULT_BOOSTS = {'name': 2.0, 'benefits': 1.5, 'description': 1.0, 'contraindications': 0.5}
+
+# BM25 term-frequency saturation and length normalization
+K1 = 1.2
+B = 0.75
+
+STOP_WORDS = frozenset(
+    'a an and are as at be by for from has in is it its of on or that the this to '
+    'was were will with'.split()
+)
+
+
+def terms(text):
+    """Index terms of a text: lowercase words without stop words or a plural s"""
+    out = []
+    for word in WORD_PATTERN.findall(text.lower()):
+        if word in STOP_WORDS:
+            continue
+        if len(word) > 3 and word.endswith('s') and not word.endswith('ss'):
+            word = word[:-1]
+        out.append(word)
+    return out
+
+
+class FullTextIndex:
+    """
+    Inverted index with BM25 scoring, one postings list per field and term.
+
+    The postings of a field are three flat arrays in CSR layout: `offsets`
+    (one entry per term, plus one) delimits each term's slice of `docs`
+    (row numbers of the asanas containing it, ascending) and `weights` (the
+    BM25 term-frequency part for that asana, which does not depend on the
+    query). Scoring a query only touches the slices of its terms, so it costs
+    time proportional to their postings rather than to the catalogue size.
+    """
+
+    def __init__(self, asana_ids, vocabulary, postings):
+        """
+        Initialize the index
+
+        Args:
+            asana_ids: (N,) asana ID of each row
+            vocabulary: List of terms; a term's position is its term id
+            postings: Mapping of field to a dict of 'offsets', 'docs',
+                'weights' and 'idf' arrays
+        """
+        self.asana_ids = np.asarray(asana_ids, dtype=np.int32)
+        self.vocabulary = list(vocabulary)
+        self.term_ids = {term: i for i, term in enumerate(self.vocabulary)}
+        self.postings = postings
+
+    @classmethod
+    def build(cls, asana_data, k1=K1, b=B):
+        """
+        Index the searchable fields of every asana
+
+        Args:
+            asana_data: Mapping of asana ID to its info dict
+            k1: BM25 term-frequency saturation
+            b: BM25 length normalization
+
+        Returns:
+            a FullTextIndex
+        """
+        asana_ids = sorted(asana_data)
+        term_ids = {}
+        # Per field: term id -> list of (row, term frequency)
+        lists = {field: {} for field in FIELDS}
+        lengths = {field: np.zeros(len(asana_ids), dtype=np.float64) for field in FIELDS}
+
+        for row, asana_id in enumerate(asana_ids):
+            info = asana_data[asana_id]
+            for field in FIELDS:
+                counts = {}
+                words = terms(info.get(field) or '')
+                for word in words:
+                    term = term_ids.setdefault(word, len(term_ids))
+                    counts[term] = counts.get(term, 0) + 1
+                lengths[field][row] = len(words)
+                for term, tf in counts.items():
+                    lists[field].setdefault(term, []).append((row, tf))
+
+        n = len(asana_ids)
+        postings = {}
+        for field in FIELDS:
+            length = lengths[field]
+            norm = k1 * (1.0 - b + b * length / max(length.mean(), 1e-9))
+            offsets = np.zeros(len(term_ids) + 1, dtype=np.int32)
+            docs = []
+            weights = []
+            df = np.zeros(len(term_ids), dtype=np.float64)
+            for term in range(len(term_ids)):
+                entries = lists[field].get(term, ())
+                df[term] = len(entries)
+                offsets[term + 1] = offsets[term] + len(entries)
+                for row, tf in entries:
+                    docs.append(row)
+                    weights.append(tf * (k1 + 1.0) / (tf + norm[row]))
+            postings[field] = {
+                'offsets': offsets,
+                'docs': np.array(docs, dtype=np.int32),
+                'weights': np.array(weights, dtype=np.float32),
+                'idf': np.log1p((n - df + 0.5) / (df + 0.5)).astype(np.float32)
+            }
+
+        vocabulary = sorted(term_ids, key=term_ids.get)
+        logger.info(f"Built full-text index of {n} asanas, {len(vocabulary)} terms")
+        return cls(asana_ids, vocabulary, postings)
+
+    @classmethod
+    def from_bundle(cls, bundle):
+        """Load an index persisted with `arrays` and `documents`"""
+        postings = {
+            field: {
+                part: bundle[f'fulltext_{field}_{part}']
+                for part in ('offsets', 'docs', 'weights', 'idf')
+            }
+            for field in FIELDS
+        }
+        return cls(bundle['fulltext_ids'], bundle['fulltext_terms'], postings)
+
+    def __len__(self):
+        return len(self.asana_ids)
+
+    @property
+    def arrays(self):
+        """Arrays to persist in the artifact bundle"""
+        arrays = {'fulltext_ids': self.asana_ids}
+        for field, parts in self.postings.items():
+            for part, array in parts.items():
+                arrays[f'fulltext_{field}_{part}'] = array
+        return arrays
+
+    @property
+    def documents(self):
+        """JSON documents to persist in the artifact bundle"""
+        return {'fulltext_terms': self.vocabulary}
+
+    def search(self, query, top_k=10, boosts=None):
+        """
+        Best-matching asanas for a keyword query
+
+        Args:
+            query: Query text
+            top_k: Number of asanas to return
+            boosts: Optional weight per field, overriding DEFAULT_BOOSTS;
+                a weight of 0 leaves the field out
+
+        Returns:
+            list of (asana ID, score, matched fields) tuples, best first
+        """
+        boosts = dict(DEFAULT_BOOSTS, **(boosts or {}))
+        query_terms = {self.term_ids[t] for t in terms(query) if t in self.term_ids}
+
+        rows = []
+        scores = []
+        fields = []
+        for f, field in enumerate(FIELDS):
+            boost = boosts[field]
+            if boost <= 0:
+                continue
+            postings = self.postings[field]
+            offsets = postings['offsets']
+            for term in query_terms:
+                start, end = offsets[term], offsets[term + 1]
+                if start == end:
+                    continue
+                rows.append(postings['docs'][start:end])
+                scores.append(postings['weights'][start:end] * (boost * postings['idf'][term]))
+                fields.append(np.full(end - start, 1 << f, dtype=np.int8))
+
+        if not rows:
+            return []
+
+        # Sum the contributions of every (term, field) posting per asana
+        candidates, inverse = np.unique(np.concatenate(rows), return_inverse=True)
+        totals = np.bincount(inverse, weights=np.concatenate(scores))
+        matched = np.zeros(len(candidates), dtype=np.int8)
+        np.bitwise_or.at(matched, inverse, np.concatenate(fields))
+
+        results = []
+        for i in top_k_indices(totals, top_k):
+            results.append((
+                int(self.asana_ids[candidates[i]]),
+                float(totals[i]),
+                [field for f, field in enumerate(FIELDS) if matched[i] >> f & 1]
+            ))
+        return results
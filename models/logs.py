@@ -0,0 +1,227 @@
+"""
+Non-blocking, structured application logging.
+Log records are handed to a background thread through a queue, repeated
+errors are collapsed, and requests are logged only in samples.
+"""
+
+import atexit
+import itertools
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+
+# 'text' keeps the classic one-line format, 'json' writes one object per line
+LOG_FORMAT = os.environ.get('LOG_FORMAT', 'text').lower()
+LOG_FORMATS = ('text', 'json')
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Log 1 in N prediction requests (0: none, 1: all)
+LOG_SAMPLE_RATE = int(os.environ.get('LOG_SAMPLE_RATE', 100))
+
+# Requests slower than this are always logged
+LOG_SLOW_MS = float(os.environ.get('LOG_SLOW_MS', 250))
+
+# Identical errors within this many seconds are logged once, with a count
+LOG_ERROR_WINDOW = float(os.environ.get('LOG_ERROR_WINDOW', 60))
+
+# Attributes every LogRecord has; anything else was passed as `extra`
+_RECORD_ATTRIBUTES = frozenset(
+    vars(logging.LogRecord('', 0, '', 0, '', (), None))
+) | {'message', 'asctime'}
+
+_context = threading.local()
+
+
+def new_request_id():
+    return os.urandom(8).hex()
+
+
+def set_request_id(request_id):
+    """Attach a request ID to every record logged by this thread"""
+    _context.request_id = request_id
+
+
+def get_request_id():
+    return getattr(_context, 'request_id', None)
+
+
+class RequestContextFilter(logging.Filter):
+    """Adds the current thread's request ID to records"""
+
+    def filter(self, record):
+        if not hasattr(record, 'request_id'):
+            record.request_id = get_request_id()
+        return True
+
+
+class DuplicateErrorFilter(logging.Filter):
+    """
+    Collapses identical errors.
+
+    The first occurrence of an error message is logged; further identical
+    ones within `window` seconds are only counted, and the next one logged
+    after the window says how many were suppressed.
+    """
+
+    MAX_TRACKED = 1000
+
+    def __init__(self, window=LOG_ERROR_WINDOW):
+        super().__init__()
+        self.window = window
+        self._seen = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno < logging.ERROR or self.window <= 0:
+            return True
+
+        message = record.getMessage()
+        key = (record.name, message)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._seen.get(key)
+            if entry is not None and now - entry[0] < self.window:
+                entry[1] += 1
+                return False
+            suppressed = entry[1] if entry is not None else 0
+            if len(self._seen) >= self.MAX_TRACKED:
+                self._seen = {
+                    k: v for k, v in self._seen.items() if now - v[0] < self.window
+                }
+            self._seen[key] = [now, 0]
+
+        if suppressed:
+            record.msg = f"{message} (repeated {suppressed} more times in {self.window:g}s)"
+            record.args = None
+            record.repeated = suppressed
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, including any `extra` fields"""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage()
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and value is not None:
+                entry[key] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class RequestSampler:
+    """Decides which finished requests are worth a log line"""
+
+    def __init__(self, sample_rate=LOG_SAMPLE_RATE, slow_ms=LOG_SLOW_MS):
+        """
+        Initialize the sampler
+
+        Args:
+            sample_rate: Log 1 in this many requests (0: none)
+            slow_ms: Always log requests slower than this
+        """
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+        self._counter = itertools.count()
+
+    def reason(self, duration_ms, sample=True):
+        """
+        Why a request should be logged
+
+        Failed requests are sampled like the others: their errors are
+        logged where they happen, tagged with the request ID.
+
+        Args:
+            duration_ms: Time taken to handle the request
+            sample: Whether the request takes part in sampling
+
+        Returns:
+            'slow' or 'sampled', or None to skip it
+        """
+        if duration_ms >= self.slow_ms:
+            return 'slow'
+        if sample and self.sample_rate > 0 and next(self._counter) % self.sample_rate == 0:
+            return 'sampled'
+        return None
+
+
+class _LogQueue:
+    """The queue between the logging call sites and the writer thread"""
+
+    def __init__(self, handlers):
+        self.handlers = handlers
+        self.handler = logging.handlers.QueueHandler(queue.SimpleQueue())
+        self.listener = None
+
+    def start(self):
+        self.listener = logging.handlers.QueueListener(
+            self.handler.queue, *self.handlers, respect_handler_level=True
+        )
+        self.listener.start()
+
+    def stop(self):
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+
+    def restart_in_child(self):
+        # The writer thread does not survive fork; records the parent had
+        # queued but not written are dropped with the old queue
+        self.handler.queue = queue.SimpleQueue()
+        self.listener = None
+        self.start()
+
+
+_log_queue = None
+
+
+def configure_logging(level=LOG_LEVEL, fmt=LOG_FORMAT, error_window=LOG_ERROR_WINDOW):
+    """
+    Route all logging through a queue to a background writer thread
+
+    Logging calls only format the message and enqueue the record; the
+    stream write happens on the writer thread. Safe to call more than once.
+
+    Args:
+        level: Root log level
+        fmt: 'text' or 'json'
+        error_window: Seconds within which identical errors are collapsed
+    """
+    global _log_queue
+
+    if fmt not in LOG_FORMATS:
+        fmt = 'text'
+    stream = logging.StreamHandler()
+    stream.setFormatter(JsonFormatter() if fmt == 'json' else logging.Formatter(TEXT_FORMAT))
+
+    root = logging.getLogger()
+    if _log_queue is not None:
+        root.removeHandler(_log_queue.handler)
+        _log_queue.stop()
+    else:
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=lambda: _log_queue and _log_queue.restart_in_child())
+        atexit.register(lambda: _log_queue and _log_queue.stop())
+
+    _log_queue = _LogQueue([stream])
+    _log_queue.handler.addFilter(RequestContextFilter())
+    _log_queue.handler.addFilter(DuplicateErrorFilter(error_window))
+    _log_queue.start()
+
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_log_queue.handler)
+    root.setLevel(level)
@@ -0,0 +1,110 @@
+"""
+Model manifest: the files, dimensions and label mapping of a trained model.
+Lets a retrained model be deployed by shipping files instead of editing code.
+"""
+
+import json
+import logging
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Dimensions of the model shipped in Machine_Learning/, used when no
+# manifest file is present
+DEFAULT_MANIFEST = {
+    'version': '1',
+    'weights': 'weight.h5',
+    'vocab_file': 'map.csv',
+    'vocab_size': 1425,
+    'embed_size': 20,
+    'num_classes': 226,
+    'sequence_length': 50,
+    'label_offset': 1
+}
+
+
+class ModelManifest:
+    """
+    Description of one trained model.
+
+    File paths are relative to the manifest's directory. The class -> asana
+    mapping is either an explicit 'labels' list (asana ID of every class
+    index) or a 'label_offset', meaning class i is asana i + label_offset.
+    """
+
+    def __init__(self, data, base_dir, path=None):
+        """
+        Initialize the manifest
+
+        Args:
+            data: Manifest fields
+            base_dir: Directory relative file paths are resolved against
+            path: File the manifest was read from, if any
+
+        Raises:
+            ValueError: if a required field is missing or inconsistent
+        """
+        self.path = Path(path) if path else None
+        base_dir = Path(base_dir)
+        try:
+            self.version = str(data.get('version', '0'))
+            self.weights = base_dir / data['weights']
+            self.vocab_file = base_dir / data['vocab_file']
+            self.vocab_size = int(data['vocab_size'])
+            self.embed_size = int(data['embed_size'])
+            self.num_classes = int(data['num_classes'])
+            self.sequence_length = int(data.get('sequence_length', 50))
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"Invalid model manifest {path or ''}: {e}")
+
+        labels = data.get('labels')
+        if labels is not None:
+            self.class_labels = tuple(int(label) for label in labels)
+            if len(self.class_labels) != self.num_classes:
+                raise ValueError(
+                    f"Manifest lists {len(self.class_labels)} labels "
+                    f"for {self.num_classes} classes"
+                )
+        else:
+            offset = int(data.get('label_offset', 0))
+            self.class_labels = tuple(range(offset, offset + self.num_classes))
+
+    @classmethod
+    def load(cls, path):
+        """Read a manifest file"""
+        path = Path(path)
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(data, path.parent, path)
+
+    @classmethod
+    def default(cls, base_dir):
+        """Manifest of the model shipped with the app"""
+        return cls(DEFAULT_MANIFEST, base_dir)
+
+    def validate(self, model):
+        """
+        Check a loaded NumPy model against the manifest
+
+        Raises:
+            ValueError: if the weight shapes do not match the dimensions
+        """
+        expected = (self.vocab_size, self.embed_size, self.num_classes)
+        actual = (model.vocab_size, model.embed_size, model.num_classes)
+        if expected != actual:
+            raise ValueError(
+                f"Weights are (vocab, embed, classes) = {actual}, "
+                f"manifest {self.version} says {expected}"
+            )
+
+    def to_dict(self):
+        """Summary for the admin API"""
+        return {
+            'version': self.version,
+            'path': str(self.path) if self.path else None,
+            'weights': str(self.weights),
+            'vocab_size': self.vocab_size,
+            'embed_size': self.embed_size,
+            'num_classes': self.num_classes,
+            'sequence_length': self.sequence_length
+        }
@@ -0,0 +1,314 @@
+"""
+Hot-path metrics for the prediction pipeline.
+Per-stage latency histograms and counters, exported in Prometheus text format.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+import weakref
+from bisect import bisect_left
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Directory where each gunicorn worker writes its counters so /metrics can
+# report all workers (unset: only the current process is reported)
+METRICS_DIR = os.environ.get('METRICS_DIR')
+
+# Seconds between writes of a worker's counters to METRICS_DIR
+FLUSH_INTERVAL = float(os.environ.get('METRICS_FLUSH_INTERVAL', 1.0))
+
+# Latency bucket upper bounds in seconds
+LATENCY_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5
+)
+
+# Stages of a prediction request, in order
+STAGES = ('preprocess', 'tokenize', 'pad', 'forward', 'top_k', 'mudras', 'serialize')
+STAGE_KEYS = {stage: ('yoga_stage_seconds', (('stage', stage),)) for stage in STAGES}
+
+COUNTERS = {
+    'yoga_predictions_total': 'Predictions served, by model version and variant',
+    'yoga_cache_requests_total': 'Result cache lookups, by result',
+    'yoga_mock_predictions_total': 'Predictions answered by the keyword fallback',
+    'yoga_errors_total': 'Failed predictions, by error type and model version'
+}
+
+HISTOGRAMS = {
+    'yoga_stage_seconds': 'Time spent in each stage of a prediction',
+    'yoga_request_seconds': 'Time spent handling a request, by endpoint'
+}
+
+
+class _Shard:
+    """Counters of one thread; only that thread ever writes to it"""
+
+    __slots__ = ('counters', 'histograms', 'trace', 'thread')
+
+    def __init__(self, thread=None):
+        self.counters = {}
+        self.histograms = {}
+        # Stage timings of the request the thread is handling, if traced
+        self.trace = None
+        # Weak reference to the owning thread, so a finished one can be dropped
+        self.thread = weakref.ref(thread) if thread is not None else None
+
+    @property
+    def finished(self):
+        thread = self.thread() if self.thread is not None else None
+        return thread is None or not thread.is_alive()
+
+
+class Metrics:
+    """
+    Counters and histograms that the hot path can update without locking.
+
+    Every thread records into its own shard, so an update is a dict probe and
+    an addition. Shards are only merged when the metrics are read. The
+    shards of finished threads are folded into one base shard and dropped
+    whenever metrics are read or a new thread records, so short-lived
+    threads do not accumulate. Under
+    gunicorn each worker also runs a thread that writes its merged counters
+    to a file of its own in `directory` every flush_interval seconds, and
+    collect() sums the files of all workers.
+    """
+
+    def __init__(self, directory=METRICS_DIR, flush_interval=FLUSH_INTERVAL,
+                 buckets=LATENCY_BUCKETS):
+        """
+        Initialize the metrics
+
+        Args:
+            directory: Directory shared by the worker processes, or None
+            flush_interval: Seconds between writes of this worker's file
+            buckets: Histogram bucket upper bounds in seconds
+        """
+        self.directory = Path(directory) if directory else None
+        self.flush_interval = flush_interval
+        self.buckets = tuple(buckets)
+        self._local = threading.local()
+        self._shards = []
+        self._shards_lock = threading.Lock()
+        # Counts of the threads that have finished
+        self._base = _Shard()
+        self._flusher = None
+        # Counts recorded before fork belong to the parent
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self.reset)
+
+    def _shard(self):
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = _Shard(threading.current_thread())
+            with self._shards_lock:
+                self._fold_finished()
+                self._shards.append(shard)
+            return shard
+
+    def _fold_finished(self):
+        """Move the counts of finished threads into the base shard; hold _shards_lock"""
+        live = []
+        for shard in self._shards:
+            if shard.finished:
+                _merge_shard(self._base.counters, self._base.histograms, shard)
+            else:
+                live.append(shard)
+        self._shards = live
+
+    def inc(self, name, amount=1, **labels):
+        """Add to a counter"""
+        counters = self._shard().counters
+        key = (name, tuple(labels.items()))
+        counters[key] = counters.get(key, 0) + amount
+
+    def observe(self, name, value, **labels):
+        """Record one observation in a histogram"""
+        self._observe((name, tuple(labels.items())), value)
+
+    def stage(self, name, seconds):
+        """Record the duration of a prediction stage"""
+        key = STAGE_KEYS.get(name) or ('yoga_stage_seconds', (('stage', name),))
+        self._observe(key, seconds)
+        trace = self._shard().trace
+        if trace is not None:
+            trace[name] = trace.get(name, 0.0) + seconds
+
+    def start_trace(self):
+        """
+        Also collect the stages this thread records into a dict of their own
+
+        Returns:
+            dict of stage name to seconds, filled in until end_trace()
+        """
+        trace = self._shard().trace = {}
+        return trace
+
+    def end_trace(self):
+        """Stop collecting stages for this thread"""
+        self._shard().trace = None
+
+    def _observe(self, key, value):
+        histograms = self._shard().histograms
+        counts = histograms.get(key)
+        if counts is None:
+            # One slot per bucket plus +Inf, then the sum
+            counts = histograms[key] = [0] * (len(self.buckets) + 2)
+        counts[bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+    def reset(self):
+        """Drop everything recorded in this process"""
+        self._local = threading.local()
+        self._shards = []
+        self._shards_lock = threading.Lock()
+        self._base = _Shard()
+        # Threads do not survive fork
+        self._flusher = None
+
+    def snapshot(self):
+        """
+        Merged counters of all threads of this process
+
+        Returns:
+            (counters, histograms) dicts keyed by (name, labels)
+        """
+        with self._shards_lock:
+            self._fold_finished()
+            shards = list(self._shards)
+            counters = dict(self._base.counters)
+            histograms = {key: list(counts) for key, counts in self._base.histograms.items()}
+        for shard in shards:
+            _merge_shard(counters, histograms, shard)
+        return counters, histograms
+
+    def start_flusher(self):
+        """Start writing this worker's file in the background; cheap once running"""
+        if self.directory is None or self._flusher is not None:
+            return
+        with self._shards_lock:
+            if self._flusher is not None:
+                return
+            self._flusher = threading.Thread(
+                target=self._flush_periodically, name='metrics-flusher', daemon=True
+            )
+            self._flusher.start()
+
+    def _flush_periodically(self):
+        while True:
+            self.flush()
+            time.sleep(self.flush_interval)
+
+    def flush(self):
+        """Write this worker's counters to its file in the metrics directory"""
+        if self.directory is None:
+            return
+        counters, histograms = self.snapshot()
+        data = {
+            'counters': [[name, labels, value] for (name, labels), value in counters.items()],
+            'histograms': [[name, labels, counts] for (name, labels), counts in histograms.items()]
+        }
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            path = self.directory / f'{os.getpid()}.json'
+            tmp_path = path.with_suffix(f'.{threading.get_ident()}.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write metrics to {self.directory}: {str(e)}")
+
+    def collect(self):
+        """
+        Counters of every worker, or of this process without a directory
+
+        Returns:
+            (counters, histograms) dicts keyed by (name, labels)
+        """
+        if self.directory is None:
+            return self.snapshot()
+
+        self.flush()
+        counters = {}
+        histograms = {}
+        for path in sorted(self.directory.glob('*.json')):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Skipping unreadable metrics file {path}: {str(e)}")
+                continue
+            for name, labels, value in data.get('counters', []):
+                key = (name, tuple(tuple(pair) for pair in labels))
+                counters[key] = counters.get(key, 0) + value
+            for name, labels, counts in data.get('histograms', []):
+                _add_counts(histograms, (name, tuple(tuple(pair) for pair in labels)), counts)
+        return counters, histograms
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        counters, histograms = self.collect()
+        lines = []
+
+        for name, help_text in COUNTERS.items():
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} counter')
+            for (key_name, labels), value in sorted(counters.items()):
+                if key_name == name:
+                    lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+
+        bounds = [_format_value(bound) for bound in self.buckets] + ['+Inf']
+        for name, help_text in HISTOGRAMS.items():
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} histogram')
+            for (key_name, labels), counts in sorted(histograms.items()):
+                if key_name != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip(bounds, counts[:-1]):
+                    cumulative += count
+                    bucket_labels = _format_labels(labels + (('le', bound),))
+                    lines.append(f'{name}_bucket{bucket_labels} {cumulative}')
+                lines.append(f'{name}_sum{_format_labels(labels)} {_format_value(counts[-1])}')
+                lines.append(f'{name}_count{_format_labels(labels)} {cumulative}')
+
+        return '\n'.join(lines) + '\n'
+
+
+def _merge_shard(counters, histograms, shard):
+    # dict() copies in one step, so a concurrent update cannot break it
+    for key, value in dict(shard.counters).items():
+        counters[key] = counters.get(key, 0) + value
+    for key, counts in dict(shard.histograms).items():
+        _add_counts(histograms, key, list(counts))
+
+
+def _add_counts(histograms, key, counts):
+    current = histograms.get(key)
+    if current is None:
+        histograms[key] = counts
+    else:
+        for i, count in enumerate(counts):
+            current[i] += count
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (
+        f'{name}="' + str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+        for name, value in labels
+    )
+    return '{' + ','.join(escaped) + '}'
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+# Metrics of this process, shared by the app and the predictor
+METRICS = Metrics()
@@ -3,236 +3,289 @@ Mudra database module for storing and retrieving mudra information.
 Provides mudra recommendations based on yoga asanas and benefits.
 """
 
+import hashlib
 import logging
 import json
+import os
+import re
+import threading
+import time
+from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
+# Versioned mudra catalogue; edit this file instead of the code
+MUDRA_DATA_FILE = Path(os.environ.get(
+    'MUDRA_DATA_FILE',
+    Path(__file__).parent.parent / 'Machine_Learning' / 'mudras.json'
+))
+
+# Seconds between checks of the data file for changes
+RELOAD_INTERVAL = float(os.environ.get('MUDRA_RELOAD_INTERVAL', 2.0))
+
+# Mudras recommended when an asana has no specific associations
+DEFAULT_MUDRAS = ('Gyan Mudra', 'Prana Mudra', 'Vyana Mudra')
+
+WORD_PATTERN = re.compile(r'[a-z]+')
+
+
+class MudraCatalogue:
+    """
+    Immutable snapshot of the mudra data together with its lookup indexes.
+    
+    A reload builds a complete new snapshot and swaps it in with a single
+    attribute assignment, so a request that already holds a snapshot keeps
+    reading consistent data until it finishes.
+    """
+    
+    def __init__(self, mudras, asana_mudra_map, version=None, digest=None):
+        """
+        Build the catalogue
+        
+        Args:
+            mudras: Mapping of mudra name to its details
+            asana_mudra_map: Mapping of asana name to recommended mudra names
+            version: Version stamp of the data
+            digest: SHA-256 of the data file's contents
+        """
+        self.mudras = mudras
+        self.asana_mudra_map = asana_mudra_map
+        self.version = version
+        self.digest = digest
+        self._build_indexes()
+    
+    @classmethod
+    def load(cls, path):
+        """
+        Load a catalogue from its JSON data file
+        
+        Args:
+            path: Path of the data file
+            
+        Returns:
+            MudraCatalogue
+        """
+        with open(path, 'rb') as f:
+            raw = f.read()
+        data = json.loads(raw)
+        
+        if 'mudras' not in data or 'asana_mudra_map' not in data:
+            raise ValueError(f"Invalid mudra data file: {path}")
+        
+        return cls(
+            data['mudras'], data['asana_mudra_map'], data.get('version'),
+            hashlib.sha256(raw).hexdigest()[:12]
+        )
+    
+    def _build_indexes(self):
+        """
+        Build lower-cased hash indexes over the catalogue.
+        
+        Every query then answers with dict lookups and returns response
+        objects that were built here, once.
+        """
+        self.name_index = {}
+        self.asana_index = {}
+        self.chakra_index = {}
+        self.element_index = {}
+        self.benefit_index = {}
+        self.benefits_lower = {}
+        self.order = {}
+        
+        for position, (name, details) in enumerate(self.mudras.items()):
+            self.order[name] = position
+            self.name_index.setdefault(name.lower(), details)
+            self.benefits_lower[name] = tuple(
+                b.lower() for b in details.get('benefits', [])
+            )
+            words = set()
+            for benefit in self.benefits_lower[name]:
+                words.update(WORD_PATTERN.findall(benefit))
+            for fragment in self._substrings(words):
+                self.benefit_index.setdefault(fragment, set()).add(name)
+        
+        self.all_mudras = tuple(
+            {
+                'name': name,
+                'english_name': details.get('english_name', ''),
+                'chakras': details.get('chakras', []),
+                'elements': details.get('elements', []),
+                'level': details.get('level', '')
+            }
+            for name, details in sorted(self.mudras.items())
+        )
+        
+        # Recommendation payloads per asana; confidence is filled in per call
+        recommendations = {
+            name: {
+                'name': name,
+                'english_name': details.get('english_name', ''),
+                'benefits': details.get('benefits', [])[:3],  # Top 3 benefits
+                'how_to': details.get('how_to', ''),
+                'duration': details.get('duration', ''),
+                'chakras': details.get('chakras', []),
+                'confidence_match': 1.0,
+                'level': details.get('level', '')
+            }
+            for name, details in self.mudras.items()
+        }
+        for asana, mudra_names in self.asana_mudra_map.items():
+            self.asana_index.setdefault(asana.lower(), tuple(
+                recommendations[m] for m in mudra_names if m in recommendations
+            ))
+        self.default_recommendations = tuple(
+            recommendations[m] for m in DEFAULT_MUDRAS if m in recommendations
+        )
+        
+        # Chakra and element queries match any substring of a value, and
+        # there are only a handful of distinct values, so every substring
+        # of every value is indexed
+        self.chakra_index = self._build_substring_index('chakras')
+        self.element_index = self._build_substring_index('elements')
+    
+    def _build_substring_index(self, field):
+        """Map every substring of a field's values to the mudras having it"""
+        index = {}
+        for name, details in self.mudras.items():
+            summary = {
+                'name': name,
+                'english_name': details.get('english_name', ''),
+                'level': details.get('level', '')
+            }
+            values = [value.lower() for value in details.get(field, [])]
+            keys = self._substrings(values)
+            if values:
+                keys.add('')
+            for key in keys:
+                index.setdefault(key, []).append(summary)
+        return {key: tuple(summaries) for key, summaries in index.items()}
+    
+    @staticmethod
+    def _substrings(strings):
+        """Set of all non-empty substrings of the given strings"""
+        return {
+            string[start:end]
+            for string in strings
+            for start in range(len(string))
+            for end in range(start + 1, len(string) + 1)
+        }
+
+
+class _CatalogueView:
+    """Read-only view of a catalogue field, for code using the old class attributes"""
+    
+    def __init__(self, field):
+        self.field = field
+    
+    def __get__(self, instance, owner):
+        if instance is None:
+            return getattr(_default_catalogue(), self.field)
+        return getattr(instance._current(), self.field)
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def _default_catalogue():
+    """Catalogue of the default data file, loaded once per process"""
+    global _default
+    if _default is None:
+        with _default_lock:
+            if _default is None:
+                _default = MudraCatalogue.load(MUDRA_DATA_FILE)
+    return _default
+
 
 class MudraDatabase:
     """Database of mudras and their properties"""
     
-    # Complete mudra database with properties
-    MUDRAS = {
-        'Gyan Mudra': {
-            'name': 'Gyan Mudra',
-            'english_name': 'Gesture of Knowledge',
-            'elements': ['Air', 'Space'],
-            'chakras': ['Root Chakra', 'Crown Chakra'],
-            'benefits': [
-                'Enhances concentration and memory',
-                'Improves focus and mental clarity',
-                'Reduces anxiety and stress',
-                'Increases wisdom and creativity',
-                'Improves brain function',
-                'Aids in meditation'
-            ],
-            'how_to': 'Touch the tip of the index finger to the tip of the thumb, with other three fingers extended.',
-            'duration': '15-20 minutes daily',
-            'best_time': 'Morning during meditation',
-            'related_asanas': ['Padmasana', 'Sukhasana', 'Vajrasana'],
-            'contraindications': [],
-            'level': 'Beginner'
-        },
-        'Chin Mudra': {
-            'name': 'Chin Mudra',
-            'english_name': 'Consciousness Gesture',
-            'elements': ['Air', 'Space'],
-            'chakras': ['Crown Chakra'],
-            'benefits': [
-                'Enhances concentration',
-                'Calms the mind',
-                'Promotes inner awareness',
-                'Aids meditation',
-                'Improves mental clarity',
-                'Reduces restlessness'
-            ],
-            'how_to': 'Touch the tip of index finger to thumb, palm facing upward, other fingers extended.',
-            'duration': '10-20 minutes',
-            'best_time': 'Any time, preferably morning',
-            'related_asanas': ['Meditation poses', 'Padmasana', 'Sukhasana'],
-            'contraindications': [],
-            'level': 'Beginner'
-        },
-        'Prana Mudra': {
-            'name': 'Prana Mudra',
-            'english_name': 'Gesture of Life Force',
-            'elements': ['Fire', 'Water'],
-            'chakras': ['Root Chakra', 'Heart Chakra'],
-            'benefits': [
-                'Activates dormant energy',
-                'Improves physical vitality',
-                'Enhances vision and eye health',
-                'Reduces fatigue',
-                'Activates life force energy',
-                'Improves immunity'
-            ],
-            'how_to': 'Touch tips of ring and little finger to thumb, other two extended.',
-            'duration': '15 minutes daily',
-            'best_time': 'Morning or evening',
-            'related_asanas': ['Surya Namaskar', 'Standing poses'],
-            'contraindications': [],
-            'level': 'Beginner'
-        },
-        'Apana Mudra': {
-            'name': 'Apana Mudra',
-            'english_name': 'Gesture of Digestion',
-            'elements': ['Earth', 'Fire'],
-            'chakras': ['Root Chakra', 'Sacral Chakra'],
-            'benefits': [
-                'Aids digestion',
-                'Improves elimination',
-                'Reduces constipation',
-                'Regulates menstrual cycle',
-                'Detoxifies the body',
-                'Improves urinary function'
-            ],
-            'how_to': 'Touch tips of middle, ring, and little fingers to thumb, index extended.',
-            'duration': '15-20 minutes',
-            'best_time': 'Morning on empty stomach',
-            'related_asanas': ['Twists', 'Forward bends', 'Child Pose'],
-            'contraindications': ['Pregnancy'],
-            'level': 'Beginner'
-        },
-        'Vyana Mudra': {
-            'name': 'Vyana Mudra',
-            'english_name': 'Gesture of Circulation',
-            'elements': ['Air', 'Fire'],
-            'chakras': ['Heart Chakra'],
-            'benefits': [
-                'Improves circulation',
-                'Strengthens heart',
-                'Reduces high blood pressure',
-                'Enhances respiratory function',
-                'Increases energy flow',
-                'Improves physical strength'
-            ],
-            'how_to': 'All fingertips touch thumb tip, hands in prayer position.',
-            'duration': '15 minutes',
-            'best_time': 'Morning or evening',
-            'related_asanas': ['Bhujangasana', 'Chest openers'],
-            'contraindications': [],
-            'level': 'Intermediate'
-        },
-        'Vayu Mudra': {
-            'name': 'Vayu Mudra',
-            'english_name': 'Gesture of Air',
-            'elements': ['Air'],
-            'chakras': ['Heart Chakra', 'Throat Chakra'],
-            'benefits': [
-                'Relieves joint pain',
-                'Reduces arthritis symptoms',
-                'Eases paralysis',
-                'Reduces nervousness',
-                'Improves circulation',
-                'Calms anxiety'
-            ],
-            'how_to': 'Fold index finger and touch thumb, other three extended.',
-            'duration': '15 minutes, 2-3 times daily',
-            'best_time': 'Morning and evening',
-            'related_asanas': ['Gentle stretches', 'Joint mobilization'],
-            'contraindications': [],
-            'level': 'Beginner'
-        },
-        'Akasha Mudra': {
-            'name': 'Akasha Mudra',
-            'english_name': 'Gesture of Space/Ether',
-            'elements': ['Space/Ether'],
-            'chakras': ['Throat Chakra', 'Crown Chakra'],
-            'benefits': [
-                'Improves hearing',
-                'Reduces ear problems',
-                'Enhances communication',
-                'Improves dental health',
-                'Opens throat chakra',
-                'Increases spaciousness in body'
-            ],
-            'how_to': 'Touch middle finger to thumb, other fingers extended.',
-            'duration': '12-15 minutes daily',
-            'best_time': 'Morning',
-            'related_asanas': ['Neck stretches', 'Throat openers'],
-            'contraindications': [],
-            'level': 'Beginner'
-        },
-        'Shuni Mudra': {
-            'name': 'Shuni Mudra',
-            'english_name': 'Gesture of Patience',
-            'elements': ['Earth', 'Space'],
-            'chakras': ['Root Chakra', 'Third Eye Chakra'],
-            'benefits': [
-                'Increases patience',
-                'Improves focus and discipline',
-                'Enhances intuition',
-                'Reduces procrastination',
-                'Brings stability',
-                'Sharpens mind'
-            ],
-            'how_to': 'Touch middle finger to thumb, other fingers extended.',
-            'duration': '15 minutes daily',
-            'best_time': 'Morning meditation',
-            'related_asanas': ['Meditation poses', 'Sukhasana'],
-            'contraindications': [],
-            'level': 'Beginner'
-        },
-        'Buddhi Mudra': {
-            'name': 'Buddhi Mudra',
-            'english_name': 'Gesture of Intellect',
-            'elements': ['Water', 'Space'],
-            'chakras': ['Throat Chakra', 'Heart Chakra'],
-            'benefits': [
-                'Enhances intellect and understanding',
-                'Improves communication',
-                'Increases concentration',
-                'Aids meditation',
-                'Improves memory',
-                'Strengthens intuition'
-            ],
-            'how_to': 'Touch little finger to thumb, other fingers extended.',
-            'duration': '12-15 minutes',
-            'best_time': 'During study or work',
-            'related_asanas': ['Forward bends', 'Seated poses'],
-            'contraindications': [],
-            'level': 'Beginner'
-        },
-        'Ashwini Mudra': {
-            'name': 'Ashwini Mudra',
-            'english_name': 'Horse Gesture',
-            'elements': ['Fire', 'Earth'],
-            'chakras': ['Root Chakra', 'Sacral Chakra'],
-            'benefits': [
-                'Strengthens pelvic floor',
-                'Improves sexual function',
-                'Regulates menstrual cycle',
-                'Prevents hemorrhoids',
-                'Awakens kundalini energy',
-                'Improves bladder control'
-            ],
-            'how_to': 'Rhythmic contraction and relaxation of anal sphincter muscles.',
-            'duration': '5-10 minutes daily',
-            'best_time': 'Morning after toilet',
-            'related_asanas': ['Mula Bandha practice', 'Pranayama'],
-            'contraindications': ['Pregnancy', 'Hemorrhoids'],
-            'level': 'Intermediate'
-        }
-    }
+    # Compatibility views of the loaded catalogue
+    MUDRAS = _CatalogueView('mudras')
+    ASANA_MUDRA_MAP = _CatalogueView('asana_mudra_map')
     
-    # Asana-Mudra relationships
-    ASANA_MUDRA_MAP = {
-        'Padmasana': ['Gyan Mudra', 'Chin Mudra', 'Prana Mudra'],
-        'Sukhasana': ['Gyan Mudra', 'Chin Mudra', 'Buddhi Mudra'],
-        'Vajrasana': ['Prana Mudra', 'Apana Mudra'],
-        'Uttanasana': ['Apana Mudra', 'Vayu Mudra'],
-        'Adho Mukha Svanasana': ['Vyana Mudra', 'Prana Mudra'],
-        'Bhujangasana': ['Vyana Mudra', 'Akasha Mudra'],
-        'Trikonasana': ['Vyana Mudra', 'Prana Mudra'],
-        'Vrksasana': ['Vayu Mudra', 'Shuni Mudra'],
-        'Surya Namaskar': ['Prana Mudra', 'Vyana Mudra'],
-        'Child Pose': ['Apana Mudra', 'Buddhi Mudra']
-    }
+    def __init__(self, data_file=None, reload_interval=RELOAD_INTERVAL):
+        """
+        Initialize mudra database
+        
+        Args:
+            data_file: Path of the catalogue data file (MUDRA_DATA_FILE by default)
+            reload_interval: Seconds between checks for changes; 0 disables hot reload
+        """
+        self.data_file = Path(data_file or MUDRA_DATA_FILE)
+        self.reload_interval = reload_interval
+        self._reload_lock = threading.Lock()
+        self._next_check = time.monotonic() + reload_interval
+        
+        self._signature = self._file_signature()
+        if self.data_file == Path(MUDRA_DATA_FILE):
+            self._catalogue = _default_catalogue()
+        else:
+            self._catalogue = MudraCatalogue.load(self.data_file)
+        
+        logger.info(
+            f"Initialized Mudra Database with {len(self._catalogue.mudras)} mudras "
+            f"(data version {self.data_version})"
+        )
+    
+    @property
+    def data_version(self):
+        """Version stamp of the loaded data file"""
+        return self._catalogue.version
     
-    def __init__(self):
-        """Initialize mudra database"""
-        logger.info(f"Initialized Mudra Database with {len(self.MUDRAS)} mudras")
+    @property
+    def data_digest(self):
+        """Digest of the loaded data file's contents; changes with any edit"""
+        return self._catalogue.digest
+    
+    def _file_signature(self):
+        """Identity of the data file's current contents"""
+        stat = os.stat(self.data_file)
+        return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+    
+    def _current(self):
+        """Current catalogue snapshot, reloading it first if the file changed"""
+        if self.reload_interval > 0 and time.monotonic() >= self._next_check:
+            self._check_for_changes()
+        return self._catalogue
+    
+    def _check_for_changes(self):
+        """Reload the data file if it changed since it was loaded"""
+        if not self._reload_lock.acquire(blocking=False):
+            # Another thread is already reloading; keep serving the old snapshot
+            return
+        try:
+            self._next_check = time.monotonic() + self.reload_interval
+            try:
+                signature = self._file_signature()
+            except OSError as e:
+                logger.error(f"Mudra data file unavailable: {str(e)}")
+                return
+            if signature != self._signature and not self.reload(signature):
+                # Do not retry a broken file until it changes again
+                self._signature = signature
+        finally:
+            self._reload_lock.release()
+    
+    def reload(self, signature=None):
+        """
+        Load the data file again and swap the new catalogue in atomically
+        
+        A file that fails to load is logged and the current catalogue is kept.
+        """
+        try:
+            catalogue = MudraCatalogue.load(self.data_file)
+        except Exception as e:
+            logger.error(f"Error reloading mudra data: {str(e)}")
+            return False
+        
+        self._catalogue = catalogue
+        self._signature = signature or self._file_signature()
+        logger.info(
+            f"Reloaded mudra data: {len(catalogue.mudras)} mudras "
+            f"(data version {catalogue.version})"
+        )
+        return True
     
     def get_mudra_details(self, mudra_name):
         """
@@ -244,30 +297,23 @@ class MudraDatabase:
         Returns:
             dict with mudra details or None if not found
         """
+        catalogue = self._current()
+        
         # Try exact match first
-        if mudra_name in self.MUDRAS:
-            return self.MUDRAS[mudra_name]
+        if mudra_name in catalogue.mudras:
+            return catalogue.mudras[mudra_name]
         
         # Try case-insensitive match
-        for name, details in self.MUDRAS.items():
-            if name.lower() == mudra_name.lower():
-                return details
+        details = catalogue.name_index.get(mudra_name.lower())
+        if details is not None:
+            return details
         
         logger.warning(f"Mudra not found: {mudra_name}")
         return None
     
     def get_all_mudras(self):
         """Get list of all available mudras"""
-        return [
-            {
-                'name': name,
-                'english_name': details.get('english_name', ''),
-                'chakras': details.get('chakras', []),
-                'elements': details.get('elements', []),
-                'level': details.get('level', '')
-            }
-            for name, details in sorted(self.MUDRAS.items())
-        ]
+        return list(self._current().all_mudras)
     
     def get_mudras_for_asana(self, asana_name, confidence=1.0):
         """
@@ -280,37 +326,17 @@ class MudraDatabase:
         Returns:
             list of recommended mudras with details
         """
-        recommended_mudras = []
-        
-        # Find exact or close match
-        matching_key = None
-        for key in self.ASANA_MUDRA_MAP:
-            if key.lower() == asana_name.lower():
-                matching_key = key
-                break
-        
-        if not matching_key:
-            # If not found, recommend general mudras
-            mudra_names = ['Gyan Mudra', 'Prana Mudra', 'Vyana Mudra']
-        else:
-            mudra_names = self.ASANA_MUDRA_MAP[matching_key]
+        catalogue = self._current()
         
-        # Build recommendations
-        for mudra_name in mudra_names:
-            if mudra_name in self.MUDRAS:
-                mudra_detail = self.MUDRAS[mudra_name]
-                recommended_mudras.append({
-                    'name': mudra_name,
-                    'english_name': mudra_detail.get('english_name', ''),
-                    'benefits': mudra_detail.get('benefits', [])[:3],  # Top 3 benefits
-                    'how_to': mudra_detail.get('how_to', ''),
-                    'duration': mudra_detail.get('duration', ''),
-                    'chakras': mudra_detail.get('chakras', []),
-                    'confidence_match': float(confidence),
-                    'level': mudra_detail.get('level', '')
-                })
-        
-        return recommended_mudras
+        # If not found, recommend general mudras
+        recommendations = catalogue.asana_index.get(
+            asana_name.lower(), catalogue.default_recommendations
+        )
+        confidence = float(confidence)
+        return [
+            {**recommendation, 'confidence_match': confidence}
+            for recommendation in recommendations
+        ]
     
     def get_mudras_by_benefit(self, benefit_keyword):
         """
@@ -322,16 +348,35 @@ class MudraDatabase:
         Returns:
             list of mudras with matching benefits
         """
-        matching_mudras = []
+        catalogue = self._current()
+        
         keyword_lower = benefit_keyword.lower()
         
-        for mudra_name, details in self.MUDRAS.items():
+        # Every word of the keyword must occur inside some benefit word,
+        # so the fragment index narrows the search down to a few mudras
+        candidates = None
+        for word in WORD_PATTERN.findall(keyword_lower):
+            names = catalogue.benefit_index.get(word, set())
+            candidates = names if candidates is None else candidates & names
+        
+        if candidates is None:
+            mudra_names = catalogue.mudras
+        else:
+            mudra_names = sorted(candidates, key=catalogue.order.__getitem__)
+        
+        matching_mudras = []
+        for mudra_name in mudra_names:
+            details = catalogue.mudras[mudra_name]
             benefits = details.get('benefits', [])
-            if any(keyword_lower in benefit.lower() for benefit in benefits):
+            matching = [
+                benefit for benefit, lowered in zip(benefits, catalogue.benefits_lower[mudra_name])
+                if keyword_lower in lowered
+            ]
+            if matching:
                 matching_mudras.append({
                     'name': mudra_name,
                     'english_name': details.get('english_name', ''),
-                    'matching_benefits': [b for b in benefits if keyword_lower in b.lower()]
+                    'matching_benefits': matching
                 })
         
         return matching_mudras
@@ -346,18 +391,7 @@ class MudraDatabase:
         Returns:
             list of mudras for that chakra
         """
-        matching_mudras = []
-        
-        for mudra_name, details in self.MUDRAS.items():
-            chakras = details.get('chakras', [])
-            if any(chakra_name.lower() in c.lower() for c in chakras):
-                matching_mudras.append({
-                    'name': mudra_name,
-                    'english_name': details.get('english_name', ''),
-                    'level': details.get('level', '')
-                })
-        
-        return matching_mudras
+        return list(self._current().chakra_index.get(chakra_name.lower(), ()))
     
     def get_mudras_by_element(self, element_name):
         """
@@ -369,15 +403,4 @@ class MudraDatabase:
         Returns:
             list of mudras for that element
         """
-        matching_mudras = []
-        
-        for mudra_name, details in self.MUDRAS.items():
-            elements = details.get('elements', [])
-            if any(element_name.lower() in e.lower() for e in elements):
-                matching_mudras.append({
-                    'name': mudra_name,
-                    'english_name': details.get('english_name', ''),
-                    'level': details.get('level', '')
-                })
-        
-        return matching_mudras
+        return list(self._current().element_index.get(element_name.lower(), ()))
@@ -0,0 +1,222 @@
+"""
+Pure-NumPy inference engine for the asana classifier.
+Runs the Embedding -> mean -> Dense(softmax) forward pass without TensorFlow.
+"""
+
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Locations of the trained weights inside the Keras HDF5 file
+EMBEDDING_DATASET = 'model_weights/embedding_1/embedding_1/embeddings:0'
+KERNEL_DATASET = 'model_weights/dense_1/dense_1/kernel:0'
+BIAS_DATASET = 'model_weights/dense_1/dense_1/bias:0'
+
+PRECISIONS = ('float32', 'float16', 'int8')
+
+
+class NumpyModel:
+    """
+    Forward pass of the trained model expressed as a gather, a mean and a GEMV
+
+    The embedding table and dense kernel are stored in float32, float16 or
+    int8. int8 weights are quantized symmetrically per row: every embedding
+    row, and every output column of the kernel, has its own float32 scale.
+    Arithmetic is always done in float32.
+    """
+
+    def __init__(self, embeddings, kernel, bias, embedding_scales=None, kernel_scales=None):
+        """
+        Initialize the model from its weight matrices
+
+        Args:
+            embeddings: (vocab, embed) embedding table
+            kernel: (embed, classes) dense kernel
+            bias: (classes,) dense bias
+            embedding_scales: (vocab,) scales of an int8 embedding table
+            kernel_scales: (classes,) scales of an int8 kernel
+        """
+        self.embeddings = _as_weight(embeddings, embedding_scales)
+        self.kernel = _as_weight(kernel, kernel_scales)
+        self.bias = np.ascontiguousarray(bias, dtype=np.float32)
+        self.embedding_scales = _as_scales(embedding_scales)
+        self.kernel_scales = _as_scales(kernel_scales)
+
+        if self.embeddings.shape[1] != self.kernel.shape[0]:
+            raise ValueError(
+                f"Embedding width {self.embeddings.shape[1]} does not match "
+                f"kernel input {self.kernel.shape[0]}"
+            )
+
+    @classmethod
+    def from_h5(cls, path):
+        """Read the embedding and dense weights out of a Keras weights file"""
+        import h5py
+
+        with h5py.File(str(path), 'r') as f:
+            embeddings = f[EMBEDDING_DATASET][()]
+            kernel = f[KERNEL_DATASET][()]
+            bias = f[BIAS_DATASET][()]
+
+        logger.info(
+            f"Loaded NumPy weights: embeddings {embeddings.shape}, "
+            f"kernel {kernel.shape}"
+        )
+        return cls(embeddings, kernel, bias)
+
+    @property
+    def weights(self):
+        """Weight arrays by constructor argument name"""
+        weights = {'embeddings': self.embeddings, 'kernel': self.kernel, 'bias': self.bias}
+        if self.embedding_scales is not None:
+            weights['embedding_scales'] = self.embedding_scales
+        if self.kernel_scales is not None:
+            weights['kernel_scales'] = self.kernel_scales
+        return weights
+
+    @property
+    def precision(self):
+        """Storage type of the embedding table and kernel"""
+        return self.embeddings.dtype.name
+
+    @property
+    def nbytes(self):
+        """Memory held by the weight arrays"""
+        return sum(array.nbytes for array in self.weights.values())
+
+    def dequantized(self):
+        """(embeddings, kernel) as float32 arrays"""
+        embeddings = self.embeddings.astype(np.float32)
+        kernel = self.kernel.astype(np.float32)
+        if self.embedding_scales is not None:
+            embeddings *= self.embedding_scales[:, None]
+        if self.kernel_scales is not None:
+            kernel *= self.kernel_scales
+        return embeddings, kernel
+
+    def quantize(self, precision):
+        """
+        Copy of the model with its weights stored at another precision
+
+        Args:
+            precision: 'float32', 'float16' or 'int8'
+
+        Returns:
+            a new NumpyModel (self if the precision is unchanged)
+        """
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unknown precision: {precision}")
+        if precision == self.precision:
+            return self
+
+        embeddings, kernel = self.dequantized()
+        if precision == 'float32':
+            return NumpyModel(embeddings, kernel, self.bias)
+        if precision == 'float16':
+            return NumpyModel(embeddings.astype(np.float16), kernel.astype(np.float16), self.bias)
+
+        embeddings, embedding_scales = _quantize_rows(embeddings)
+        # Quantize the kernel per output class, i.e. per row of kernel.T
+        kernel_t, kernel_scales = _quantize_rows(kernel.T)
+        return NumpyModel(
+            embeddings, kernel_t.T, self.bias,
+            embedding_scales=embedding_scales, kernel_scales=kernel_scales
+        )
+
+    @property
+    def vocab_size(self):
+        return self.embeddings.shape[0]
+
+    @property
+    def embed_size(self):
+        return self.embeddings.shape[1]
+
+    @property
+    def num_classes(self):
+        return self.kernel.shape[1]
+
+    def contributions(self, sequence_length):
+        """
+        Contribution of every token to every class logit
+
+        The hidden vector is the mean of sequence_length embedding rows, so a
+        logit is the bias plus the sum, over the positions of the sequence
+        (padding included), of that position's token row of this table.
+
+        Args:
+            sequence_length: Width of the padded rows the model is fed
+
+        Returns:
+            (vocab, classes) float32 array (embeddings @ kernel) / sequence_length
+        """
+        embeddings, kernel = self.dequantized()
+        table = np.matmul(embeddings, kernel)
+        table /= sequence_length
+        return table
+
+    def predict(self, padded):
+        """
+        Run the forward pass on a batch of padded token sequences
+
+        Args:
+            padded: (batch, sequence_length) integer array of token ids
+
+        Returns:
+            (batch, classes) float32 array of class probabilities
+        """
+        padded = np.asarray(padded)
+        # Keras rejects out-of-range ids as well, rather than clipping them
+        if padded.size and (padded.min() < 0 or padded.max() >= self.vocab_size):
+            raise ValueError("Token id out of embedding range")
+
+        # Mean of embeddings over the sequence axis, as in the Lambda layer
+        if self.embedding_scales is None:
+            hidden = self.embeddings[padded].mean(axis=1, dtype=np.float32)
+        else:
+            # Scale each gathered int8 row and average in one batched GEMV
+            scales = self.embedding_scales[padded][:, None, :]
+            hidden = np.matmul(scales, self.embeddings[padded])[:, 0, :]
+            hidden /= padded.shape[1]
+
+        logits = np.matmul(hidden, self.kernel, dtype=np.float32)
+        if self.kernel_scales is not None:
+            logits *= self.kernel_scales
+        logits += self.bias
+
+        # Numerically stable softmax
+        logits -= logits.max(axis=1, keepdims=True)
+        np.exp(logits, out=logits)
+        logits /= logits.sum(axis=1, keepdims=True)
+        return logits
+
+
+def _as_weight(array, scales):
+    """Weight matrix in its storage type: int8 with scales, float16, else float32"""
+    array = np.asarray(array)
+    if scales is not None:
+        return np.ascontiguousarray(array, dtype=np.int8)
+    if array.dtype == np.float16:
+        return np.ascontiguousarray(array)
+    return np.ascontiguousarray(array, dtype=np.float32)
+
+
+def _as_scales(scales):
+    if scales is None:
+        return None
+    return np.ascontiguousarray(scales, dtype=np.float32)
+
+
+def _quantize_rows(matrix):
+    """
+    Symmetric per-row int8 quantization
+
+    Returns:
+        (int8 matrix, float32 scale per row) with matrix ~= q * scale[:, None]
+    """
+    scales = np.abs(matrix).max(axis=1) / 127.0
+    # All-zero rows (the padding embedding) keep a scale of 0 and quantize to 0
+    safe = np.where(scales > 0, scales, 1.0)
+    quantized = np.clip(np.rint(matrix / safe[:, None]), -127, 127).astype(np.int8)
+    return quantized, scales.astype(np.float32)
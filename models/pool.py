@@ -0,0 +1,181 @@
+"""
+Multi-process inference pool for bulk scoring.
+Weight matrices live in shared memory once; worker processes attach to them without copying.
+"""
+
+import logging
+import multiprocessing
+import os
+import sys
+from collections import deque
+from itertools import islice
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from models.numpy_backend import NumpyModel
+from models.predictor import YogaPredictor
+
+logger = logging.getLogger(__name__)
+
+# Per-process state of a pool worker
+_worker_predictor = None
+_worker_blocks = []
+
+
+def _attach(name):
+    """Attach to an existing shared memory block without taking ownership of it"""
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    # Pool workers share the parent's resource tracker, where the block is
+    # already registered, so attaching here does not change its lifetime
+    return shared_memory.SharedMemory(name=name)
+
+
+def _init_worker(spec, layout):
+    """
+    Build the predictor of a worker around the shared weight arrays
+
+    Only the predictor's spec crosses the process boundary. The model is
+    handed to the predictor ready-made, so the worker never loads the weights
+    itself; the vocabulary, payloads and indexes are loaded from the
+    memory-mapped artifact bundle when there is one.
+    """
+    global _worker_predictor
+
+    arrays = {}
+    for name, (block_name, shape, dtype) in layout.items():
+        block = _attach(block_name)
+        _worker_blocks.append(block)
+        arrays[name] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+
+    _worker_predictor = YogaPredictor(**spec, model=NumpyModel(**arrays))
+
+
+def _rank_chunk(texts, top_k, cluster):
+    return _worker_predictor.rank_batch(texts, top_k=top_k, cluster=cluster)
+
+
+class InferencePool:
+    """
+    Spreads prediction batches over worker processes.
+
+    The model's weight matrices are copied into multiprocessing shared memory
+    once; every worker maps the same pages and rebuilds a NumPy model over
+    them, so adding workers does not add copies of the weights. Each worker
+    runs the encode -> forward -> rank pipeline under its own GIL and sends
+    back only (class index, confidence) rankings; the parent turns them into
+    response dicts from its prebuilt payloads, which is far cheaper than
+    unpickling whole dicts.
+
+    Use as a context manager, or call close() to stop the workers and free
+    the shared memory.
+    """
+
+    def __init__(self, predictor, processes=None, chunk_size=256, start_method=None):
+        """
+        Start the pool
+
+        Args:
+            predictor: Loaded YogaPredictor using the NumPy backend
+            processes: Number of worker processes (default: CPU count)
+            chunk_size: Texts sent to a worker per task
+            start_method: multiprocessing start method (platform default if None)
+        """
+        if not isinstance(predictor.model, NumpyModel):
+            raise ValueError("InferencePool requires a predictor with the NumPy backend")
+
+        self.predictor = predictor
+        self.processes = processes or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self._blocks = []
+
+        # Shared memory block, shape and dtype of every weight array
+        self.layout = layout = {}
+        try:
+            for name, array in predictor.model.weights.items():
+                block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+                self._blocks.append(block)
+                np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+                layout[name] = (block.name, array.shape, array.dtype.str)
+
+            context = multiprocessing.get_context(start_method)
+            self._pool = context.Pool(
+                self.processes, initializer=_init_worker, initargs=(predictor.spec, self.layout)
+            )
+        except Exception:
+            self._release()
+            raise
+
+        logger.info(
+            f"Started inference pool: {self.processes} processes sharing "
+            f"{sum(b.size for b in self._blocks)} bytes of weights"
+        )
+
+    def imap_ranked(self, texts, top_k=1, cluster=None):
+        """
+        Rank an iterable of texts, yielding results in input order
+
+        Texts are read lazily and at most two chunks per worker are in
+        flight, so arbitrarily long inputs stream with bounded memory.
+
+        Args:
+            texts: Iterable of benefits texts
+            top_k, cluster: As for YogaPredictor.rank_batch
+
+        Yields:
+            per text, a tuple of (class index, confidence) pairs or, for
+            errors and mock predictions, a finished prediction dict
+        """
+        texts = iter(texts)
+        in_flight = deque()
+        max_in_flight = 2 * self.processes
+
+        while True:
+            while len(in_flight) < max_in_flight:
+                chunk = list(islice(texts, self.chunk_size))
+                if not chunk:
+                    break
+                in_flight.append(
+                    self._pool.apply_async(_rank_chunk, (chunk, top_k, cluster))
+                )
+            if not in_flight:
+                return
+            yield from in_flight.popleft().get()
+
+    def imap(self, texts, top_k=1, cluster=None, similar=False):
+        """
+        Predict over an iterable of texts, yielding prediction dicts in input order
+
+        Building the dicts happens in this process; consumers that only
+        need class indices and scores scale further with imap_ranked().
+        """
+        for item in self.imap_ranked(texts, top_k=top_k, cluster=cluster):
+            if isinstance(item, dict):
+                yield item
+            else:
+                yield self.predictor._build_prediction(item, top_k, similar=similar)
+
+    def predict_batch(self, texts, top_k=1, cluster=None, similar=False):
+        """Predict a list of texts; returns the predictions in input order"""
+        return list(self.imap(texts, top_k=top_k, cluster=cluster, similar=similar))
+
+    def close(self):
+        """Stop the workers and free the shared weights"""
+        self._pool.close()
+        self._pool.join()
+        self._release()
+
+    def _release(self):
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self._pool.terminate()
+        self.close()
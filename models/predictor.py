@@ -7,68 +7,270 @@ import numpy as np
 import json
 import os
 import logging
-import re
+import threading
+import time
+import importlib.util
 from pathlib import Path
 import csv
 
-try:
-    import tensorflow as tf
-    from tensorflow import keras
-    from keras.preprocessing.text import Tokenizer
-    from tensorflow.keras.preprocessing.sequence import pad_sequences
-    KERAS_AVAILABLE = True
-except ImportError:
-    KERAS_AVAILABLE = False
+# TensorFlow is only imported when the Keras model is built; importing it
+# takes seconds, so only check that it is installed here
+KERAS_AVAILABLE = importlib.util.find_spec('tensorflow') is not None
+
+from models.numpy_backend import NumpyModel, PRECISIONS
+from models.encoder import TextEncoder
+from models.ranking import top_k_indices
+from models.clusters import ClusterIndex
+from models.conditions import ConditionIndex
+from models.artifacts import ArtifactBundle, sources_version, write_bundle
+from models.manifest import ModelManifest
+from models.metrics import METRICS
+from models.semantic import SemanticIndex
+from models.fulltext import FullTextIndex
+from models.fallback import KeywordFallback
 
 logger = logging.getLogger(__name__)
 
 # Configuration
 ML_DIR = Path(__file__).parent.parent / 'Machine_Learning'
-MODEL_WEIGHTS = ML_DIR / 'weight.h5'
-MAP_FILE = ML_DIR / 'map.csv'
 CLUSTER_FILE = ML_DIR / 'cluster.json'
 CSV_DATA_FILE = ML_DIR / 'final_asan1_1.csv'
 
+# Weights file, vocabulary, dimensions and label mapping of the model
+MODEL_MANIFEST = Path(os.environ.get('MODEL_MANIFEST', ML_DIR / 'model.json'))
+
+# Precompiled bundle of the files above, built with `flask build-artifacts`
+ARTIFACT_BUNDLE = Path(os.environ.get('ARTIFACT_BUNDLE', ML_DIR / 'artifacts.bin'))
+WEIGHT_FIELDS = ('embeddings', 'kernel', 'bias', 'embedding_scales', 'kernel_scales')
+
+# Inference backend: 'numpy' runs the forward pass without TensorFlow,
+# 'keras' builds the original Keras graph
+BACKEND = os.environ.get('PREDICTOR_BACKEND', 'numpy').lower()
+BACKENDS = ('numpy', 'keras')
+
+# Storage precision of the NumPy backend's weights: 'float32', 'float16' or
+# 'int8' (per-row scales); the forward pass always computes in float32
+PRECISION = os.environ.get('MODEL_PRECISION', 'float32').lower()
+
+# Words listed in a prediction's explanation
+EXPLAIN_TOP_WORDS = 10
+
+# 'error_kind' of failed predictions: the input or options were at fault,
+# or scoring failed on the server
+INPUT_ERROR = 'input'
+INFERENCE_ERROR = 'inference'
+
+
+class InvalidRequest(ValueError):
+    """Raised when the options of a request leave nothing to predict"""
+
 
 class YogaPredictor:
     """Handles prediction of yoga asanas based on benefits description"""
     
-    def __init__(self):
-        """Initialize the predictor with model and tokenizers"""
-        self.model = None
-        self.tokenizer = None
+    def __init__(self, backend=None, defer_model=False, use_bundle=True, precision=None,
+                 manifest=None, model=None):
+        """
+        Initialize the predictor with model and text encoder
+        
+        Args:
+            backend: 'numpy' or 'keras'; defaults to PREDICTOR_BACKEND
+            defer_model: Build the Keras model on first prediction instead of
+                now, for processes that fork after loading (gunicorn --preload)
+            use_bundle: Load from ARTIFACT_BUNDLE when it is present and current
+            precision: NumPy weight precision; defaults to MODEL_PRECISION
+            manifest: Path of the model manifest; defaults to MODEL_MANIFEST
+            model: Ready NumpyModel to serve instead of loading the weights,
+                e.g. one over shared memory (see models.pool)
+        """
+        self.backend = (backend or BACKEND).lower()
+        if self.backend not in BACKENDS:
+            raise ValueError(f"Unknown predictor backend: {self.backend}")
+        self.precision = (precision or PRECISION).lower()
+        if self.precision not in PRECISIONS:
+            raise ValueError(f"Unknown model precision: {self.precision}")
+        
+        # TensorFlow state does not survive fork; the NumPy weights do
+        self.defer_model = defer_model and self.backend == 'keras'
+        self._model_lock = threading.Lock()
+        # Per-thread padded input buffer, reused across forward passes
+        self._buffers = threading.local()
+        # 'loading' until the model can serve predictions, then 'ready'
+        # ('failed' if the warm-up crashed)
+        self.state = 'loading'
+        self._warmup_thread = None
+        self.use_bundle = use_bundle
+        # Digest of the files the model and data were loaded from
+        self.content_version = None
+        
+        self.model = model if self.backend == 'numpy' else None
+        self.encoder = None
         self.word_index_map = {}
         self.index_to_word_map = {}
         self.asana_data = {}
+        self.class_payloads = []
         self.clusters = {}
-        self.vocab_size = 365
-        self.vocab_size2 = 237
-        self.embed_size = 20
-        self.sequence_length = 50
+        # Built once the asana data and the model's classes are known
+        self.cluster_index = None
+        self.condition_index = None
+        self.semantic_index = None
+        self.fulltext_index = None
+        self.fallback = None
+        self.contributions = None
+        self.manifest_path = Path(manifest) if manifest else MODEL_MANIFEST
+        self.manifest = None
         
+        self._load_manifest()
         self._load_components()
+        if not self.defer_model:
+            self.state = 'ready'
+    
+    @property
+    def spec(self):
+        """Arguments that rebuild this predictor in another process (see models.pool)"""
+        return {
+            'backend': self.backend,
+            'precision': self.precision,
+            'use_bundle': self.use_bundle,
+            'manifest': str(self.manifest_path)
+        }
+    
+    @property
+    def vocab_size(self):
+        return self.manifest.vocab_size
+    
+    @property
+    def embed_size(self):
+        return self.manifest.embed_size
+    
+    @property
+    def num_classes(self):
+        return self.manifest.num_classes
+    
+    @property
+    def sequence_length(self):
+        return self.manifest.sequence_length
+    
+    @property
+    def class_labels(self):
+        """Asana ID of every model class index"""
+        return self.manifest.class_labels
+    
+    @property
+    def model_version(self):
+        return self.manifest.version
+    
+    @property
+    def ready(self):
+        """Whether predictions can be served without blocking on model loading"""
+        return self.state == 'ready'
+    
+    def start_warmup(self):
+        """
+        Build a deferred model in a background thread of this process
+        
+        Returns immediately; `ready` turns True once the model is warm.
+        Safe to call repeatedly.
+        """
+        if self.ready:
+            return
+        with self._model_lock:
+            thread = self._warmup_thread
+            if thread is not None and thread.is_alive():
+                return
+            self._warmup_thread = threading.Thread(
+                target=self._warmup, name='predictor-warmup', daemon=True
+            )
+            self._warmup_thread.start()
+    
+    def _warmup(self):
+        """Build the model and run one forward pass to trace the graph"""
+        try:
+            self._ensure_model()
+            if self.model is not None:
+                self._forward(np.zeros((1, self.sequence_length), dtype=np.int32))
+            self.state = 'ready'
+            logger.info("Predictor warm-up complete")
+        except Exception as e:
+            logger.error(f"Predictor warm-up failed: {str(e)}")
+            self.state = 'failed'
+    
+    def _load_manifest(self):
+        """Load the model manifest, falling back to the shipped model's dimensions"""
+        try:
+            if self.manifest_path.exists():
+                self.manifest = ModelManifest.load(self.manifest_path)
+                logger.info(
+                    f"Loaded model manifest {self.manifest_path} "
+                    f"(version {self.manifest.version})"
+                )
+                return
+            logger.warning(f"Model manifest not found: {self.manifest_path}")
+        except Exception as e:
+            logger.error(f"Error loading model manifest: {str(e)}")
+        self.manifest = ModelManifest.default(ML_DIR)
+    
+    def _artifact_sources(self):
+        """Files an artifact bundle for this model is compiled from"""
+        return (
+            self.manifest_path, self.manifest.weights, self.manifest.vocab_file,
+            CLUSTER_FILE, CSV_DATA_FILE
+        )
     
     def _load_components(self):
         """Load all necessary components"""
         try:
-            if not KERAS_AVAILABLE:
-                logger.warning("TensorFlow/Keras not available. Using mock predictions.")
-                return
+            bundle = self._open_bundle() if self.use_bundle else None
+            if bundle is not None:
+                # Load everything from the precompiled bundle
+                self._load_bundle(bundle)
+            else:
+                self.content_version = sources_version(self._artifact_sources())[0]
+                
+                # Load asana data from CSV
+                self._load_asana_data()
+                
+                # Load word mappings
+                self._load_word_mappings()
+                
+                # Load clusters
+                self._load_clusters()
             
-            # Load asana data from CSV
-            self._load_asana_data()
+            # Build text encoder
+            self._build_encoder()
             
-            # Load word mappings
-            self._load_word_mappings()
+            # Load model
+            if self.backend == 'numpy':
+                if self.model is None:
+                    self._load_numpy_model()
+                self._check_manifest()
+                self._apply_precision()
+            elif KERAS_AVAILABLE:
+                if self.defer_model:
+                    logger.info("Deferring Keras model build until first prediction")
+                else:
+                    self._load_model()
+            else:
+                logger.warning("TensorFlow/Keras not available. Using keyword fallback.")
             
-            # Load clusters
-            self._load_clusters()
+            # Prebuild response payloads for every class
+            self._build_payloads()
             
-            # Build tokenizer
-            self._build_tokenizer()
+            # Index clusters against the model's classes
+            self._build_cluster_index()
             
-            # Load model
-            self._load_model()
+            # Extract the conditions each asana is contraindicated for
+            self._build_condition_index()
+            
+            # Embed the asanas' Benefits texts for retrieval
+            self._build_semantic_index(bundle)
+            
+            # Index the catalogue's text fields for keyword search
+            self._build_fulltext_index(bundle)
+            
+            # Compile the keyword fallback up front if there is no model
+            if self.model is None and not self.defer_model:
+                self._keyword_fallback()
             
             logger.info("All components loaded successfully")
             
@@ -76,6 +278,81 @@ class YogaPredictor:
             logger.error(f"Error loading components: {str(e)}")
             # Don't raise - allow graceful degradation
     
+    def _open_bundle(self):
+        """Open the artifact bundle, or return None to fall back to the raw files"""
+        try:
+            # The bundle is compiled from the default manifest's model
+            if self.manifest_path != MODEL_MANIFEST or not ARTIFACT_BUNDLE.exists():
+                return None
+            
+            bundle = ArtifactBundle(ARTIFACT_BUNDLE)
+            if not bundle.is_current(self._artifact_sources()):
+                logger.warning(
+                    f"Artifact bundle {ARTIFACT_BUNDLE} is older than its sources; "
+                    "loading raw files. Rebuild it with `flask build-artifacts`."
+                )
+                return None
+            return bundle
+            
+        except Exception as e:
+            logger.error(f"Error opening artifact bundle: {str(e)}")
+            return None
+    
+    def _load_bundle(self, bundle):
+        """Load asana data, word mappings, clusters and weights from a bundle"""
+        self.asana_data = {
+            int(asana_id): info for asana_id, info in bundle['asana_data'].items()
+        }
+        self.word_index_map = bundle['word_index']
+        self.index_to_word_map = {idx: word for word, idx in self.word_index_map.items()}
+        self.clusters = bundle['clusters']
+        
+        if self.backend == 'numpy' and self.model is None and 'embeddings' in bundle:
+            # Zero-copy views onto the memory-mapped bundle
+            self.model = NumpyModel(**{
+                name: bundle[name] for name in WEIGHT_FIELDS if name in bundle
+            })
+        
+        # A current bundle has the content version of its sources
+        self.content_version = bundle.version
+        logger.info(
+            f"Loaded artifact bundle {bundle.path} (version {bundle.version}): "
+            f"{len(self.asana_data)} asanas, {len(self.word_index_map)} words"
+        )
+    
+    def build_artifacts(self, path=None, precision=None):
+        """
+        Compile the loaded data and weights into an artifact bundle
+        
+        Args:
+            path: Output path (ARTIFACT_BUNDLE by default)
+            precision: Precision to store the weights at (the model's own by default)
+            
+        Returns:
+            the bundle header
+        """
+        if not isinstance(self.model, NumpyModel):
+            raise RuntimeError("Artifact bundles are built from the NumPy backend")
+        
+        model = self.model.quantize(precision or self.model.precision)
+        arrays = dict(model.weights)
+        if self.semantic_index is not None:
+            arrays.update(self.semantic_index.arrays)
+        documents = {
+            'asana_data': {str(k): v for k, v in self.asana_data.items()},
+            'word_index': self.word_index_map,
+            'clusters': self.clusters
+        }
+        if self.fulltext_index is not None:
+            arrays.update(self.fulltext_index.arrays)
+            documents.update(self.fulltext_index.documents)
+        return write_bundle(
+            path or ARTIFACT_BUNDLE,
+            arrays=arrays,
+            documents=documents,
+            sources=self._artifact_sources()
+        )
+    
     def _load_asana_data(self):
         """Load asana information from CSV file"""
         try:
@@ -104,11 +381,12 @@ class YogaPredictor:
     def _load_word_mappings(self):
         """Load word to index and index to word mappings"""
         try:
-            if not MAP_FILE.exists():
-                logger.warning(f"Map file not found: {MAP_FILE}")
+            map_file = self.manifest.vocab_file
+            if not map_file.exists():
+                logger.warning(f"Map file not found: {map_file}")
                 return
             
-            with open(MAP_FILE, 'r', encoding='utf-8') as f:
+            with open(map_file, 'r', encoding='utf-8') as f:
                 reader = csv.reader(f)
                 next(reader)  # Skip header
                 for row in reader:
@@ -136,154 +414,594 @@ class YogaPredictor:
         except Exception as e:
             logger.error(f"Error loading clusters: {str(e)}")
     
-    def _build_tokenizer(self):
-        """Build tokenizer from word mappings"""
+    def _build_payloads(self):
+        """Build the ready-to-serialize asana payload of every model class"""
+        if self.model is None and not self.defer_model:
+            return
+        
+        self.class_payloads = [self._asana_payload(asana_id) for asana_id in self.class_labels]
+    
+    def _asana_payload(self, asana_id):
+        """Response fields of one asana"""
+        asana_info = self.asana_data.get(asana_id, {})
+        return {
+            'asana': asana_info.get('name', f'Asana {asana_id}'),
+            'asana_id': asana_id,
+            # Placeholder keeps the key order when the score is filled in
+            'confidence': 0.0,
+            'description': asana_info.get('description', ''),
+            'benefits': asana_info.get('benefits', ''),
+            'contraindications': asana_info.get('contraindications', ''),
+            'level': asana_info.get('level', ''),
+            'breathing': asana_info.get('breathing', '')
+        }
+    
+    def _build_cluster_index(self):
+        """Build the asana <-> cluster inverted index"""
+        try:
+            self.cluster_index = ClusterIndex(
+                self.clusters, self.asana_data,
+                class_labels=self.class_labels[:len(self.class_payloads)]
+            )
+        except Exception as e:
+            logger.error(f"Error building cluster index: {str(e)}")
+    
+    def _build_condition_index(self):
+        """Build the per-asana contraindication bitsets"""
+        try:
+            self.condition_index = ConditionIndex(
+                self.asana_data, class_labels=self.class_labels[:len(self.class_payloads)]
+            )
+        except Exception as e:
+            logger.error(f"Error building condition index: {str(e)}")
+    
+    def _build_semantic_index(self, bundle=None):
+        """Load the retrieval vectors from the bundle, or embed the CSV texts"""
+        try:
+            model = self._weights_model(bundle)
+            if model is None:
+                return
+            # Share the model's table rather than a float32 copy of it
+            if bundle is not None and 'semantic_vectors' in bundle:
+                self.semantic_index = SemanticIndex(
+                    bundle['semantic_ids'], bundle['semantic_vectors'],
+                    model.embeddings, model.embedding_scales
+                )
+            else:
+                self.semantic_index = SemanticIndex.build(
+                    model.embeddings, self.encoder, self.asana_data, model.embedding_scales
+                )
+        except Exception as e:
+            logger.error(f"Error building semantic index: {str(e)}")
+    
+    def _build_fulltext_index(self, bundle=None):
+        """Load the BM25 postings from the bundle, or index the CSV fields"""
         try:
-            # Create tokenizer
-            self.tokenizer = Tokenizer()
-            self.tokenizer.word_index = self.word_index_map
-            logger.info("Tokenizer built successfully")
+            if bundle is not None and 'fulltext_terms' in bundle:
+                self.fulltext_index = FullTextIndex.from_bundle(bundle)
+            else:
+                self.fulltext_index = FullTextIndex.build(self.asana_data)
         except Exception as e:
-            logger.error(f"Error building tokenizer: {str(e)}")
+            logger.error(f"Error building full-text index: {str(e)}")
+    
+    def _weights_model(self, bundle=None):
+        """NumPy copy of the weights, whichever backend serves predictions"""
+        if isinstance(self.model, NumpyModel):
+            return self.model
+        if bundle is not None and 'embeddings' in bundle:
+            return NumpyModel(**{
+                name: bundle[name] for name in WEIGHT_FIELDS if name in bundle
+            })
+        if not self.manifest.weights.exists():
+            return None
+        return NumpyModel.from_h5(self.manifest.weights)
+    
+    def _build_encoder(self):
+        """Build the compiled text encoder from word mappings"""
+        try:
+            self.encoder = TextEncoder(self.word_index_map, self.sequence_length)
+            logger.info("Text encoder built successfully")
+        except Exception as e:
+            logger.error(f"Error building text encoder: {str(e)}")
     
     def _load_model(self):
         """Load pre-trained Keras model"""
         try:
-            if not MODEL_WEIGHTS.exists():
-                logger.warning(f"Model weights not found: {MODEL_WEIGHTS}")
+            weights = self.manifest.weights
+            if not weights.exists():
+                logger.warning(f"Model weights not found: {weights}")
                 return
             
             # Build model architecture
+            import tensorflow as tf
             from keras.models import Sequential
             from keras.layers import Dense, Embedding, Lambda, Flatten
             import keras.backend as K
             
             self.model = Sequential()
-            self.model.add(Embedding(self.vocab_size + 1, self.embed_size, 
+            self.model.add(Embedding(self.vocab_size, self.embed_size, 
                                     input_length=self.sequence_length))
             self.model.add(Lambda(lambda x: K.mean(x, axis=1), 
                                  output_shape=(self.embed_size,)))
-            self.model.add(Dense(self.vocab_size2 - 2, activation='softmax'))
+            self.model.add(Dense(self.num_classes, activation='softmax'))
             self.model.compile(loss=tf.keras.losses.CategoricalCrossentropy(), 
                              optimizer='adam', metrics=['accuracy'])
             
             # Load weights
-            self.model.load_weights(str(MODEL_WEIGHTS))
+            self.model.load_weights(str(weights))
             logger.info("Model loaded successfully")
             
         except Exception as e:
             logger.error(f"Error loading model: {str(e)}")
     
-    def _preprocess_text(self, text):
-        """Preprocess input text"""
-        text = text.lower()
-        text = re.sub(r'[^A-Za-z\n]+', ' ', text)
-        # Simple stopword removal
-        stopwords = {'a', 'an', 'the', 'and', 'or', 'in', 'is', 'it', 'to', 'of', 'for'}
-        words = [w for w in text.split() if w not in stopwords]
-        return ' '.join(words)
+    def _load_numpy_model(self):
+        """Load the trained weights into the NumPy inference engine"""
+        try:
+            weights = self.manifest.weights
+            if not weights.exists():
+                logger.warning(f"Model weights not found: {weights}")
+                return
+            
+            self.model = NumpyModel.from_h5(weights)
+            logger.info("NumPy model loaded successfully")
+            
+        except Exception as e:
+            logger.error(f"Error loading NumPy model: {str(e)}")
     
-    def predict(self, benefits_text):
+    def _check_manifest(self):
+        """Drop NumPy weights whose shapes disagree with the manifest"""
+        if self.model is None:
+            return
+        try:
+            self.manifest.validate(self.model)
+        except ValueError as e:
+            logger.error(f"Model does not match its manifest: {str(e)}")
+            self.model = None
+    
+    def _apply_precision(self):
+        """Store the NumPy weights at the configured precision"""
+        if self.model is None or self.model.precision == self.precision:
+            return
+        try:
+            self.model = self.model.quantize(self.precision)
+            logger.info(
+                f"Using {self.precision} weights ({self.model.nbytes} bytes)"
+            )
+        except Exception as e:
+            logger.error(f"Error quantizing model weights: {str(e)}")
+    
+    def cache_key(self, benefits_text):
+        """
+        Token sequence the model actually sees for a text.
+        
+        Texts that only differ in case, punctuation or stopwords map to the
+        same key. Returns None when the result should not be cached
+        (empty input or mock predictions).
+        """
+        if self.model is None:
+            return None
+        return self.encoder.tokenize(benefits_text)
+    
+    def predict(self, benefits_text, top_k=1, cluster=None, similar=False, explain=False,
+                exclude_conditions=None):
         """
         Predict the best yoga asana for given benefits.
         
         Args:
             benefits_text: String description of desired benefits
+            top_k: Number of ranked asanas to return under 'predictions'
+            cluster: Only consider asanas in this cluster
+            similar: Add the predicted asana's cluster mates as 'similar_asanas'
+            explain: Add the words that contributed most as 'explanation'
+            exclude_conditions: Skip asanas contraindicated for any of these
+                conditions (see models.conditions.CONDITIONS)
             
         Returns:
             dict with predicted asana and confidence
         """
-        try:
-            # Preprocess input
-            processed_text = self._preprocess_text(benefits_text)
-            
-            if not processed_text:
-                return {
-                    'asana': 'Unknown',
-                    'confidence': 0.0,
-                    'error': 'Invalid input'
-                }
-            
-            # If model not available, return mock prediction
-            if self.model is None:
-                return self._mock_prediction(benefits_text)
+        return self.predict_batch(
+            [benefits_text], top_k=top_k, cluster=cluster, similar=similar, explain=explain,
+            exclude_conditions=exclude_conditions
+        )[0]
+    
+    def predict_batch(self, benefits_texts, top_k=1, cluster=None, similar=False,
+                      explain=False, exclude_conditions=None):
+        """
+        Predict the best yoga asana for each of several benefits texts.
+        
+        All valid texts are padded into one (N, sequence_length) array and
+        scored with a single forward pass. A bad entry only affects its own
+        result, which carries an 'error' key just like predict(), and an
+        'error_kind' of INPUT_ERROR or INFERENCE_ERROR.
+        
+        Args:
+            benefits_texts: List of benefits descriptions
+            top_k: Number of ranked asanas to return under 'predictions'
+            cluster: Only consider asanas in this cluster
+            similar: Add the predicted asana's cluster mates as 'similar_asanas'
+            explain: Add the words that contributed most as 'explanation'
+            exclude_conditions: Skip asanas contraindicated for any of these
+                conditions
             
-            # Tokenize
-            sequences = self.tokenizer.texts_to_sequences([processed_text])
+        Returns:
+            list of prediction dicts, in the same order as the input
+        """
+        rankings = self.rank_batch(
+            benefits_texts, top_k=top_k, cluster=cluster, exclude_conditions=exclude_conditions
+        )
+        results = []
+        for benefits_text, item in zip(benefits_texts, rankings):
+            if isinstance(item, dict):
+                results.append(item)
+                continue
+            result = self._build_prediction(item, top_k, similar=similar)
+            if explain:
+                result['explanation'] = self.explain(benefits_text, item[0][0])
+            results.append(result)
+        return results
+    
+    def rank_batch(self, benefits_texts, top_k=1, cluster=None, exclude_conditions=None):
+        """
+        Score several benefits texts down to their ranked classes.
+        
+        This is predict_batch() without building the response dicts, so the
+        result is compact enough to send between processes (see models.pool).
+        
+        Returns:
+            list with, per input text, either a finished prediction dict
+            (errors and mock predictions) or a tuple of (class index,
+            confidence) pairs, best first
+        """
+        if self.defer_model:
+            self._ensure_model()
+        
+        results = [None] * len(benefits_texts)
+        pending = []
+        token_lists = []
+        
+        start = time.perf_counter()
+        for i, benefits_text in enumerate(benefits_texts):
+            try:
+                # Preprocess and tokenize input
+                tokens = self.encoder.tokenize(benefits_text)
+                
+                if tokens is None:
+                    METRICS.inc('yoga_errors_total', type='InvalidInput',
+                                model_version=self.model_version)
+                    results[i] = {
+                        'asana': 'Unknown',
+                        'confidence': 0.0,
+                        'error': 'Invalid input',
+                        'error_kind': INPUT_ERROR
+                    }
+                # If model not available, fall back to keyword matching
+                elif self.model is None:
+                    METRICS.inc('yoga_mock_predictions_total')
+                    results[i] = self._mock_prediction(
+                        benefits_text, top_k, cluster, exclude_conditions
+                    )
+                else:
+                    pending.append(i)
+                    token_lists.append(tokens)
+                    
+            except Exception as e:
+                logger.error(f"Prediction error: {str(e)}")
+                results[i] = self._error_result(e)
+        
+        now = time.perf_counter()
+        METRICS.stage('tokenize', now - start)
+        
+        if not pending:
+            return results
+        
+        try:
+            mask = self._selection_mask(cluster, exclude_conditions)
             
             # Pad sequences
-            padded = pad_sequences(sequences, self.sequence_length, 
-                                 padding='post', truncating='pre')
+            start = now
+            padded = self.encoder.pack(token_lists, out=self._padded_buffer(len(token_lists)))
+            now = time.perf_counter()
+            METRICS.stage('pad', now - start)
             
             # Predict
-            prediction = self.model.predict(padded, verbose=0)
-            
-            # Get top prediction
-            predicted_idx = np.argmax(prediction[0])
-            confidence = float(prediction[0][predicted_idx])
-            
-            # Convert index to asana ID (add 3 offset as in original training)
-            asana_id = predicted_idx + 3
-            
-            # Get asana details
-            asana_info = self.asana_data.get(asana_id, {})
-            asana_name = asana_info.get('name', f'Asana {asana_id}')
-            
-            return {
-                'asana': asana_name,
-                'asana_id': asana_id,
-                'confidence': confidence,
-                'description': asana_info.get('description', ''),
-                'benefits': asana_info.get('benefits', ''),
-                'contraindications': asana_info.get('contraindications', ''),
-                'level': asana_info.get('level', ''),
-                'breathing': asana_info.get('breathing', '')
-            }
+            start = now
+            prediction = self._forward(padded)
+            now = time.perf_counter()
+            METRICS.stage('forward', now - start)
             
+            start = now
+            for row, i in enumerate(pending):
+                results[i] = self._rank(prediction[row], top_k, mask=mask)
+            METRICS.stage('top_k', time.perf_counter() - start)
+                
         except Exception as e:
             logger.error(f"Prediction error: {str(e)}")
+            for i in pending:
+                results[i] = self._error_result(e)
+        
+        return results
+    
+    def _padded_buffer(self, rows):
+        """
+        (rows, sequence_length) int32 view of this thread's input buffer
+        
+        The buffer only grows, so a thread allocates once for its largest
+        batch; every row handed out is fully overwritten by encoder.pack().
+        """
+        buffer = getattr(self._buffers, 'padded', None)
+        if buffer is None or len(buffer) < rows:
+            buffer = self._buffers.padded = np.empty(
+                (rows, self.sequence_length), dtype=np.int32
+            )
+        return buffer[:rows]
+    
+    def _ensure_model(self):
+        """Build a deferred Keras model in the process that first needs it"""
+        with self._model_lock:
+            if self.defer_model:
+                self._load_model()
+                self.defer_model = False
+    
+    def _forward(self, padded):
+        """Run the model on a padded (N, sequence_length) batch"""
+        if self.backend == 'keras':
+            return self.model.predict(padded, verbose=0)
+        return self.model.predict(padded)
+    
+    def _selection_mask(self, cluster=None, exclude_conditions=None):
+        """
+        Boolean mask of the classes a request may select, or None for all
+        
+        Raises:
+            InvalidRequest: if the cluster is unknown or no model class is
+                left to select
+        """
+        mask = None
+        if cluster is not None:
+            mask = self.cluster_index.class_mask(cluster) if self.cluster_index else None
+            if mask is None or not mask.any():
+                raise InvalidRequest(f"Unknown cluster: {cluster}")
+        
+        if exclude_conditions:
+            safe = self._conditions().safe_mask(exclude_conditions)
+            mask = safe if mask is None else mask & safe
+            if not mask.any():
+                raise InvalidRequest("No asana is safe for the excluded conditions")
+        return mask
+    
+    def _conditions(self):
+        """
+        The condition index, for filters that must not fail open
+        
+        Raises:
+            RuntimeError: if it could not be built
+        """
+        if self.condition_index is None:
+            raise RuntimeError("Contraindication index is not available")
+        return self.condition_index
+    
+    def _rank(self, probabilities, top_k=1, mask=None):
+        """
+        Top classes of one row of class probabilities.
+        
+        Classes outside the mask are never selected; confidences stay the
+        model's unmasked probabilities.
+        
+        Returns:
+            tuple of (class index, confidence) pairs, best first
+        """
+        if mask is None:
+            indices = top_k_indices(probabilities, top_k)
+        else:
+            scores = np.where(mask, probabilities, -1.0)
+            indices = top_k_indices(scores, min(top_k, int(mask.sum())))
+        
+        return tuple((idx, float(probabilities[idx])) for idx in indices.tolist())
+    
+    def _build_prediction(self, ranking, top_k=1, similar=False):
+        """
+        Build the prediction dict for a ranking from _rank().
+        
+        The best asana's fields are at the top level. When top_k > 1 the
+        ranked alternatives, best first, are listed under 'predictions'.
+        """
+        best, confidence = ranking[0]
+        result = {**self.class_payloads[best], 'confidence': confidence}
+        
+        if similar:
+            asana_id = result['asana_id']
+            if self.cluster_index is not None:
+                result['cluster'] = self.cluster_index.cluster_of(asana_id)
+                result['similar_asanas'] = list(self.cluster_index.similar(asana_id))
+            else:
+                result['cluster'] = None
+                result['similar_asanas'] = []
+        
+        if top_k > 1:
+            result['predictions'] = [
+                {**self.class_payloads[idx], 'confidence': confidence}
+                for idx, confidence in ranking
+            ]
+        
+        return result
+    
+    def explain(self, benefits_text, class_index, top_words=EXPLAIN_TOP_WORDS):
+        """
+        Words of a text that pushed the model towards a class
+        
+        The model averages the embeddings of its input and applies one dense
+        layer, so a class logit is exactly the bias plus one contribution per
+        token position, padding positions included, looked up in a
+        (vocab, classes) table. No extra forward pass is needed.
+        
+        Args:
+            benefits_text: Text the prediction was made for
+            class_index: Index of the class to explain
+            top_words: Number of words to list
+            
+        Returns:
+            dict, in logit units, with 'words': the top_words words that
+            contributed most to the class logit, highest first, each summed
+            over its occurrences; 'padding': the padding positions' total;
+            and 'bias': the class bias. The contributions of all the text's
+            words plus padding plus bias equal the logit; with fewer than
+            top_words distinct words, those listed are all of them.
+        """
+        table, bias = self._contribution_table()
+        column = table[:, class_index]
+        tokens = self.encoder.tokenize(benefits_text) or []
+        
+        words = {}
+        for token in tokens:
+            entry = words.get(token)
+            if entry is None:
+                words[token] = [float(column[token]), 1]
+            else:
+                entry[0] += float(column[token])
+                entry[1] += 1
+        
+        ranked = sorted(words.items(), key=lambda item: item[1][0], reverse=True)
+        return {
+            'words': [
+                {
+                    'word': self.index_to_word_map.get(token, str(token)),
+                    'contribution': contribution,
+                    'count': count
+                }
+                for token, (contribution, count) in ranked[:top_words]
+            ],
+            'padding': float(column[0]) * (self.sequence_length - len(tokens)),
+            'bias': float(bias[class_index])
+        }
+    
+    def _contribution_table(self):
+        """(per-token class logit contributions, bias), computed on first use"""
+        if self.contributions is None:
+            model = self._weights_model()
+            if model is None:
+                raise RuntimeError("Model weights not available")
+            self.contributions = (model.contributions(self.sequence_length), model.bias)
+        return self.contributions
+    
+    def _error_result(self, error):
+        """Prediction dict returned when scoring a text fails"""
+        METRICS.inc('yoga_errors_total', type=type(error).__name__,
+                    model_version=self.model_version)
+        return {
+            'asana': 'Unknown',
+            'confidence': 0.0,
+            'error': str(error),
+            'error_kind': INPUT_ERROR if isinstance(error, InvalidRequest) else INFERENCE_ERROR
+        }
+    
+    def _keyword_fallback(self):
+        """The keyword fallback engine, compiled on first use"""
+        if self.fallback is None:
+            self.fallback = KeywordFallback.build(self.asana_data)
+        return self.fallback
+    
+    def _mock_prediction(self, benefits_text, top_k=1, cluster=None, exclude_conditions=None):
+        """
+        Prediction from the keyword fallback when the model is not available
+        
+        Raises:
+            InvalidRequest: if the cluster is unknown or no asana is left
+        """
+        allowed = None
+        if cluster is not None:
+            allowed = set(self.cluster_index.members(cluster) if self.cluster_index else ())
+            if not allowed:
+                raise InvalidRequest(f"Unknown cluster: {cluster}")
+        if exclude_conditions:
+            condition_index = self._conditions()
+            candidates = self.asana_data if allowed is None else allowed
+            allowed = {
+                asana_id for asana_id in candidates
+                if condition_index.is_safe(asana_id, exclude_conditions)
+            }
+            if not allowed:
+                raise InvalidRequest("No asana is safe for the excluded conditions")
+        
+        ranking = self._keyword_fallback().rank(benefits_text, top_k, allowed)
+        if not ranking:
             return {
                 'asana': 'Unknown',
                 'confidence': 0.0,
-                'error': str(e)
+                'error': 'No known keywords in input',
+                'error_kind': INPUT_ERROR,
+                'is_mock': True
             }
+        
+        asana_id, confidence = ranking[0]
+        result = {**self._asana_payload(asana_id), 'confidence': confidence, 'is_mock': True}
+        if top_k > 1:
+            result['predictions'] = [
+                {**self._asana_payload(asana_id), 'confidence': confidence}
+                for asana_id, confidence in ranking
+            ]
+        return result
     
-    def _mock_prediction(self, benefits_text):
-        """Return mock prediction when model not available"""
-        # Simple keyword matching for demonstration
-        benefits_lower = benefits_text.lower()
-        
-        keyword_asanas = {
-            'flexibility': ('Uttanasana', 2),
-            'strength': ('Adho Mukha Svanasana', 5),
-            'balance': ('Vrksasana', 8),
-            'calm': ('Lotus Pose', 1),
-            'energy': ('Surya Namaskar', 3),
-            'digestion': ('Trikonasana', 4),
-            'back': ('Bhujangasana', 6),
-            'hip': ('Pigeon Pose', 9),
-        }
+    def semantic_search(self, benefits_texts, top_k=5):
+        """
+        Asanas whose Benefits texts are closest to each of several texts
         
-        for keyword, (asana, asana_id) in keyword_asanas.items():
-            if keyword in benefits_lower:
-                asana_info = self.asana_data.get(asana_id, {})
-                return {
-                    'asana': asana,
+        Args:
+            benefits_texts: List of query texts
+            top_k: Number of asanas to return per text
+            
+        Returns:
+            list with, per text, a dict with the ranked asanas under
+            'results' (or an 'error' key), in the same order as the input
+        """
+        if self.semantic_index is None:
+            raise RuntimeError("Semantic index not available")
+        
+        token_lists = [self.encoder.known_tokens(text) for text in benefits_texts]
+        rankings = self.semantic_index.search_batch(token_lists, top_k)
+        
+        results = []
+        for ranking in rankings:
+            if ranking is None:
+                results.append({'error': 'No known words in query'})
+                continue
+            results.append({'results': [
+                {
+                    'asana': self.asana_data[asana_id]['name'],
                     'asana_id': asana_id,
-                    'confidence': 0.75,
-                    'description': asana_info.get('description', ''),
-                    'benefits': asana_info.get('benefits', ''),
-                    'contraindications': asana_info.get('contraindications', ''),
-                    'is_mock': True
+                    'similarity': similarity,
+                    'benefits': self.asana_data[asana_id].get('benefits', ''),
+                    'level': self.asana_data[asana_id].get('level', '')
                 }
+                for asana_id, similarity in ranking
+            ]})
+        return results
+    
+    def search(self, query, top_k=10, boosts=None):
+        """
+        Keyword search over the asana catalogue
         
-        # Default prediction
-        return {
-            'asana': 'Child Pose',
-            'asana_id': 1,
-            'confidence': 0.5,
-            'is_mock': True
-        }
+        Args:
+            query: Query text
+            top_k: Number of asanas to return
+            boosts: Optional weight per field (see models.fulltext.FIELDS)
+            
+        Returns:
+            list of matching asanas, best first
+        """
+        if self.fulltext_index is None:
+            raise RuntimeError("Full-text index not available")
+        
+        return [
+            {
+                'asana': self.asana_data[asana_id]['name'],
+                'asana_id': asana_id,
+                'score': score,
+                'matched_fields': fields,
+                'benefits': self.asana_data[asana_id].get('benefits', ''),
+                'level': self.asana_data[asana_id].get('level', '')
+            }
+            for asana_id, score, fields in self.fulltext_index.search(query, top_k, boosts)
+        ]
     
     def get_available_asanas(self):
         """Get list of all available asanas"""
@@ -0,0 +1,31 @@
+"""
+Ranking helpers shared by the predictor and the search indexes.
+"""
+
+import numpy as np
+
+
+def top_k_indices(scores, k):
+    """
+    Indices of the k highest scores, best first
+
+    Uses argpartition so only the k selected entries are sorted,
+    instead of sorting the whole score vector.
+
+    Args:
+        scores: 1-D array of scores
+        k: Number of indices to return (clipped to len(scores))
+
+    Returns:
+        int array of at most k indices ordered by descending score
+    """
+    n = scores.shape[0]
+    if k <= 0 or n == 0:
+        return np.empty(0, dtype=np.intp)
+    if k == 1:
+        return np.array([np.argmax(scores)])
+    if k < n:
+        candidates = np.argpartition(scores, n - k)[n - k:]
+    else:
+        candidates = np.arange(n)
+    return candidates[np.argsort(scores[candidates])[::-1]]
@@ -0,0 +1,285 @@
+"""
+Model registry for hot swaps and A/B routing.
+Holds the loaded predictor variants and swaps new models in without a restart.
+"""
+
+import logging
+import os
+import random
+import threading
+import time
+import zlib
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+PRIMARY = 'primary'
+
+# Seconds between checks of the primary model's manifest and weights for
+# changes (0 disables the file watch)
+RELOAD_INTERVAL = float(os.environ.get('MODEL_RELOAD_INTERVAL', 2.0))
+
+
+class ModelRegistry:
+    """
+    Named predictor variants with atomic hot swaps and weighted A/B routing.
+
+    A new model is loaded and warmed up beside the current one, then the
+    variant table is replaced by a new dict in a single assignment. Requests
+    that already picked a predictor finish on it; new requests see the new
+    one, so nothing is dropped and no request waits for a load.
+
+    The 'primary' variant serves all traffic unless a split assigns
+    fractions of it to other variants.
+    """
+
+    def __init__(self, factory, primary, reload_interval=RELOAD_INTERVAL):
+        """
+        Initialize the registry
+
+        Args:
+            factory: Callable building a YogaPredictor from a manifest path
+            primary: Predictor serving traffic initially
+            reload_interval: Seconds between checks of the primary's files
+        """
+        self._factory = factory
+        self._variants = {PRIMARY: primary}
+        self._split = ()
+        self._swap_lock = threading.Lock()
+        self._watch_lock = threading.Lock()
+        self.reload_interval = reload_interval
+        # Number of swaps in this process, for the admin API
+        self.version = 0
+        self._signature = self._file_signature(primary)
+        self._next_check = time.monotonic() + reload_interval
+
+    @property
+    def primary(self):
+        return self._variants[PRIMARY]
+
+    @property
+    def generation(self):
+        """
+        Identity of the loaded models for the result cache
+
+        Built from the manifests' versions and the digests of the files
+        every variant was loaded from, so it is the same in every worker
+        serving the same models and changes with any swap that changes one.
+        """
+        return tuple(
+            (name, predictor.model_version, predictor.content_version,
+             predictor.backend, predictor.precision)
+            for name, predictor in sorted(self._variants.items())
+        )
+
+    def get(self, name):
+        """Predictor of a variant, or None"""
+        return self._variants.get(name)
+
+    def choose(self, routing_key=None):
+        """
+        Pick the variant serving a request
+
+        Args:
+            routing_key: Optional stable key (e.g. a user id); requests with
+                the same key always get the same variant
+
+        Returns:
+            (variant name, predictor)
+        """
+        variants = self._variants
+        split = self._split
+        if not split:
+            return PRIMARY, variants[PRIMARY]
+
+        if routing_key:
+            point = zlib.crc32(str(routing_key).encode('utf-8')) / 2 ** 32
+        else:
+            point = random.random()
+        for name, upper in split:
+            if point < upper and name in variants:
+                return name, variants[name]
+        return PRIMARY, variants[PRIMARY]
+
+    def predict_batch(self, texts, variant=PRIMARY, **options):
+        """predict_batch on a variant (the primary if it is gone)"""
+        predictor = self._variants.get(variant) or self.primary
+        return predictor.predict_batch(texts, **options)
+
+    def load(self, manifest=None, name=PRIMARY):
+        """
+        Load a model beside the current ones and swap it in once warm
+
+        Args:
+            manifest: Manifest path (the default manifest if None)
+            name: Variant to install the model as
+
+        Returns:
+            the new predictor
+
+        Raises:
+            RuntimeError: if the model fails to load or warm up; the
+                current variants are left untouched
+        """
+        if manifest is not None and not Path(manifest).exists():
+            raise RuntimeError(f"Model manifest not found: {manifest}")
+
+        predictor = self._factory(manifest)
+        if predictor.model is None:
+            raise RuntimeError(f"Model from {predictor.manifest_path} failed to load")
+
+        # Build and trace the model before it takes traffic
+        predictor._warmup()
+        if not predictor.ready:
+            raise RuntimeError(f"Model from {predictor.manifest_path} failed to warm up")
+
+        with self._swap_lock:
+            variants = dict(self._variants)
+            variants[name] = predictor
+            self._variants = variants
+            if name == PRIMARY:
+                self._signature = self._file_signature(predictor)
+            self.version += 1
+
+        logger.info(
+            f"Swapped in model version {predictor.model_version} as '{name}' "
+            f"from {predictor.manifest_path}"
+        )
+        return predictor
+
+    def promote(self, name):
+        """Make a variant the primary and stop routing to it by name"""
+        with self._swap_lock:
+            if name not in self._variants:
+                raise KeyError(name)
+            if name == PRIMARY:
+                return
+            variants = dict(self._variants)
+            variants[PRIMARY] = variants.pop(name)
+            self._variants = variants
+            self._split = self._split_without(name)
+            self._signature = self._file_signature(variants[PRIMARY])
+            self.version += 1
+        logger.info(f"Promoted variant '{name}' to primary")
+
+    def remove(self, name):
+        """Unload a non-primary variant"""
+        if name == PRIMARY:
+            raise ValueError("The primary variant cannot be removed")
+        with self._swap_lock:
+            if name not in self._variants:
+                raise KeyError(name)
+            variants = dict(self._variants)
+            del variants[name]
+            self._split = self._split_without(name)
+            self._variants = variants
+            self.version += 1
+
+    def set_split(self, weights):
+        """
+        Route fractions of traffic to non-primary variants
+
+        Args:
+            weights: Mapping of variant name to its fraction of requests;
+                the primary gets whatever is left. Empty to send all
+                traffic to the primary.
+
+        Raises:
+            ValueError: for unknown variants or fractions outside [0, 1]
+        """
+        split = []
+        upper = 0.0
+        for name, fraction in weights.items():
+            if name == PRIMARY or name not in self._variants:
+                raise ValueError(f"Unknown variant: {name}")
+            if isinstance(fraction, bool) or not isinstance(fraction, (int, float)) \
+                    or not 0 <= fraction <= 1:
+                raise ValueError(f"Fraction for {name} must be between 0 and 1")
+            upper += fraction
+            split.append((name, upper))
+        if upper > 1 + 1e-9:
+            raise ValueError("Fractions add up to more than 1")
+        self._split = tuple(split)
+
+    def _split_without(self, name):
+        """Split with a variant dropped and every other variant keeping its fraction"""
+        split = []
+        upper = 0.0
+        for variant, fraction in self.split.items():
+            if variant != name:
+                upper += fraction
+                split.append((variant, upper))
+        return tuple(split)
+
+    @property
+    def split(self):
+        """Fraction of traffic per non-primary variant"""
+        fractions = {}
+        lower = 0.0
+        for name, upper in self._split:
+            fractions[name] = round(upper - lower, 6)
+            lower = upper
+        return fractions
+
+    def describe(self):
+        """Summary of the loaded variants for the admin API"""
+        return {
+            'version': self.version,
+            'split': self.split,
+            'variants': {
+                name: {
+                    'model_version': predictor.model_version,
+                    'manifest': predictor.manifest.to_dict(),
+                    'backend': predictor.backend,
+                    'precision': predictor.precision,
+                    'state': predictor.state
+                }
+                for name, predictor in self._variants.items()
+            }
+        }
+
+    @staticmethod
+    def _file_signature(predictor):
+        """Modification times and sizes of a predictor's manifest and weights"""
+        signature = []
+        for path in (predictor.manifest_path, predictor.manifest.weights):
+            try:
+                stat = os.stat(path)
+                signature.append((str(path), stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                signature.append((str(path), None, None))
+        return tuple(signature)
+
+    def check_for_changes(self):
+        """
+        Hot-swap the primary when its manifest or weights change on disk
+
+        Cheap enough to call on every request: the files are only checked
+        every reload_interval seconds, and the new model is loaded and
+        warmed in a background thread while the old one keeps serving.
+        """
+        if self.reload_interval <= 0 or time.monotonic() < self._next_check:
+            return
+        if not self._watch_lock.acquire(blocking=False):
+            return
+        try:
+            self._next_check = time.monotonic() + self.reload_interval
+            primary = self.primary
+            signature = self._file_signature(primary)
+            if signature == self._signature:
+                return
+            # Record it now so a broken model is not retried on every check
+            self._signature = signature
+        finally:
+            self._watch_lock.release()
+
+        threading.Thread(
+            target=self._reload_primary, args=(primary.manifest_path,),
+            name='model-reload', daemon=True
+        ).start()
+
+    def _reload_primary(self, manifest):
+        try:
+            self.load(Path(manifest), PRIMARY)
+        except Exception as e:
+            logger.error(f"Model hot swap failed, keeping the current model: {str(e)}")
@@ -0,0 +1,138 @@
+"""
+Nearest-neighbour retrieval over the asanas' Benefits texts.
+Embeds texts with the classifier's own embedding table and ranks asanas by
+cosine similarity.
+"""
+
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class SemanticIndex:
+    """
+    Normalized mean-embedding vector of every asana's Benefits text.
+
+    A text is embedded as the mean of its tokens' vectors, so a query is one
+    (D,) mean, one matrix-vector product against the (N, D) matrix and an
+    argpartition. Unlike the classifier, every asana with a Benefits text can
+    be returned, whether or not the model has a class for it.
+
+    Padding is left out of the mean: the model's padding embedding is far
+    from zero, and averaging it in as the Lambda layer does drowns the words
+    of short texts.
+
+    The embedding table is shared with the model in its storage precision;
+    int8 rows are scaled only once gathered, so no float32 copy is kept.
+    """
+
+    def __init__(self, asana_ids, vectors, embeddings, embedding_scales=None):
+        """
+        Initialize the index
+
+        Args:
+            asana_ids: (N,) asana ID of each row
+            vectors: (N, D) float32 unit vectors
+            embeddings: (vocab, D) float32, float16 or int8 embedding table
+                for queries
+            embedding_scales: (vocab,) scales of an int8 embedding table
+        """
+        self.asana_ids = np.asarray(asana_ids, dtype=np.int32)
+        self.vectors = np.asarray(vectors, dtype=np.float32)
+        self.embeddings = embeddings
+        self.embedding_scales = embedding_scales
+
+    @classmethod
+    def build(cls, embeddings, encoder, asana_data, embedding_scales=None):
+        """
+        Embed the Benefits text of every asana
+
+        Args:
+            embeddings: (vocab, D) embedding table
+            encoder: TextEncoder providing the vocabulary
+            asana_data: Mapping of asana ID to its info dict
+            embedding_scales: (vocab,) scales of an int8 embedding table
+
+        Returns:
+            a SemanticIndex over the asanas with at least one known word
+        """
+        asana_ids = []
+        token_lists = []
+        for asana_id, info in sorted(asana_data.items()):
+            tokens = encoder.known_tokens(info.get('benefits') or '')
+            if tokens:
+                asana_ids.append(asana_id)
+                token_lists.append(tokens)
+
+        index = cls(
+            asana_ids, np.zeros((0, embeddings.shape[1]), np.float32), embeddings,
+            embedding_scales
+        )
+        index.vectors = index.embed(token_lists)
+        logger.info(f"Built semantic index of {len(asana_ids)} asanas")
+        return index
+
+    def __len__(self):
+        return len(self.asana_ids)
+
+    @property
+    def arrays(self):
+        """Arrays to persist in the artifact bundle"""
+        return {'semantic_ids': self.asana_ids, 'semantic_vectors': self.vectors}
+
+    def embed(self, token_lists):
+        """
+        Unit-length mean embedding of each token list
+
+        Returns:
+            (len(token_lists), D) float32 array; empty lists give zero rows
+        """
+        out = np.zeros((len(token_lists), self.embeddings.shape[1]), dtype=np.float32)
+        for row, tokens in enumerate(token_lists):
+            if not tokens:
+                continue
+            if self.embedding_scales is None:
+                self.embeddings[tokens].mean(axis=0, dtype=np.float32, out=out[row])
+            else:
+                np.dot(self.embedding_scales[tokens], self.embeddings[tokens], out=out[row])
+                out[row] /= len(tokens)
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        np.divide(out, norms, out=out, where=norms > 0)
+        return out
+
+    def search_batch(self, token_lists, top_k=5):
+        """
+        Nearest asanas for several queries with one matrix product
+
+        Args:
+            token_lists: Token ids of each query (see TextEncoder.known_tokens)
+            top_k: Results per query
+
+        Returns:
+            list with, per query, a list of (asana ID, similarity) pairs,
+            best first, or None when the query has no known words
+        """
+        queries = self.embed(token_lists)
+        scores = queries @ self.vectors.T
+
+        n = scores.shape[1]
+        k = min(top_k, n)
+        if k <= 0:
+            return [[] if tokens else None for tokens in token_lists]
+        if k < n:
+            top = np.argpartition(scores, n - k, axis=1)[:, n - k:]
+        else:
+            top = np.broadcast_to(np.arange(n), scores.shape)
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+
+        ids = self.asana_ids[top].tolist()
+        similarities = top_scores.tolist()
+        return [
+            list(zip(ids[row], similarities[row])) if tokens else None
+            for row, tokens in enumerate(token_lists)
+        ]
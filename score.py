@@ -0,0 +1,90 @@
+"""
+Bulk-score a CSV or JSONL file of benefits texts.
+
+    python score.py intake.csv -o scored.jsonl --text-field benefits
+    python score.py forms.jsonl -o scored.csv --text-field body --id-field request_id \\
+        --checkpoint scored.ckpt --shard 0/4 --processes 8
+
+Rows stream through in batches and are written as they are scored, so memory
+use stays flat. Re-running with the same --checkpoint resumes after the last
+written batch.
+"""
+
+import argparse
+import logging
+import sys
+
+from models.predictor import YogaPredictor
+from models.mudra_db import MudraDatabase
+from models import bulk
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_shard(value):
+    try:
+        index, count = (int(part) for part in value.split('/'))
+    except ValueError:
+        raise argparse.ArgumentTypeError("shard must look like INDEX/COUNT, e.g. 0/4")
+    if not 0 <= index < count:
+        raise argparse.ArgumentTypeError("shard index must be in [0, COUNT)")
+    return index, count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Bulk-score a CSV or JSONL file of benefits texts'
+    )
+    parser.add_argument('input', help='CSV or JSONL input file')
+    parser.add_argument('-o', '--output', default='-', help='Output file (default: stdout)')
+    parser.add_argument('--input-format', choices=bulk.FORMATS)
+    parser.add_argument('--output-format', choices=bulk.FORMATS)
+    parser.add_argument('--text-field', default='benefits', help='Field with the benefits text')
+    parser.add_argument('--id-field', help='Field copied to the output as id')
+    parser.add_argument('--top-k', type=int, default=1)
+    parser.add_argument('--batch-size', type=int, default=256)
+    parser.add_argument('--shard', type=_parse_shard, default=(0, 1),
+                        help='Score only shard INDEX of COUNT (by row number)')
+    parser.add_argument('--checkpoint', help='Checkpoint file for resuming')
+    parser.add_argument('--processes', type=int, default=1,
+                        help='Worker processes for the forward pass')
+    parser.add_argument('--no-mudras', action='store_true',
+                        help='Skip mudra recommendations')
+    parser.add_argument('--progress-interval', type=float, default=5.0)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.WARNING,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    predictor = YogaPredictor(backend='numpy')
+    mudra_db = None if args.no_mudras else MudraDatabase()
+
+    pool = None
+    if args.processes > 1:
+        from models.pool import InferencePool
+        pool = InferencePool(predictor, processes=args.processes, chunk_size=args.batch_size)
+
+    try:
+        written = bulk.run(
+            args.input, args.output, predictor, mudra_db=mudra_db,
+            input_format=args.input_format, output_format=args.output_format,
+            text_field=args.text_field, id_field=args.id_field, top_k=args.top_k,
+            batch_size=args.batch_size, shard_index=args.shard[0],
+            shard_count=args.shard[1], checkpoint_path=args.checkpoint,
+            pool=pool, progress_interval=args.progress_interval
+        )
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if pool is not None:
+            pool.close()
+
+    print(f"Wrote {written} rows", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
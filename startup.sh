@@ -19,4 +19,4 @@ echo "Dependencies installed successfully!"
 echo "Starting Flask app..."
 
 # Run the app with gunicorn (for production)
-gunicorn --bind 0.0.0.0:${PORT:-5000} --workers 4 --timeout 120 app:app
+gunicorn --config gunicorn.conf.py app:app
@@ -0,0 +1,8 @@
+"""Make the app's packages importable when pytest runs from any directory"""
+
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
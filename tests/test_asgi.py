@@ -0,0 +1,134 @@
+"""
+ASGI bridge: requests reach the Flask app on the executor for their route,
+oversized bodies get 413 and a full executor answers 429 instead of queueing.
+"""
+
+import asyncio
+import json
+import threading
+
+import pytest
+
+import asgi
+from asgi import BoundedExecutor, QueueFull
+
+JSON_HEADERS = [(b'content-type', b'application/json')]
+
+
+async def call(path, method='GET', chunks=(b'',), headers=()):
+    messages = iter([
+        {'type': 'http.request', 'body': chunk, 'more_body': i < len(chunks) - 1}
+        for i, chunk in enumerate(chunks)
+    ])
+    sent = []
+
+    async def receive():
+        return next(messages)
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        'type': 'http', 'method': method, 'path': path, 'query_string': b'',
+        'headers': list(headers)
+    }
+    await asgi.application(scope, receive, send)
+    start, body = sent
+    return start['status'], dict(start['headers']), json.loads(body['body'])
+
+
+def test_catalogue_route_is_served_through_the_bridge():
+    status, headers, payload = asyncio.run(call('/mudras'))
+    assert status == 200
+    assert headers[b'content-type'] == b'application/json'
+    assert payload['count'] == len(payload['mudras']) > 0
+
+
+def test_chunked_body_is_reassembled():
+    body = json.dumps({'benefits': 42}).encode('utf-8')
+    status, _, payload = asyncio.run(
+        call('/predict', 'POST', chunks=(body[:5], body[5:]), headers=JSON_HEADERS)
+    )
+    assert status == 400
+    assert payload['error'] == 'Benefits field must be a string'
+
+
+def test_routes_run_on_their_own_executor(monkeypatch):
+    threads = []
+    call_wsgi = asgi._call_wsgi
+
+    def recording_call_wsgi(environ):
+        threads.append(threading.current_thread().name)
+        return call_wsgi(environ)
+    monkeypatch.setattr(asgi, '_call_wsgi', recording_call_wsgi)
+
+    asyncio.run(call('/mudras'))
+    asyncio.run(call('/predict', 'POST', chunks=(b'{}',), headers=JSON_HEADERS))
+    assert threads[0].startswith('catalogue')
+    assert threads[1].startswith('inference')
+    assert threading.current_thread().name not in threads
+
+
+def test_oversized_bodies_are_rejected(monkeypatch):
+    monkeypatch.setattr(asgi, 'MAX_BODY_BYTES', 1000)
+    declared = [(b'content-length', b'5000')]
+    status, _, payload = asyncio.run(call('/predict', 'POST', headers=declared))
+    assert status == 413
+    assert '1000' in payload['error']
+
+    streamed = (b'x' * 600, b'x' * 600)
+    assert asyncio.run(call('/predict', 'POST', chunks=streamed))[0] == 413
+
+
+def test_full_executor_answers_429(monkeypatch):
+    pool = BoundedExecutor(1, 0, name='test-inference')
+    monkeypatch.setattr(asgi, 'executor', pool)
+    release = threading.Event()
+
+    async def scenario():
+        busy = asyncio.ensure_future(pool.run(release.wait))
+        await asyncio.sleep(0)
+        try:
+            return await call('/predict', 'POST', chunks=(b'{}',), headers=JSON_HEADERS)
+        finally:
+            release.set()
+            await busy
+
+    try:
+        status, headers, payload = asyncio.run(scenario())
+    finally:
+        pool.shutdown()
+    assert status == 429
+    assert headers[b'retry-after'] == str(asgi.RETRY_AFTER).encode('latin-1')
+    assert 'retry' in payload['error']
+    assert pool.stats()['rejected'] == 1
+    assert pool.stats()['completed'] == 1
+
+
+def test_bounded_executor_admits_up_to_queue_limit():
+    pool = BoundedExecutor(1, 1, name='test-bounded')
+    release = threading.Event()
+
+    async def scenario():
+        first = asyncio.ensure_future(pool.run(release.wait))
+        second = asyncio.ensure_future(pool.run(lambda: 'queued'))
+        await asyncio.sleep(0)
+        assert pool.stats()['running'] == 1
+        assert pool.stats()['queued'] == 1
+        with pytest.raises(QueueFull):
+            await pool.run(lambda: 'refused')
+        release.set()
+        return await asyncio.gather(first, second)
+
+    try:
+        assert asyncio.run(scenario()) == [True, 'queued']
+    finally:
+        pool.shutdown()
+    assert pool.stats()['rejected'] == 1
+
+
+def test_executor_stats_route():
+    status, _, payload = asyncio.run(call('/stats/executor'))
+    assert status == 200
+    assert payload['threads'] == asgi.executor.max_workers
+    assert payload['catalogue']['queue_limit'] == asgi.catalogue_executor.queue_limit
@@ -0,0 +1,96 @@
+"""
+MicroBatcher: concurrent submits coalesce into one predict_batch call, each
+caller gets its own result back, and failures reach every caller in the batch.
+"""
+
+import threading
+
+import pytest
+
+from models.batching import MicroBatcher
+
+# Wide enough that every submit in a test lands inside the first window
+WINDOW_MS = 200.0
+
+
+class RecordingPredictor:
+    def __init__(self, fail=False):
+        self.calls = []
+        self.fail = fail
+        self._lock = threading.Lock()
+
+    def __call__(self, texts, **options):
+        with self._lock:
+            self.calls.append((list(texts), options))
+        if self.fail:
+            raise RuntimeError("forward pass failed")
+        return [{'text': text, 'options': options} for text in texts]
+
+
+def test_submits_within_window_share_one_batch():
+    predictor = RecordingPredictor()
+    batcher = MicroBatcher(predictor, window_ms=WINDOW_MS, max_batch_size=8)
+    futures = [batcher.submit(f"text {i}", top_k=3) for i in range(5)]
+
+    results = [future.result(timeout=5) for future in futures]
+    assert [r['text'] for r in results] == [f"text {i}" for i in range(5)]
+    assert predictor.calls == [([f"text {i}" for i in range(5)], {'top_k': 3})]
+
+    stats = batcher.stats()
+    assert (stats['batches'], stats['items']) == (1, 5)
+    assert stats['batch_size']['buckets']['8'] == 1
+
+
+def test_batch_is_dispatched_at_max_size():
+    predictor = RecordingPredictor()
+    batcher = MicroBatcher(predictor, window_ms=WINDOW_MS, max_batch_size=2)
+    futures = [batcher.submit(f"text {i}") for i in range(5)]
+    assert [f.result(timeout=5)['text'] for f in futures] == [f"text {i}" for i in range(5)]
+    assert [len(texts) for texts, _ in predictor.calls] == [2, 2, 1]
+
+
+def test_different_options_are_scored_separately():
+    predictor = RecordingPredictor()
+    batcher = MicroBatcher(predictor, window_ms=WINDOW_MS)
+    first = batcher.submit("a", top_k=1)
+    second = batcher.submit("b", top_k=5)
+    third = batcher.submit("c", top_k=1)
+
+    assert first.result(timeout=5)['options'] == {'top_k': 1}
+    assert second.result(timeout=5)['options'] == {'top_k': 5}
+    assert third.result(timeout=5)['text'] == "c"
+    assert sorted(predictor.calls, key=lambda call: call[1]['top_k']) == [
+        (["a", "c"], {'top_k': 1}),
+        (["b"], {'top_k': 5})
+    ]
+
+
+def test_predict_blocks_for_concurrent_callers():
+    predictor = RecordingPredictor()
+    batcher = MicroBatcher(predictor, window_ms=WINDOW_MS)
+    results = {}
+
+    def call(i):
+        results[i] = batcher.predict(f"text {i}", timeout=5)['text']
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == {i: f"text {i}" for i in range(4)}
+    assert sum(len(texts) for texts, _ in predictor.calls) == 4
+
+
+def test_failure_reaches_every_caller():
+    batcher = MicroBatcher(RecordingPredictor(fail=True), window_ms=WINDOW_MS)
+    futures = [batcher.submit("a"), batcher.submit("b")]
+    for future in futures:
+        with pytest.raises(RuntimeError):
+            future.result(timeout=5)
+
+
+def test_max_batch_size_must_be_positive():
+    with pytest.raises(ValueError):
+        MicroBatcher(RecordingPredictor(), max_batch_size=0)
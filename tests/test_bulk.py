@@ -0,0 +1,157 @@
+"""
+Bulk scoring: CSV and JSONL records stream through the pipeline into output
+rows, shards partition the input, and a checkpointed run resumes where an
+interrupted one stopped without duplicating rows.
+"""
+
+import csv
+import json
+
+import pytest
+
+from models import bulk
+
+TEXTS = [
+    "Relieves back pain",
+    "Calms the mind",
+    "Opens the hips",
+    "Improves digestion",
+    "Strengthens the shoulders",
+    "Relieves stress",
+    "Stretches the hamstrings"
+]
+
+
+class FakePredictor:
+    """Scores a text by its length, failing after a number of batches if asked"""
+
+    def __init__(self, fail_after=None):
+        self.batches = 0
+        self.fail_after = fail_after
+
+    def predict_batch(self, texts, top_k=1):
+        if self.fail_after is not None and self.batches >= self.fail_after:
+            raise RuntimeError("worker killed")
+        self.batches += 1
+        return [self._predict(text, top_k) for text in texts]
+
+    def _predict(self, text, top_k):
+        ranked = [
+            {'asana': f"Asana {len(text) + i} ", 'asana_id': len(text) + i,
+             'confidence': 1.0 / (i + 2)}
+            for i in range(top_k)
+        ]
+        return dict(ranked[0], predictions=ranked)
+
+
+class FakeMudraDatabase:
+    def get_mudras_for_asana(self, asana, confidence):
+        return [{'name': 'Gyan Mudra'}, {'name': 'Prana Mudra'}]
+
+
+@pytest.fixture
+def jsonl_input(tmp_path):
+    path = tmp_path / 'input.jsonl'
+    lines = [json.dumps({'key': f"r{i}", 'benefits': text}) for i, text in enumerate(TEXTS)]
+    path.write_text('\n'.join(lines) + '\n')
+    return path
+
+
+def read_jsonl(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_detect_format():
+    assert bulk.detect_format('in.CSV') == 'csv'
+    assert bulk.detect_format('in.ndjson') == 'jsonl'
+    with pytest.raises(ValueError):
+        bulk.detect_format('in.txt')
+
+
+def test_jsonl_rows_follow_input(jsonl_input, tmp_path):
+    output = tmp_path / 'out.jsonl'
+    written = bulk.run(
+        jsonl_input, output, FakePredictor(), mudra_db=FakeMudraDatabase(),
+        id_field='key', batch_size=3
+    )
+    rows = read_jsonl(output)
+    assert written == len(TEXTS)
+    assert [row['id'] for row in rows] == [f"r{i}" for i in range(len(TEXTS))]
+    assert [row['row'] for row in rows] == list(range(len(TEXTS)))
+    assert rows[0] == {
+        'id': 'r0', 'row': 0, 'asana': f"Asana {len(TEXTS[0])} ",
+        'asana_id': len(TEXTS[0]), 'confidence': 0.5, 'mudras': ['Gyan Mudra', 'Prana Mudra']
+    }
+
+
+def test_malformed_records_are_reported_not_dropped(tmp_path):
+    path = tmp_path / 'input.jsonl'
+    path.write_text('{"benefits": "Calms the mind"}\n\nnot json\n{"other": 1}\n[1, 2]\n')
+    output = tmp_path / 'out.jsonl'
+    bulk.run(path, output, FakePredictor())
+    rows = read_jsonl(output)
+    assert [row['row'] for row in rows] == [0, 2, 3, 4]
+    assert 'error' not in rows[0]
+    assert [row.get('error') for row in rows[1:]] == ['Missing text'] * 3
+
+
+def test_csv_output_flattens_lists(tmp_path):
+    path = tmp_path / 'input.csv'
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['id', 'benefits'])
+        writer.writerow(['a', 'Relieves "deep", lasting\nback pain'])
+        writer.writerow(['b', 'Calms the mind'])
+    output = tmp_path / 'out.csv'
+    bulk.run(path, output, FakePredictor(), mudra_db=FakeMudraDatabase(), id_field='id',
+             top_k=2)
+
+    with open(output, newline='') as f:
+        rows = list(csv.DictReader(f))
+    assert [row['id'] for row in rows] == ['a', 'b']
+    assert rows[1]['mudras'] == 'Gyan Mudra;Prana Mudra'
+    assert rows[1]['predictions'] == 'Asana 14:0.5;Asana 15:0.333333'
+    assert list(rows[0]) == bulk.OUTPUT_FIELDS
+
+
+def test_shards_partition_the_input(jsonl_input, tmp_path):
+    rows = []
+    for index in range(3):
+        output = tmp_path / f"shard{index}.jsonl"
+        bulk.run(jsonl_input, output, FakePredictor(), shard_index=index, shard_count=3)
+        shard_rows = read_jsonl(output)
+        assert all(row['row'] % 3 == index for row in shard_rows)
+        rows.extend(shard_rows)
+    assert sorted(row['row'] for row in rows) == list(range(len(TEXTS)))
+
+
+@pytest.mark.parametrize('fmt', ['jsonl', 'csv'])
+def test_checkpoint_resumes_after_interruption(jsonl_input, tmp_path, fmt):
+    if fmt == 'csv':
+        source = jsonl_input.with_suffix('.csv')
+        with open(source, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['key', 'benefits'])
+            for record in read_jsonl(jsonl_input):
+                writer.writerow([record['key'], record['benefits']])
+    else:
+        source = jsonl_input
+    output = tmp_path / 'out.jsonl'
+    checkpoint = tmp_path / 'checkpoint.json'
+
+    with pytest.raises(RuntimeError):
+        bulk.run(source, output, FakePredictor(fail_after=2), id_field='key', batch_size=2,
+                 checkpoint_path=checkpoint)
+    assert len(read_jsonl(output)) == 4
+    assert json.loads(checkpoint.read_text())['row'] == 4
+
+    written = bulk.run(source, output, FakePredictor(), id_field='key', batch_size=2,
+                       checkpoint_path=checkpoint)
+    assert written == len(TEXTS) - 4
+    rows = read_jsonl(output)
+    assert [row['id'] for row in rows] == [f"r{i}" for i in range(len(TEXTS))]
+    assert json.loads(checkpoint.read_text())['written'] == len(TEXTS)
+
+    with pytest.raises(ValueError):
+        bulk.run(source, output, FakePredictor(), shard_index=1, shard_count=2,
+                 checkpoint_path=checkpoint)
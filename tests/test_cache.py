@@ -0,0 +1,100 @@
+"""
+ResultCache: LRU and TTL eviction, generation invalidation, and hits shared
+between workers through the SQLite backend.
+"""
+
+import multiprocessing
+
+import pytest
+
+from models.cache import ResultCache
+
+GENERATION = ('model-a', 'mudras-a')
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture(params=['local', 'sqlite'])
+def make_cache(request, tmp_path):
+    def make(**kwargs):
+        if request.param == 'sqlite':
+            kwargs['shared_path'] = tmp_path / 'cache.sqlite'
+        return ResultCache(**kwargs)
+    return make
+
+
+def test_miss_then_hit(make_cache):
+    cache = make_cache(max_entries=4)
+    assert cache.get([1, 2], GENERATION) is None
+    cache.put([1, 2], GENERATION, {'class': 3})
+    assert cache.get([1, 2], GENERATION) == {'class': 3}
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['entries']) == (1, 1, 1)
+
+
+def test_least_recently_used_entry_is_evicted(make_cache):
+    cache = make_cache(max_entries=2)
+    clock = FakeClock()
+    cache._clock = clock
+    cache.put([1], GENERATION, 'one')
+    clock.now += 1
+    cache.put([2], GENERATION, 'two')
+    clock.now += 1
+    assert cache.get([1], GENERATION) == 'one'
+    clock.now += 1
+    cache.put([3], GENERATION, 'three')
+
+    assert cache.get([2], GENERATION) is None
+    assert cache.get([1], GENERATION) == 'one'
+    assert cache.get([3], GENERATION) == 'three'
+    assert cache.stats()['evictions'] == 1
+
+
+def test_entries_expire_after_ttl(make_cache):
+    cache = make_cache(max_entries=4, ttl=30)
+    clock = FakeClock()
+    cache._clock = clock
+    cache.put([1], GENERATION, 'one')
+    clock.now += 29
+    assert cache.get([1], GENERATION) == 'one'
+    clock.now += 1
+    assert cache.get([1], GENERATION) is None
+    assert cache.stats()['entries'] == 0
+
+
+def test_new_generation_clears_the_cache(make_cache):
+    cache = make_cache(max_entries=4)
+    cache.put([1], GENERATION, 'one')
+    assert cache.get([1], ('model-b', 'mudras-a')) is None
+    assert cache.stats()['invalidations'] == 1
+    assert cache.stats()['entries'] == 0
+
+
+def test_options_are_part_of_the_key(make_cache):
+    cache = make_cache(max_entries=4)
+    cache.put([[1, 2], {'exclude': []}], GENERATION, 'plain')
+    assert cache.get([[1, 2], {'exclude': ['pregnancy']}], GENERATION) is None
+
+
+def _store_in_child(path):
+    ResultCache(max_entries=4, shared_path=path).put([7, 8], GENERATION, {'class': 5})
+
+
+def test_sqlite_hits_are_shared_between_workers(tmp_path):
+    path = tmp_path / 'cache.sqlite'
+    cache = ResultCache(max_entries=4, shared_path=path)
+    assert cache.get([7, 8], GENERATION) is None
+
+    worker = multiprocessing.get_context('fork').Process(target=_store_in_child, args=(path,))
+    worker.start()
+    worker.join(timeout=30)
+    assert worker.exitcode == 0
+
+    assert cache.get([7, 8], GENERATION) == {'class': 5}
+    assert cache.stats()['backend'] == 'sqlite'
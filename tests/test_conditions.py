@@ -0,0 +1,60 @@
+"""
+ConditionIndex: conditions extracted from Contraindications texts, and the
+class masks /predict uses to exclude them.
+"""
+
+import numpy as np
+import pytest
+
+from models.conditions import ConditionIndex
+
+ASANA_DATA = {
+    1: {'name': 'Sirshasana (headstand pose)',
+        'contraindications': 'Not for people with high blood pressure or heart disease.'},
+    2: {'name': 'Kapali Asana', 'contraindications': 'As for sirshasana.'},
+    3: {'name': 'Vajrasana', 'contraindications': 'Avoid with knee problems.'},
+    4: {'name': 'Shavasana', 'contraindications': 'No known contraindications.'},
+    5: {'name': 'Vipareeta Karani Asana', 'contraindications': ''},
+    6: {'name': 'Simhasana'}
+}
+
+
+@pytest.fixture(scope='module')
+def index():
+    return ConditionIndex(ASANA_DATA, class_labels=[1, 2, 3, 4, 5, 6, 7])
+
+
+def test_extracts_and_inherits_conditions(index):
+    assert index.conditions_of(1) == ['high_blood_pressure', 'heart_disease']
+    assert index.conditions_of(2) == ['high_blood_pressure', 'heart_disease']
+    assert index.conditions_of(3) == ['knee_problems']
+    assert index.conditions_of(4) == []
+
+
+def test_missing_text_is_unknown(index):
+    assert [index.contraindications_unknown(i) for i in range(1, 8)] == [
+        False, False, False, False, True, True, True
+    ]
+    assert index.conditions_of(5) == []
+
+
+def test_unknown_asanas_are_never_safe_when_excluding(index):
+    mask = index.safe_mask(['knee_problems'])
+    assert mask.tolist() == [True, True, False, True, False, False, False]
+    assert index.is_safe(4, ['pregnancy'])
+    assert not index.is_safe(5, ['pregnancy'])
+    assert not index.is_safe(6, ['pregnancy'])
+
+
+def test_no_exclusions_allow_everything(index):
+    assert index.safe_mask([]).all()
+    assert index.is_safe(5, [])
+
+
+def test_unknown_condition_raises(index):
+    with pytest.raises(ValueError):
+        index.safe_mask(['sunburn'])
+
+
+def test_class_bits_are_uint64(index):
+    assert index.class_bits.dtype == np.uint64
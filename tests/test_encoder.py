@@ -0,0 +1,108 @@
+"""
+Parity of the compiled TextEncoder with the original preprocessing pipeline:
+regex cleanup, stopword removal, Keras Tokenizer lookup and pad_sequences.
+"""
+
+import csv
+import re
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from models.encoder import TextEncoder
+from models.manifest import ModelManifest
+
+ML_DIR = Path(__file__).resolve().parent.parent / 'Machine_Learning'
+MANIFEST = ModelManifest.load(ML_DIR / 'model.json')
+CSV_DATA_FILE = ML_DIR / 'final_asan1_1.csv'
+
+LEGACY_STOPWORDS = {'a', 'an', 'the', 'and', 'or', 'in', 'is', 'it', 'to', 'of', 'for'}
+
+EDGE_CASES = [
+    '',
+    '   \n\t ',
+    'the and of a to',
+    '!!! 123 ???',
+    'Calms the mind — réduit le stress, Übungen für den Rücken, 心を落ち着かせる',
+    'İstanbul KELVIN ﬁve',
+    'relieves back pain\nand\r\nstrengthens the spine',
+    ' '.join(['stress', 'back', 'mind', 'sleep', 'digestion'] * 30),
+    'zzzz qqqq xyzzy'
+]
+
+
+def _word_index():
+    word_index = {}
+    with open(MANIFEST.vocab_file, 'r', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        next(reader)
+        for row in reader:
+            if len(row) >= 2:
+                word_index[row[1]] = int(row[0])
+    return word_index
+
+
+WORD_INDEX = _word_index()
+
+
+def legacy_encode(text, sequence_length=MANIFEST.sequence_length):
+    """
+    The predictor's pipeline before TextEncoder
+
+    Returns:
+        (padded row, whether the text was rejected as invalid input)
+    """
+    processed = re.sub(r'[^A-Za-z\n]+', ' ', text.lower())
+    processed = ' '.join(w for w in processed.split() if w not in LEGACY_STOPWORDS)
+    # Tokenizer.texts_to_sequences without num_words or oov_token
+    ids = [WORD_INDEX[w] for w in processed.split() if w in WORD_INDEX]
+    # pad_sequences(padding='post', truncating='pre')
+    ids = ids[-sequence_length:]
+    row = np.zeros(sequence_length, dtype=np.int32)
+    row[:len(ids)] = ids
+    return row, not processed
+
+
+def _benefits_texts():
+    with open(CSV_DATA_FILE, 'r', encoding='utf-8') as f:
+        return [row.get('Benefits') or '' for row in csv.DictReader(f)]
+
+
+@pytest.fixture(scope='module')
+def encoder():
+    return TextEncoder(WORD_INDEX, MANIFEST.sequence_length)
+
+
+@pytest.mark.parametrize('text', EDGE_CASES)
+def test_edge_cases_match_legacy(encoder, text):
+    expected, rejected = legacy_encode(text)
+    assert np.array_equal(encoder.encode(text), expected)
+    assert (encoder.tokenize(text) is None) == rejected
+
+
+def test_csv_benefits_match_legacy(encoder):
+    texts = _benefits_texts()
+    assert texts
+
+    mismatches = [
+        i for i, text in enumerate(texts)
+        if not np.array_equal(encoder.encode(text), legacy_encode(text)[0])
+        or (encoder.tokenize(text) is None) != legacy_encode(text)[1]
+    ]
+    assert mismatches == []
+
+
+def test_pack_into_reused_buffer_matches_rows(encoder):
+    texts = [text for text in _benefits_texts() + EDGE_CASES if encoder.tokenize(text)]
+    expected = np.stack([legacy_encode(text)[0] for text in texts])
+    # A buffer left dirty by a previous, longer batch
+    buffer = np.full((len(texts) + 5, MANIFEST.sequence_length), 7, dtype=np.int32)
+    packed = encoder.pack([encoder.tokenize(text) for text in texts], out=buffer)
+    assert np.array_equal(packed[:len(texts)], expected)
+
+
+def test_long_text_keeps_last_tokens(encoder):
+    text = ' '.join(['stress'] * 10 + ['mind'] * MANIFEST.sequence_length)
+    row = encoder.encode(text)
+    assert np.all(row == WORD_INDEX['mind'])
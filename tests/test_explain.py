@@ -0,0 +1,60 @@
+"""
+Explanations decompose the predicted class logit exactly.
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from models.manifest import ModelManifest
+from models.predictor import YogaPredictor
+
+ML_DIR = Path(__file__).resolve().parent.parent / 'Machine_Learning'
+MANIFEST = ModelManifest.load(ML_DIR / 'model.json')
+
+pytestmark = pytest.mark.skipif(
+    not MANIFEST.weights.exists(), reason='weight.h5 not available'
+)
+
+TEXTS = [
+    'relieves back pain and strengthens the spine',
+    'calms the mind, reduces stress and anxiety, improves sleep',
+    'improves digestion digestion digestion'
+]
+
+
+@pytest.fixture(scope='module')
+def predictor():
+    return YogaPredictor(backend='numpy', use_bundle=False)
+
+
+def _logits(predictor, text):
+    """Logit of every class rebuilt from the explanations"""
+    logits = np.empty(predictor.num_classes)
+    for class_index in range(predictor.num_classes):
+        explanation = predictor.explain(text, class_index, top_words=MANIFEST.sequence_length)
+        contributions = sum(word['contribution'] for word in explanation['words'])
+        logits[class_index] = contributions + explanation['padding'] + explanation['bias']
+    return logits
+
+
+@pytest.mark.parametrize('text', TEXTS)
+def test_contributions_plus_bias_give_the_logits(predictor, text):
+    logits = _logits(predictor, text)
+    probabilities = np.exp(logits - logits.max())
+    probabilities /= probabilities.sum()
+
+    padded = predictor.encoder.pack([predictor.encoder.tokenize(text)])
+    assert np.allclose(probabilities, predictor.model.predict(padded)[0], atol=1e-5)
+
+    prediction = predictor.predict(text, explain=True)
+    best = int(np.argmax(logits))
+    assert prediction['asana_id'] == predictor.class_payloads[best]['asana_id']
+    assert prediction['confidence'] == pytest.approx(probabilities[best], abs=1e-5)
+
+
+def test_repeated_words_are_summed(predictor):
+    explanation = predictor.explain(TEXTS[2], 0)
+    counts = {word['word']: word['count'] for word in explanation['words']}
+    assert counts['digestion'] == 3
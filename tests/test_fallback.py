@@ -0,0 +1,68 @@
+"""
+KeywordFallback: the Aho-Corasick matcher finds every pattern occurrence, and
+Benefits phrases rank asanas by TF-IDF with rare phrases counting for more.
+"""
+
+import pytest
+
+from models.fallback import AhoCorasick, KeywordFallback
+
+ASANA_DATA = {
+    1: {'benefits': 'Relieves sciatica and lower back pain. Improves posture.'},
+    2: {'benefits': 'Stretches the hamstrings and improves posture.'},
+    3: {'benefits': 'Calms the mind and reduces stress. Improves posture.'},
+    4: {'benefits': 'Strengthens the back and the shoulders.'},
+    5: {'benefits': 'Improves digestion and massages the abdominal organs.'},
+    6: {'benefits': 'Opens the hips and improves posture.'},
+    7: {'benefits': 'Improves balance and focus.'},
+    8: {'benefits': ''},
+    9: {'name': 'No benefits listed'}
+}
+
+
+@pytest.fixture(scope='module')
+def fallback():
+    return KeywordFallback.build(ASANA_DATA)
+
+
+def test_automaton_finds_overlapping_patterns():
+    automaton = AhoCorasick(['he', 'she', 'his', 'hers'])
+    assert sorted(automaton.find('ushers')) == [0, 1, 3]
+    assert sorted(automaton.find('ahishers')) == [0, 1, 2, 3]
+    assert automaton.find('hehe') == [0, 0]
+    assert automaton.find('xyz') == []
+
+
+def test_common_phrases_are_dropped(fallback):
+    # 'improves' is in 6 of 7 Benefits texts, over the document share limit
+    assert 'improve' not in fallback.phrases
+    assert 'sciatica' in fallback.phrases
+    assert 'lower back' in fallback.phrases
+    assert set(fallback.asana_ids.tolist()) == set(range(1, 8))
+
+
+def test_rare_phrase_wins(fallback):
+    [(asana_id, confidence)] = fallback.rank('I have sciatica and a stiff back')
+    assert asana_id == 1
+    assert 0.5 < confidence <= 1.0
+
+
+def test_confidences_are_shares_of_the_total(fallback):
+    ranked = fallback.rank('my back and shoulders ache', top_k=10)
+    assert [asana_id for asana_id, _ in ranked] == [4, 1]
+    assert sum(confidence for _, confidence in ranked) == pytest.approx(1.0)
+
+
+def test_matches_whole_words_only(fallback):
+    assert fallback.rank('backache and hipster mindset') == []
+
+
+def test_allowed_restricts_the_choice(fallback):
+    assert fallback.rank('sciatica and stress', allowed={3})[0][0] == 3
+    assert fallback.rank('sciatica', allowed={2, 3}) == []
+
+
+def test_no_keywords_is_empty(fallback):
+    assert fallback.rank('') == []
+    assert fallback.rank('the and of') == []
+    assert fallback.rank('improves posture') == []
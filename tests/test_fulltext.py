@@ -0,0 +1,87 @@
+"""
+FullTextIndex: BM25 scores match the textbook formula, field boosts and term
+rarity order the results, and the index survives a round trip through the
+artifact bundle.
+"""
+
+import math
+
+import pytest
+
+from models.fulltext import B, K1, FullTextIndex, terms
+
+ASANA_DATA = {
+    1: {'name': 'Bhujangasana', 'benefits': 'Strengthens the back and spine.',
+        'description': 'Lie on the stomach and lift the chest.'},
+    2: {'name': 'Balasana', 'benefits': 'Relaxes the back, hips and shoulders.',
+        'description': 'Kneel and fold forward, resting the forehead.'},
+    3: {'name': 'Setu Bandhasana', 'benefits': 'Opens the chest and relieves back pain.',
+        'description': 'Lift the hips from the floor.',
+        'contraindications': 'Avoid with neck injuries.'},
+    4: {'name': 'Back Stretch', 'benefits': 'Calms the mind.',
+        'description': 'Sit with straight legs and reach forward.'},
+    5: {'name': 'Shavasana', 'benefits': 'Relaxes the whole body.'}
+}
+
+
+@pytest.fixture(scope='module')
+def index():
+    return FullTextIndex.build(ASANA_DATA)
+
+
+def test_terms_drop_stop_words_and_plurals():
+    assert terms('The hips and the shoulders') == ['hip', 'shoulder']
+    assert terms('Stress is less') == ['stress', 'less']
+
+
+def test_score_is_bm25(index):
+    # 'mind' appears once, only in asana 4's benefits
+    lengths = [len(terms(info.get('benefits') or '')) for info in ASANA_DATA.values()]
+    avg = sum(lengths) / len(lengths)
+    n, df, tf, length = len(ASANA_DATA), 1, 1, lengths[3]
+    idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+    expected = idf * tf * (K1 + 1) / (tf + K1 * (1 - B + B * length / avg))
+
+    [(asana_id, score, fields)] = index.search('mind', boosts={'benefits': 1.0})
+    assert asana_id == 4
+    assert fields == ['benefits']
+    assert score == pytest.approx(expected, rel=1e-5)
+
+
+def test_name_match_outranks_body_matches(index):
+    results = index.search('back')
+    assert results[0][0] == 4
+    assert results[0][2] == ['name']
+    assert {asana_id for asana_id, _, _ in results} == {1, 2, 3, 4}
+
+
+def test_scores_add_up_across_terms_and_fields(index):
+    both = {asana_id: score for asana_id, score, _ in index.search('chest lift')}
+    chest = {asana_id: score for asana_id, score, _ in index.search('chest')}
+    lift = {asana_id: score for asana_id, score, _ in index.search('lift')}
+    assert set(both) == {1, 3}
+    for asana_id in both:
+        assert both[asana_id] == pytest.approx(chest[asana_id] + lift[asana_id], rel=1e-5)
+
+
+def test_matched_fields_are_reported(index):
+    results = {asana_id: fields for asana_id, _, fields in index.search('neck hips')}
+    assert results == {2: ['benefits'], 3: ['description', 'contraindications']}
+
+
+def test_zero_boost_leaves_field_out(index):
+    assert index.search('neck', boosts={'contraindications': 0}) == []
+    assert [r[0] for r in index.search('back', boosts={'name': 0})] == [1, 2, 3]
+
+
+def test_top_k_and_unknown_terms(index):
+    assert len(index.search('back', top_k=2)) == 2
+    assert index.search('levitation') == []
+    assert index.search('the and of') == []
+
+
+def test_round_trip_through_bundle(index):
+    bundle = dict(index.arrays, **index.documents)
+    loaded = FullTextIndex.from_bundle(bundle)
+    assert len(loaded) == len(index)
+    assert loaded.search('relaxes back') == index.search('relaxes back')
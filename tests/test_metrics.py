@@ -0,0 +1,40 @@
+"""
+Metrics keeps the counts of finished threads without keeping their shards.
+"""
+
+import threading
+
+from models.metrics import Metrics
+
+PREDICTIONS = ('yoga_predictions_total', (('model_version', '1'), ('variant', 'primary')))
+
+
+def _record(metrics):
+    metrics.inc('yoga_predictions_total', model_version='1', variant='primary')
+    metrics.stage('forward', 0.001)
+
+
+def _run_threads(metrics, n):
+    for _ in range(n):
+        thread = threading.Thread(target=_record, args=(metrics,))
+        thread.start()
+        thread.join()
+
+
+def test_finished_threads_are_folded():
+    metrics = Metrics(directory=None)
+    _run_threads(metrics, 200)
+    _record(metrics)
+
+    counters, histograms = metrics.snapshot()
+    assert len(metrics._shards) == 1
+    assert counters[PREDICTIONS] == 201
+    forward = histograms[('yoga_stage_seconds', (('stage', 'forward'),))]
+    assert sum(forward[:-1]) == 201
+
+
+def test_shards_do_not_grow_between_reads():
+    metrics = Metrics(directory=None)
+    _run_threads(metrics, 200)
+    assert len(metrics._shards) <= 1
+    assert metrics.snapshot()[0][PREDICTIONS] == 200
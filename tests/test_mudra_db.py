@@ -0,0 +1,50 @@
+"""
+Hot reload of the mudra catalogue and the result cache generation built on it.
+"""
+
+import json
+import time
+
+import pytest
+
+from models.cache import ResultCache
+from models.mudra_db import MUDRA_DATA_FILE, MudraDatabase
+
+
+@pytest.fixture
+def data_file(tmp_path):
+    path = tmp_path / 'mudras.json'
+    path.write_text(MUDRA_DATA_FILE.read_text(encoding='utf-8'), encoding='utf-8')
+    return path
+
+
+def _edit_english_name(path, name, english_name):
+    data = json.loads(path.read_text(encoding='utf-8'))
+    data['mudras'][name]['english_name'] = english_name
+    # The hand-written version stamp is deliberately left alone
+    path.write_text(json.dumps(data), encoding='utf-8')
+
+
+def test_digest_follows_file_contents(data_file):
+    mudra_db = MudraDatabase(data_file, reload_interval=0)
+    digest = mudra_db.data_digest
+    version = mudra_db.data_version
+
+    _edit_english_name(data_file, 'Gyan Mudra', 'Gesture of Wisdom')
+    assert mudra_db.reload()
+    assert mudra_db.data_version == version
+    assert mudra_db.data_digest != digest
+
+
+def test_edited_file_misses_the_cache(data_file):
+    mudra_db = MudraDatabase(data_file, reload_interval=0.001)
+    cache = ResultCache(max_entries=8)
+    key = [[1, 2, 3], {}, 'primary']
+    recommendations = mudra_db.get_mudras_for_asana('Padmasana')
+    cache.put(key, ('model', mudra_db.data_digest), recommendations)
+    assert cache.get(key, ('model', mudra_db.data_digest)) == recommendations
+
+    _edit_english_name(data_file, 'Gyan Mudra', 'Gesture of Wisdom')
+    time.sleep(0.01)
+    assert mudra_db.get_mudra_details('Gyan Mudra')['english_name'] == 'Gesture of Wisdom'
+    assert cache.get(key, ('model', mudra_db.data_digest)) is None
@@ -0,0 +1,67 @@
+"""
+Parity of the NumPy inference backend with the TensorFlow model it replaces.
+"""
+
+import importlib.util
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from models.manifest import ModelManifest
+from models.numpy_backend import NumpyModel
+
+ML_DIR = Path(__file__).resolve().parent.parent / 'Machine_Learning'
+MANIFEST = ModelManifest.load(ML_DIR / 'model.json')
+
+requires_weights = pytest.mark.skipif(
+    not MANIFEST.weights.exists(), reason='weight.h5 not available'
+)
+
+
+def _keras_major():
+    if importlib.util.find_spec('tensorflow') is None:
+        return None
+    import tensorflow as tf
+    return int(tf.keras.__version__.split('.')[0])
+
+
+def _padded_batch(seed=0, rows=64):
+    """Random token rows with a realistic spread of lengths and padding"""
+    rng = np.random.default_rng(seed)
+    padded = np.zeros((rows, MANIFEST.sequence_length), dtype=np.int32)
+    for row in range(rows):
+        n = rng.integers(1, MANIFEST.sequence_length + 1)
+        padded[row, :n] = rng.integers(1, MANIFEST.vocab_size, size=n)
+    return padded
+
+
+@requires_weights
+@pytest.mark.skipif(importlib.util.find_spec('tensorflow') is None,
+                    reason='TensorFlow not installed')
+def test_matches_tensorflow_forward_pass():
+    import tensorflow as tf
+
+    model = NumpyModel.from_h5(MANIFEST.weights)
+    padded = _padded_batch()
+
+    # The trained graph: Embedding -> mean over the sequence -> Dense(softmax)
+    hidden = tf.reduce_mean(tf.nn.embedding_lookup(model.embeddings, padded), axis=1)
+    expected = tf.nn.softmax(tf.matmul(hidden, model.kernel) + model.bias).numpy()
+
+    assert np.allclose(model.predict(padded), expected, atol=1e-5)
+
+
+@requires_weights
+@pytest.mark.skipif(_keras_major() != 2, reason='Keras 2.x not available')
+def test_matches_keras_backend():
+    from models.predictor import YogaPredictor
+
+    keras_predictor = YogaPredictor(backend='keras', use_bundle=False)
+    numpy_predictor = YogaPredictor(backend='numpy', use_bundle=False)
+    assert keras_predictor.model is not None
+
+    padded = _padded_batch()
+    expected = keras_predictor.model.predict(padded, verbose=0)
+    assert np.allclose(numpy_predictor.model.predict(padded), expected, atol=1e-5)
+
@@ -0,0 +1,53 @@
+"""
+InferencePool workers serve from the shared weight arrays without copying them.
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from models import pool as pool_module
+from models.manifest import ModelManifest
+from models.pool import InferencePool
+from models.predictor import YogaPredictor
+
+ML_DIR = Path(__file__).resolve().parent.parent / 'Machine_Learning'
+MANIFEST = ModelManifest.load(ML_DIR / 'model.json')
+
+pytestmark = pytest.mark.skipif(
+    not MANIFEST.weights.exists(), reason='weight.h5 not available'
+)
+
+TEXTS = ['relieves back pain', 'calms the mind and reduces stress', 'the of', 'improves digestion']
+
+
+@pytest.fixture(scope='module')
+def predictor():
+    return YogaPredictor(backend='numpy', use_bundle=False)
+
+
+def test_worker_arrays_are_views_of_shared_memory(predictor):
+    with InferencePool(predictor, processes=1) as pool:
+        # Run the worker initializer in this process to inspect its predictor
+        pool_module._init_worker(predictor.spec, pool.layout)
+        try:
+            shared = {
+                name: np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+                for (name, (_, shape, dtype)), block
+                in zip(pool.layout.items(), pool_module._worker_blocks)
+            }
+            worker = pool_module._worker_predictor
+            for name, array in worker.model.weights.items():
+                assert np.shares_memory(array, shared[name]), name
+            assert np.shares_memory(worker.semantic_index.embeddings, shared['embeddings'])
+        finally:
+            pool_module._worker_predictor = None
+            while pool_module._worker_blocks:
+                pool_module._worker_blocks.pop().close()
+
+
+def test_pool_matches_predictor(predictor):
+    expected = predictor.predict_batch(TEXTS * 10, top_k=3)
+    with InferencePool(predictor, processes=2, chunk_size=8, start_method='fork') as pool:
+        assert pool.predict_batch(TEXTS * 10, top_k=3) == expected
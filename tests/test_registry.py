@@ -0,0 +1,153 @@
+"""
+ModelRegistry: atomic swaps that leave the current model serving when a load
+fails, weighted A/B routing, and the hot swap triggered by changed files.
+"""
+
+import os
+import time
+from collections import Counter
+from types import SimpleNamespace
+
+import pytest
+
+from models.registry import PRIMARY, ModelRegistry
+
+
+class FakePredictor:
+    def __init__(self, manifest_path, version, loads=True, warms=True):
+        self.manifest_path = manifest_path
+        self.manifest = SimpleNamespace(
+            weights=manifest_path.with_suffix('.weights.h5'),
+            to_dict=lambda: {'version': version}
+        )
+        self.model_version = version
+        self.content_version = f"digest-{version}"
+        self.backend = 'numpy'
+        self.precision = 'float32'
+        self.model = object() if loads else None
+        self.ready = False
+        self.state = 'loading'
+        self._warms = warms
+
+    def _warmup(self):
+        self.ready = self._warms
+        self.state = 'ready' if self._warms else 'failed'
+
+    def predict_batch(self, texts, **options):
+        return [{'model_version': self.model_version, 'text': text} for text in texts]
+
+
+@pytest.fixture
+def manifests(tmp_path):
+    paths = {}
+    for name in ('a', 'b', 'c'):
+        path = tmp_path / f"{name}.json"
+        path.write_text('{}')
+        path.with_suffix('.weights.h5').write_bytes(b'weights')
+        paths[name] = path
+    return paths
+
+
+@pytest.fixture
+def factory(manifests):
+    built = []
+
+    def build(manifest, **kwargs):
+        predictor = FakePredictor(manifest, version=manifest.stem, **kwargs)
+        built.append(predictor)
+        return predictor
+    build.built = built
+    return build
+
+
+@pytest.fixture
+def registry(factory, manifests):
+    primary = factory(manifests['a'])
+    primary._warmup()
+    return ModelRegistry(factory, primary, reload_interval=0)
+
+
+def test_load_swaps_the_primary(registry, manifests):
+    before = registry.generation
+    registry.load(manifests['b'])
+    assert registry.primary.model_version == 'b'
+    assert registry.version == 1
+    assert registry.generation != before
+    assert registry.predict_batch(["x"])[0]['model_version'] == 'b'
+
+
+def test_failed_load_keeps_current_variants(registry, manifests):
+    def broken(manifest):
+        return FakePredictor(manifest, version='broken', warms=False)
+    registry._factory = broken
+    with pytest.raises(RuntimeError):
+        registry.load(manifests['b'])
+    with pytest.raises(RuntimeError):
+        registry.load(manifests['b'].with_name('missing.json'))
+    assert registry.primary.model_version == 'a'
+    assert registry.version == 0
+
+
+def test_routing_follows_the_split(registry, manifests):
+    registry.load(manifests['b'], name='b')
+    assert registry.choose()[0] == PRIMARY
+
+    registry.set_split({'b': 0.25})
+    counts = Counter(registry.choose(routing_key=f"user-{i}")[0] for i in range(4000))
+    assert abs(counts['b'] / 4000 - 0.25) < 0.03
+    assert counts['b'] + counts[PRIMARY] == 4000
+    assert registry.split == {'b': 0.25}
+
+
+def test_routing_key_is_sticky(registry, manifests):
+    registry.load(manifests['b'], name='b')
+    registry.set_split({'b': 0.5})
+    for i in range(50):
+        key = f"user-{i}"
+        assert len({registry.choose(routing_key=key)[0] for _ in range(5)}) == 1
+
+
+@pytest.mark.parametrize('weights', [
+    {'missing': 0.1}, {PRIMARY: 0.1}, {'b': 1.5}, {'b': True}, {'b': 0.6, 'c': 0.6}
+])
+def test_invalid_split_is_rejected(registry, manifests, weights):
+    registry.load(manifests['b'], name='b')
+    registry.load(manifests['c'], name='c')
+    with pytest.raises(ValueError):
+        registry.set_split(weights)
+
+
+def test_promote_and_remove(registry, manifests):
+    registry.load(manifests['b'], name='b')
+    registry.load(manifests['c'], name='c')
+    registry.set_split({'b': 0.2, 'c': 0.3})
+
+    registry.promote('b')
+    assert registry.primary.model_version == 'b'
+    assert registry.get('b') is None
+    assert registry.split == {'c': 0.3}
+
+    registry.remove('c')
+    assert registry.split == {}
+    assert registry.choose(routing_key='anyone') == (PRIMARY, registry.primary)
+    with pytest.raises(ValueError):
+        registry.remove(PRIMARY)
+    with pytest.raises(KeyError):
+        registry.remove('c')
+
+
+def test_changed_weights_trigger_a_hot_swap(registry, manifests, factory):
+    registry.reload_interval = 0.001
+    weights = manifests['a'].with_suffix('.weights.h5')
+    weights.write_bytes(b'new weights')
+    stat = os.stat(weights)
+    os.utime(weights, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    time.sleep(0.01)
+
+    registry.check_for_changes()
+    deadline = time.monotonic() + 5
+    while registry.version == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert registry.version == 1
+    assert registry.primary is factory.built[-1]
+    assert registry.primary.manifest_path == manifests['a']
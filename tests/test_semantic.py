@@ -0,0 +1,35 @@
+"""
+SemanticIndex embeds queries from the model's table in its own precision.
+"""
+
+import numpy as np
+import pytest
+
+from models.numpy_backend import NumpyModel
+from models.semantic import SemanticIndex
+
+
+@pytest.fixture(scope='module')
+def model():
+    rng = np.random.default_rng(0)
+    embeddings = rng.normal(size=(200, 16)).astype(np.float32)
+    kernel = rng.normal(size=(16, 8)).astype(np.float32)
+    return NumpyModel(embeddings, kernel, np.zeros(8, dtype=np.float32))
+
+
+TOKEN_LISTS = [[1, 2, 3], [5], [], [7, 7, 190, 42]]
+
+
+@pytest.mark.parametrize('precision', ['float16', 'int8'])
+def test_embeds_without_a_float32_copy(model, precision):
+    quantized = model.quantize(precision)
+    index = SemanticIndex([1], np.zeros((1, 16)), quantized.embeddings, quantized.embedding_scales)
+    assert index.embeddings is quantized.embeddings
+
+    reference = SemanticIndex([1], np.zeros((1, 16)), quantized.dequantized()[0])
+    assert np.allclose(index.embed(TOKEN_LISTS), reference.embed(TOKEN_LISTS), atol=1e-6)
+
+
+def test_empty_token_list_gives_zero_row(model):
+    index = SemanticIndex([1], np.zeros((1, 16)), model.embeddings)
+    assert not index.embed([[]]).any()